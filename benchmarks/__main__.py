@@ -0,0 +1,19 @@
+from importlib import import_module
+from pathlib import Path
+from sys import exit, path
+
+_BENCHMARKS = Path(__file__).resolve(strict=True).parent
+_TOP_LV = _BENCHMARKS.parent
+_ROOT = _TOP_LV.parent
+
+
+def main() -> int:
+    # same layout as `tests`, the suite imports `std2` relative to the top level
+    path.insert(0, str(_ROOT))
+    run = import_module(f"{_TOP_LV.name}.{_BENCHMARKS.name}.run")
+    code: int = run.main()
+    return code
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field, make_dataclass
+from datetime import datetime, timedelta, timezone
+from random import Random
+from typing import Any, Literal, Mapping, Optional, Sequence, Tuple, Union
+from uuid import UUID
+
+from ..std2.pickle.coders import (
+    DEFAULT_DECODERS,
+    DEFAULT_ENCODERS,
+    iso_date_decoder,
+    iso_date_encoder,
+)
+from ..std2.pickle.types import Decoder, Encoder
+
+_RAND = Random(0)
+_DECODERS = (iso_date_decoder, *DEFAULT_DECODERS)
+_ENCODERS = (iso_date_encoder, *DEFAULT_ENCODERS)
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    tp: Any
+    records: Sequence[Any]
+    decoders: Sequence[Decoder] = field(default=_DECODERS)
+    encoders: Sequence[Encoder] = field(default=_ENCODERS)
+    batch: bool = False
+
+
+def _text(n: int = 8) -> str:
+    return "".join(_RAND.choices("abcdefghijklmnopqrstuvwxyz", k=n))
+
+
+"""
+Wide
+"""
+
+_WIDE_TYPES: Sequence[Tuple[Any, Any]] = (
+    (int, lambda: _RAND.randint(-(2**31), 2**31)),
+    (float, lambda: _RAND.random()),
+    (str, _text),
+    (bool, lambda: _RAND.random() > 0.5),
+    (Optional[int], lambda: None if _RAND.random() > 0.5 else _RAND.randint(0, 9)),
+)
+
+Wide = make_dataclass(
+    "Wide",
+    [(f"f{idx}", _WIDE_TYPES[idx % len(_WIDE_TYPES)][0]) for idx in range(40)],
+    frozen=True,
+)
+
+
+def _wide() -> Mapping[str, Any]:
+    return {f"f{idx}": _WIDE_TYPES[idx % len(_WIDE_TYPES)][1]() for idx in range(40)}
+
+
+"""
+Deep
+"""
+
+
+@dataclass(frozen=True)
+class Leaf:
+    name: str
+    value: float
+
+
+@dataclass(frozen=True)
+class Deep:
+    depth: int
+    leaves: Sequence[Leaf]
+    child: Optional[Deep3]
+
+
+@dataclass(frozen=True)
+class Deep3:
+    depth: int
+    leaves: Sequence[Leaf]
+    child: Optional[Deep2]
+
+
+@dataclass(frozen=True)
+class Deep2:
+    depth: int
+    leaves: Sequence[Leaf]
+    child: Optional[Deep1]
+
+
+@dataclass(frozen=True)
+class Deep1:
+    depth: int
+    leaves: Sequence[Leaf]
+    child: None
+
+
+def _deep(depth: int = 4) -> Optional[Mapping[str, Any]]:
+    if not depth:
+        return None
+    else:
+        leaves = [{"name": _text(), "value": _RAND.random()} for _ in range(3)]
+        return {"depth": depth, "leaves": leaves, "child": _deep(depth - 1)}
+
+
+"""
+Unions
+"""
+
+_KINDS = tuple(f"k{idx}" for idx in range(12))
+
+_BRANCHES = tuple(
+    make_dataclass(
+        f"Branch{idx}",
+        [("kind", Literal[kind]), ("a", int), (f"b{idx}", str)],
+        frozen=True,
+    )
+    for idx, kind in enumerate(_KINDS)
+)
+
+BigUnion = Union[_BRANCHES]  # type: ignore
+
+
+def _branch() -> Mapping[str, Any]:
+    idx = _RAND.randrange(len(_KINDS))
+    return {"kind": _KINDS[idx], "a": _RAND.randint(0, 99), f"b{idx}": _text()}
+
+
+"""
+Dates & UUIDs
+"""
+
+
+@dataclass(frozen=True)
+class Event:
+    id: UUID
+    at: datetime
+    refs: Sequence[UUID]
+
+
+_T0 = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def _event() -> Mapping[str, Any]:
+    at = _T0 + timedelta(seconds=_RAND.randrange(3600))
+    return {
+        "id": str(UUID(int=_RAND.getrandbits(128))),
+        "at": at.isoformat(),
+        "refs": [str(UUID(int=_RAND.getrandbits(128))) for _ in range(4)],
+    }
+
+
+"""
+Rows
+"""
+
+
+@dataclass(frozen=True)
+class Row:
+    a: int
+    b: str
+
+
+CASES: Sequence[Case] = (
+    Case(name="wide", tp=Wide, records=[_wide() for _ in range(200)]),
+    Case(name="deep", tp=Deep, records=[_deep() for _ in range(200)]),
+    Case(
+        name="large_seq",
+        tp=Sequence[int],
+        records=[[_RAND.randint(0, 2**20) for _ in range(10_000)] for _ in range(4)],
+    ),
+    Case(
+        name="large_map",
+        tp=Mapping[str, float],
+        records=[{_text(12): _RAND.random() for _ in range(10_000)} for _ in range(4)],
+    ),
+    Case(name="big_union", tp=BigUnion, records=[_branch() for _ in range(500)]),
+    Case(name="dates_uuids", tp=Event, records=[_event() for _ in range(300)]),
+    Case(
+        name="rows",
+        tp=Row,
+        records=[{"a": idx, "b": _text()} for idx in range(10_000)],
+        batch=True,
+    ),
+)
@@ -0,0 +1,139 @@
+from argparse import ArgumentParser, Namespace
+from gc import collect, disable, enable
+from json import dumps, loads
+from pathlib import Path
+from platform import python_implementation, python_version
+from sys import getallocatedblocks
+from time import perf_counter
+from typing import Any, Callable, Iterator, Mapping, MutableMapping, Sequence, Tuple
+
+from ..std2.pickle.decoder import new_decoder
+from ..std2.pickle.encoder import new_encoder
+from .pickle import CASES, Case
+
+_BASELINES = Path(__file__).resolve(strict=True).parent / "baselines.json"
+
+_Coder = Callable[[Any], Any]
+
+
+def _parse_args() -> Namespace:
+    parser = ArgumentParser()
+    parser.add_argument("-s", "--save", action="store_true", default=False)
+    parser.add_argument("-c", "--check", action="store_true", default=False)
+    parser.add_argument("-t", "--tolerance", type=float, default=0.3)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("-d", "--duration", type=float, default=0.2)
+    parser.add_argument("names", nargs="*", default=())
+    return parser.parse_args()
+
+
+def _coders(case: Case) -> Iterator[Tuple[str, _Coder, Sequence[Any], int]]:
+    for compile in (False, True):
+        mode = "compiled" if compile else "interpreted"
+        dec = new_decoder[Any](case.tp, decoders=case.decoders, compile=compile)
+        enc = new_encoder[Any](case.tp, encoders=case.encoders, compile=compile)
+        things = [dec(record) for record in case.records]
+
+        yield f"{case.name}.decode.{mode}", dec, case.records, 1
+        yield f"{case.name}.encode.{mode}", enc, things, 1
+        if case.batch:
+            # ops are still counted per row
+            rows = len(case.records)
+            yield f"{case.name}.decode_many.{mode}", dec.decode_many, (
+                case.records,
+            ), rows
+            yield f"{case.name}.encode_many.{mode}", enc.encode_many, (things,), rows
+
+
+def _ops(
+    coder: _Coder, xs: Sequence[Any], rows: int, repeat: int, duration: float
+) -> float:
+    best, rounds = 0.0, 1
+    while True:
+        t0 = perf_counter()
+        for _ in range(rounds):
+            for x in xs:
+                coder(x)
+        if (elapsed := perf_counter() - t0) >= duration / 10:
+            break
+        rounds *= 2
+
+    rounds = max(1, int(rounds * duration / elapsed))
+    for _ in range(repeat):
+        t0 = perf_counter()
+        for _ in range(rounds):
+            for x in xs:
+                coder(x)
+        best = max(best, rounds * len(xs) * rows / (perf_counter() - t0))
+
+    return best
+
+
+def _blocks(coder: _Coder, xs: Sequence[Any], rows: int) -> float:
+    collect()
+    disable()
+    try:
+        b0 = getallocatedblocks()
+        kept = [coder(x) for x in xs]
+        b1 = getallocatedblocks()
+    finally:
+        enable()
+
+    del kept
+    return (b1 - b0) / (len(xs) * rows)
+
+
+def _reference(case: Case, repeat: int, duration: float) -> float:
+    # the same records through the stdlib, to factor out the speed of the host
+    return _ops(dumps, case.records, rows=1, repeat=repeat, duration=duration)
+
+
+def _env() -> str:
+    return f"{python_implementation()}-{python_version()}"
+
+
+def main() -> int:
+    args = _parse_args()
+    baselines: MutableMapping[str, Any] = (
+        loads(_BASELINES.read_text()) if _BASELINES.exists() else {}
+    )
+    # ops/sec relative to `json.dumps` over the same records, not absolute
+    previous: Mapping[str, float] = baselines.get("ratios", {})
+    current: MutableMapping[str, float] = {}
+    regressions = 0
+
+    header = f"{'ops/sec':>12} {'blocks/op':>10} {'x json':>8} {'baseline':>9}"
+    print(f"{'benchmark':<36} {header}")
+    for case in CASES:
+        if args.names and case.name not in args.names:
+            continue
+
+        ref = _reference(case, repeat=args.repeat, duration=args.duration)
+        for name, coder, xs, rows in _coders(case):
+            ops = _ops(coder, xs, rows=rows, repeat=args.repeat, duration=args.duration)
+            blocks = _blocks(coder, xs, rows=rows)
+            current[name] = rel = ops / ref
+
+            if base := previous.get(name):
+                ratio = rel / base
+                delta = f"{ratio - 1:>+9.1%}"
+                if ratio < 1 - args.tolerance:
+                    regressions += 1
+                    delta += " !"
+            else:
+                delta = f"{'-':>9}"
+
+            print(
+                f"{name:<36} {ops:>12,.0f} {blocks:>10.1f} {rel:>8.3f} {delta}",
+                flush=True,
+            )
+
+    if args.save:
+        ratios = {**previous, **{k: round(v, 4) for k, v in current.items()}}
+        json = {"env": _env(), "ratios": dict(sorted(ratios.items()))}
+        _BASELINES.write_text(dumps(json, indent=2) + "\n")
+
+    if baselines and baselines.get("env") != _env():
+        print(f"baselines recorded on {baselines.get('env')}, running on {_env()}")
+
+    return 1 if args.check and regressions else 0
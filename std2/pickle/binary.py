@@ -0,0 +1,579 @@
+from __future__ import annotations
+
+from dataclasses import is_dataclass
+from ipaddress import (
+    IPv4Address,
+    IPv4Interface,
+    IPv4Network,
+    IPv6Address,
+    IPv6Interface,
+    IPv6Network,
+)
+from pathlib import PurePath
+from struct import Struct
+from struct import error as StructError
+from typing import (
+    Any,
+    Callable,
+    Generic,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Sequence,
+    SupportsFloat,
+    Tuple,
+    TypeVar,
+    Union,
+    cast,
+    get_args,
+    get_origin,
+)
+from uuid import UUID
+
+from ..types import is_iterable_not_str
+from .cache import LRU, type_key
+from .plan import (
+    AnyPlan,
+    CustomPlan,
+    DataclassPlan,
+    EnumPlan,
+    FloatPlan,
+    InstancePlan,
+    LiteralPlan,
+    MapPlan,
+    NonePlan,
+    Plan,
+    SeqPlan,
+    SetPlan,
+    TuplePlan,
+    UnionPlan,
+    new_plan,
+    tie,
+)
+from .types import DecodeError, EncodeError, Failure, rebase, to_error
+
+_T = TypeVar("_T")
+
+_F64 = Struct("<d")
+_NoneType = type(None)
+
+_Writer = Callable[[Any, bytearray], Optional[Failure]]
+_Reader = Callable[[memoryview, int], Tuple[Any, int]]
+
+_ENCODERS = LRU[_Writer](maxsize=1024)
+_DECODERS = LRU[_Reader](maxsize=1024)
+
+_ADDRS = {IPv4Address: 4, IPv6Address: 16}
+_NETS = {
+    IPv4Network: 4,
+    IPv6Network: 16,
+    IPv4Interface: 4,
+    IPv6Interface: 16,
+}
+
+
+def _put_uvarint(n: int, buf: bytearray) -> None:
+    while n > 0x7F:
+        buf.append((n & 0x7F) | 0x80)
+        n >>= 7
+    buf.append(n)
+
+
+def _get_uvarint(mv: memoryview, pos: int) -> Tuple[int, int]:
+    shift = n = 0
+    while True:
+        b = mv[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+def _put_varint(n: int, buf: bytearray) -> None:
+    _put_uvarint(n << 1 if n >= 0 else ((-n) << 1) - 1, buf=buf)
+
+
+def _get_varint(mv: memoryview, pos: int) -> Tuple[int, int]:
+    z, pos = _get_uvarint(mv, pos=pos)
+    return (-((z + 1) >> 1) if z & 1 else z >> 1), pos
+
+
+def _get_raw(mv: memoryview, pos: int, size: int) -> Tuple[memoryview, int]:
+    end = pos + size
+    if end > len(mv):
+        raise IndexError(end)
+    else:
+        return mv[pos:end], end
+
+
+def _get_sized(mv: memoryview, pos: int) -> Tuple[memoryview, int]:
+    size, pos = _get_uvarint(mv, pos=pos)
+    return _get_raw(mv, pos=pos, size=size)
+
+
+def _get_size(mv: memoryview, pos: int, path: Sequence[Any]) -> Tuple[int, int]:
+    # bounds the item loop, even for items that take up no bytes
+    size, pos = _get_uvarint(mv, pos=pos)
+    if size > len(mv) - pos:
+        raise DecodeError(path=path, actual=size)
+    else:
+        return size, pos
+
+
+def _new_plan(tp: Any) -> Plan:
+    return new_plan(tp, path=(), custom=lambda tp, path: None)
+
+
+def _encoder(plan: Plan, memo: Optional[MutableMapping[int, Any]] = None) -> _Writer:
+    memo = {} if memo is None else memo
+    return tie(memo, plan=plan, build=lambda: _new_encoder(plan, memo=memo))
+
+
+def _rooted_encoder(w: _Writer, at: Sequence[Any]) -> _Writer:
+    def v(x: Any, buf: bytearray) -> Optional[Failure]:
+        err = w(x, buf)
+        return err and rebase(at, err)
+
+    return v
+
+
+def _new_encoder(plan: Plan, memo: MutableMapping[int, Any]) -> _Writer:
+    tp, path = plan.tp, plan.path
+
+    def sub(plan: Plan, at: Sequence[Any] = path[:-1], unwind: bool = True) -> _Writer:
+        w = _encoder(plan, memo=memo)
+        if isinstance(plan, DataclassPlan) and at and unwind:
+            return _rooted_encoder(w, at=at)
+        else:
+            return w
+
+    if isinstance(plan, NonePlan) or tp is _NoneType:
+        return lambda x, buf: None if x is None else Failure(path=path, actual=x)
+
+    elif isinstance(plan, LiteralPlan):
+        ordinals = {(type(v), v): idx for idx, v in enumerate(get_args(tp))}
+
+        def w(x: Any, buf: bytearray) -> Optional[Failure]:
+            if (idx := ordinals.get((type(x), x))) is None:
+                return Failure(path=path, actual=x)
+            else:
+                _put_uvarint(idx, buf=buf)
+                return None
+
+        return w
+
+    elif isinstance(plan, UnionPlan):
+        # failed branches are discarded, no need to unwind them
+        ws = tuple(sub(b, unwind=False) for b in plan.branches)
+
+        def w(x: Any, buf: bytearray) -> Optional[Failure]:
+            n = len(buf)
+            for idx, bw in enumerate(ws):
+                _put_uvarint(idx, buf=buf)
+                if bw(x, buf):
+                    del buf[n:]
+                else:
+                    return None
+            else:
+                return Failure(path=path, actual=x)
+
+        return w
+
+    elif isinstance(plan, MapPlan):
+        lw, rw = sub(plan.key), sub(plan.val)
+
+        def w(x: Any, buf: bytearray) -> Optional[Failure]:
+            if not isinstance(x, Mapping):
+                return Failure(path=path, actual=x)
+            else:
+                _put_uvarint(len(x), buf=buf)
+                for k, v in x.items():
+                    if err := lw(k, buf) or rw(v, buf):
+                        return err
+                else:
+                    return None
+
+        return w
+
+    elif isinstance(plan, (SetPlan, SeqPlan)):
+        iw = sub(plan.item)
+
+        def w(x: Any, buf: bytearray) -> Optional[Failure]:
+            if not is_iterable_not_str(x):
+                return Failure(path=path, actual=x)
+            else:
+                xs = x if isinstance(x, Sequence) else tuple(x)
+                _put_uvarint(len(xs), buf=buf)
+                for i in xs:
+                    if err := iw(i, buf):
+                        return err
+                else:
+                    return None
+
+        return w
+
+    elif isinstance(plan, TuplePlan):
+        ws = tuple(map(sub, plan.items))
+
+        def w(x: Any, buf: bytearray) -> Optional[Failure]:
+            if not is_iterable_not_str(x) or len(xs := tuple(x)) != len(ws):
+                return Failure(path=path, actual=x)
+            else:
+                for iw, i in zip(ws, xs):
+                    if err := iw(i, buf):
+                        return err
+                else:
+                    return None
+
+        return w
+
+    elif isinstance(plan, EnumPlan):
+        members = {m: idx for idx, m in enumerate(tp)}
+
+        def w(x: Any, buf: bytearray) -> Optional[Failure]:
+            if (idx := members.get(x)) is None or not isinstance(x, tp):
+                return Failure(path=path, actual=x)
+            else:
+                _put_uvarint(idx, buf=buf)
+                return None
+
+        return w
+
+    elif isinstance(plan, DataclassPlan):
+        cls_fields = tuple(
+            (f.name, sub(f.plan, at=(*path, f.field))) for f in plan.fields
+        )
+
+        def w(x: Any, buf: bytearray) -> Optional[Failure]:
+            if not is_dataclass(x):
+                return Failure(path=path, actual=x)
+            else:
+                for k, fw in cls_fields:
+                    if not hasattr(x, k):
+                        return Failure(path=path, actual=x, missing_keys={k})
+                    elif err := fw(getattr(x, k), buf):
+                        return err
+                else:
+                    return None
+
+        return w
+
+    elif isinstance(plan, FloatPlan):
+
+        def w(x: Any, buf: bytearray) -> Optional[Failure]:
+            if isinstance(x, SupportsFloat):
+                buf += _F64.pack(float(x))
+                return None
+            else:
+                return Failure(path=path, actual=x)
+
+        return w
+
+    elif isinstance(plan, InstancePlan) and issubclass(tp, bool):
+
+        def w(x: Any, buf: bytearray) -> Optional[Failure]:
+            if isinstance(x, bool):
+                buf.append(x)
+                return None
+            else:
+                return Failure(path=path, actual=x)
+
+        return w
+
+    elif isinstance(plan, InstancePlan) and issubclass(tp, int):
+
+        def w(x: Any, buf: bytearray) -> Optional[Failure]:
+            if isinstance(x, int):
+                _put_varint(x, buf=buf)
+                return None
+            else:
+                return Failure(path=path, actual=x)
+
+        return w
+
+    elif isinstance(plan, InstancePlan) and issubclass(tp, (bytes, bytearray)):
+
+        def w(x: Any, buf: bytearray) -> Optional[Failure]:
+            if isinstance(x, (bytes, bytearray)):
+                _put_uvarint(len(x), buf=buf)
+                buf += x
+                return None
+            else:
+                return Failure(path=path, actual=x)
+
+        return w
+
+    elif isinstance(plan, InstancePlan) and issubclass(tp, (str, PurePath)):
+
+        def w(x: Any, buf: bytearray) -> Optional[Failure]:
+            if isinstance(x, tp):
+                b = str(x).encode("utf-8")
+                _put_uvarint(len(b), buf=buf)
+                buf += b
+                return None
+            else:
+                return Failure(path=path, actual=x)
+
+        return w
+
+    elif isinstance(plan, InstancePlan) and issubclass(tp, UUID):
+
+        def w(x: Any, buf: bytearray) -> Optional[Failure]:
+            if isinstance(x, UUID):
+                buf += x.bytes
+                return None
+            else:
+                return Failure(path=path, actual=x)
+
+        return w
+
+    elif isinstance(plan, InstancePlan) and tp in _ADDRS:
+
+        def w(x: Any, buf: bytearray) -> Optional[Failure]:
+            if isinstance(x, tp):
+                buf += x.packed
+                return None
+            else:
+                return Failure(path=path, actual=x)
+
+        return w
+
+    elif isinstance(plan, InstancePlan) and tp in _NETS:
+        is_net = issubclass(tp, (IPv4Network, IPv6Network))
+
+        def w(x: Any, buf: bytearray) -> Optional[Failure]:
+            if isinstance(x, tp):
+                addr, net = (x.network_address, x) if is_net else (x.ip, x.network)
+                buf += addr.packed
+                buf.append(net.prefixlen)
+                return None
+            else:
+                return Failure(path=path, actual=x)
+
+        return w
+
+    elif isinstance(plan, (AnyPlan, CustomPlan, InstancePlan)):
+        raise ValueError(f"Unexpected type -- {tp}")
+
+    else:
+        raise ValueError(f"Unexpected plan -- {plan}")
+
+
+def _decoder(plan: Plan, memo: Optional[MutableMapping[int, Any]] = None) -> _Reader:
+    memo = {} if memo is None else memo
+    return tie(memo, plan=plan, build=lambda: _new_decoder(plan, memo=memo))
+
+
+def _rooted_decoder(r: _Reader, at: Sequence[Any]) -> _Reader:
+    def q(mv: memoryview, pos: int) -> Tuple[Any, int]:
+        try:
+            return r(mv, pos)
+        except DecodeError as e:
+            raise rebase(at, e)
+
+    return q
+
+
+def _new_decoder(plan: Plan, memo: MutableMapping[int, Any]) -> _Reader:
+    tp, path = plan.tp, plan.path
+
+    def sub(plan: Plan, at: Sequence[Any] = path[:-1]) -> _Reader:
+        r = _decoder(plan, memo=memo)
+        return (
+            _rooted_decoder(r, at=at) if isinstance(plan, DataclassPlan) and at else r
+        )
+
+    if isinstance(plan, NonePlan) or tp is _NoneType:
+        return lambda mv, pos: (None, pos)
+
+    elif isinstance(plan, (LiteralPlan, EnumPlan)):
+        values = get_args(tp) if isinstance(plan, LiteralPlan) else tuple(tp)
+
+        def r(mv: memoryview, pos: int) -> Tuple[Any, int]:
+            idx, pos = _get_uvarint(mv, pos=pos)
+            if idx < len(values):
+                return values[idx], pos
+            else:
+                raise DecodeError(path=path, actual=idx)
+
+        return r
+
+    elif isinstance(plan, UnionPlan):
+        rs = tuple(map(sub, plan.branches))
+
+        def r(mv: memoryview, pos: int) -> Tuple[Any, int]:
+            idx, pos = _get_uvarint(mv, pos=pos)
+            if idx < len(rs):
+                return rs[idx](mv, pos)
+            else:
+                raise DecodeError(path=path, actual=idx)
+
+        return r
+
+    elif isinstance(plan, MapPlan):
+        lr, rr = sub(plan.key), sub(plan.val)
+
+        def r(mv: memoryview, pos: int) -> Tuple[Any, int]:
+            size, pos = _get_size(mv, pos=pos, path=path)
+            acc = {}
+            for _ in range(size):
+                k, pos = lr(mv, pos)
+                v, pos = rr(mv, pos)
+                acc[k] = v
+            return acc, pos
+
+        return r
+
+    elif isinstance(plan, (SetPlan, SeqPlan)):
+        ir = sub(plan.item)
+        new = (
+            set
+            if isinstance(plan, SetPlan)
+            else tuple
+            if get_origin(tp) is tuple
+            else list
+        )
+
+        def r(mv: memoryview, pos: int) -> Tuple[Any, int]:
+            size, pos = _get_size(mv, pos=pos, path=path)
+            acc = []
+            for _ in range(size):
+                i, pos = ir(mv, pos)
+                acc.append(i)
+            return new(acc), pos
+
+        return r
+
+    elif isinstance(plan, TuplePlan):
+        rs = tuple(map(sub, plan.items))
+
+        def r(mv: memoryview, pos: int) -> Tuple[Any, int]:
+            acc = []
+            for ir in rs:
+                i, pos = ir(mv, pos)
+                acc.append(i)
+            return tuple(acc), pos
+
+        return r
+
+    elif isinstance(plan, DataclassPlan):
+        cls_fields = tuple(
+            (f.name, sub(f.plan, at=(*path, f.field))) for f in plan.fields
+        )
+
+        def r(mv: memoryview, pos: int) -> Tuple[Any, int]:
+            kwargs = {}
+            for k, fr in cls_fields:
+                kwargs[k], pos = fr(mv, pos)
+            try:
+                return tp(**kwargs), pos
+            except (TypeError, ValueError) as e:
+                raise DecodeError(e, path=path, actual=kwargs)
+
+        return r
+
+    elif isinstance(plan, FloatPlan):
+        return lambda mv, pos: (_F64.unpack_from(mv, pos)[0], pos + _F64.size)
+
+    elif isinstance(plan, InstancePlan) and issubclass(tp, bool):
+
+        def r(mv: memoryview, pos: int) -> Tuple[Any, int]:
+            if (b := mv[pos]) > 1:
+                raise DecodeError(path=path, actual=b)
+            else:
+                return b == 1, pos + 1
+
+        return r
+
+    elif isinstance(plan, InstancePlan) and issubclass(tp, int):
+        return _get_varint
+
+    elif isinstance(plan, InstancePlan) and issubclass(tp, (bytes, bytearray)):
+
+        def r(mv: memoryview, pos: int) -> Tuple[Any, int]:
+            b, pos = _get_sized(mv, pos=pos)
+            return tp(b), pos
+
+        return r
+
+    elif isinstance(plan, InstancePlan) and issubclass(tp, (str, PurePath)):
+        is_str = issubclass(tp, str)
+
+        def r(mv: memoryview, pos: int) -> Tuple[Any, int]:
+            b, pos = _get_sized(mv, pos=pos)
+            s = str(b, "utf-8")
+            return (s if is_str else tp(s)), pos
+
+        return r
+
+    elif isinstance(plan, InstancePlan) and issubclass(tp, UUID):
+
+        def r(mv: memoryview, pos: int) -> Tuple[Any, int]:
+            b, pos = _get_raw(mv, pos=pos, size=16)
+            return UUID(bytes=bytes(b)), pos
+
+        return r
+
+    elif isinstance(plan, InstancePlan) and tp in _ADDRS:
+        size = _ADDRS[tp]
+
+        def r(mv: memoryview, pos: int) -> Tuple[Any, int]:
+            b, pos = _get_raw(mv, pos=pos, size=size)
+            return tp(bytes(b)), pos
+
+        return r
+
+    elif isinstance(plan, InstancePlan) and tp in _NETS:
+        size = _NETS[tp]
+
+        def r(mv: memoryview, pos: int) -> Tuple[Any, int]:
+            b, pos = _get_raw(mv, pos=pos, size=size + 1)
+            try:
+                return tp((bytes(b[:size]), b[size])), pos
+            except ValueError as e:
+                raise DecodeError(e, path=path, actual=bytes(b))
+
+        return r
+
+    elif isinstance(plan, (AnyPlan, CustomPlan, InstancePlan)):
+        raise ValueError(f"Unexpected type -- {tp}")
+
+    else:
+        raise ValueError(f"Unexpected plan -- {plan}")
+
+
+class new_binary_encoder(Generic[_T]):
+    def __init__(self, tp: Any) -> None:
+        self._w = _ENCODERS.get(type_key(tp), build=lambda: _encoder(_new_plan(tp)))
+
+    def __call__(self, x: _T) -> bytes:
+        buf = bytearray()
+        if err := self._w(x, buf):
+            raise to_error(EncodeError, err)
+        else:
+            return bytes(buf)
+
+
+class new_binary_decoder(Generic[_T]):
+    def __init__(self, tp: Any) -> None:
+        self._tp = tp
+        self._r = _DECODERS.get(type_key(tp), build=lambda: _decoder(_new_plan(tp)))
+
+    def __call__(self, data: Union[bytes, bytearray, memoryview]) -> _T:
+        mv = memoryview(data)
+        try:
+            thing, pos = self._r(mv, 0)
+        except (
+            IndexError,
+            StructError,
+            UnicodeDecodeError,
+            TypeError,
+            ValueError,
+        ) as e:
+            raise DecodeError(e, path=(self._tp,), actual=bytes(mv[:64]))
+        else:
+            if pos != len(mv):
+                raise DecodeError(path=(self._tp,), actual=bytes(mv[pos : pos + 64]))
+            else:
+                return cast(_T, thing)
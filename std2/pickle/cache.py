@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from inspect import isclass
+from threading import Lock
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    NamedTuple,
+    TypeVar,
+    cast,
+    get_args,
+    get_origin,
+)
+
+_V = TypeVar("_V")
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+def type_key(tp: Any) -> Hashable:
+    """
+    `typing` deems `Union[a, b] == Union[b, a]`, but branch order is significant
+
+    Literal values are tagged with their type, as `Literal[1] == Literal[True]`
+    """
+
+    if args := get_args(tp):
+        return (get_origin(tp), tuple(map(type_key, args)))
+    elif isclass(tp) or get_origin(tp):
+        return cast(Hashable, tp)
+    else:
+        return (type(tp), tp)
+
+
+class LRU(Generic[_V]):
+    def __init__(self, maxsize: int) -> None:
+        self._lock = Lock()
+        self._cache: OrderedDict[Hashable, _V] = OrderedDict()
+        self._maxsize, self._hits, self._misses = maxsize, 0, 0
+
+    def get(self, key: Hashable, build: Callable[[], _V]) -> _V:
+        try:
+            hash(key)
+        except TypeError:
+            return build()
+
+        with self._lock:
+            if key in self._cache:
+                self._hits += 1
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            else:
+                self._misses += 1
+
+        val = build()
+        with self._lock:
+            self._cache[key] = val
+            self._evict()
+        return val
+
+    def _evict(self) -> None:
+        while len(self._cache) > self._maxsize:
+            self._cache.popitem(last=False)
+
+    def resize(self, maxsize: int) -> None:
+        with self._lock:
+            self._maxsize = maxsize
+            self._evict()
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                hits=self._hits,
+                misses=self._misses,
+                maxsize=self._maxsize,
+                currsize=len(self._cache),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._hits = self._misses = 0
+
+
+class Interner:
+    def __init__(self, maxsize: int = 2**16) -> None:
+        self._table: Dict[str, str] = {}
+        self._maxsize, self._hits, self._misses = maxsize, 0, 0
+
+    def __call__(self, s: str) -> str:
+        if (t := self._table.get(s)) is not None:
+            self._hits += 1
+            return t
+        else:
+            self._misses += 1
+            if len(self._table) < self._maxsize:
+                self._table[s] = s
+            return s
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(
+            hits=self._hits,
+            misses=self._misses,
+            maxsize=self._maxsize,
+            currsize=len(self._table),
+        )
+
+    def clear(self) -> None:
+        self._table.clear()
+        self._hits = self._misses = 0
@@ -0,0 +1,499 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from enum import Enum
+from itertools import chain, count
+from linecache import cache
+from typing import (
+    AbstractSet,
+    Any,
+    Callable,
+    Dict,
+    MutableMapping,
+    MutableSequence,
+    Optional,
+    Sequence,
+    SupportsFloat,
+    cast,
+)
+from weakref import finalize
+
+from ..types import is_iterable_not_str
+from .construct import new_builder, new_partial_builder
+from .dispatch import new_dispatch
+from .plan import (
+    AnyPlan,
+    CustomPlan,
+    DataclassPlan,
+    EnumPlan,
+    FloatPlan,
+    InstancePlan,
+    LiteralPlan,
+    MapPlan,
+    NonePlan,
+    Plan,
+    SeqPlan,
+    SetPlan,
+    TuplePlan,
+    UnionPlan,
+    new_check,
+)
+from .types import PRIMITIVES, DParser, EParser, Failure, rebase
+
+_LF = "\n"
+_INDENT = " " * 4
+_FILES = count()
+
+
+class _Module:
+    def __init__(
+        self,
+        decode: bool,
+        strict: bool,
+        fallback: Optional[Callable[[Plan], Callable[[Any], Any]]] = None,
+        fast_init: bool = False,
+        validate: bool = False,
+    ) -> None:
+        self.decode, self.strict, self.fallback = decode, strict, fallback
+        self.fast_init, self.validate = fast_init, validate
+        self.defs: MutableSequence[str] = []
+        self.tail: MutableSequence[str] = []
+        self.ns: Dict[str, Any] = {
+            "_Mapping": Mapping,
+            "_SupportsFloat": SupportsFloat,
+            "_PRIMITIVES": frozenset(PRIMITIVES),
+            "_FLOATS": frozenset((float, int, bool)),
+            "_ITERABLES": frozenset((list, tuple, set, frozenset)),
+            "_SEQUENCES": frozenset((list, tuple)),
+            "_is_iterable_not_str": is_iterable_not_str,
+            "_Enum": Enum,
+            "_Failure": Failure,
+            "_rebase": rebase,
+        }
+        self.shared: AbstractSet[int] = frozenset()
+        # inlined dataclass nodes are rooted at `base`, their use site is `at`
+        self.base: Sequence[Any] = ()
+        self.at: Sequence[Any] = ()
+        self._uids = count()
+        self._fns: MutableMapping[int, str] = {}
+
+    def uid(self, prefix: str) -> str:
+        return f"{prefix}{next(self._uids)}"
+
+    def const(self, val: Any) -> str:
+        name = self.uid("_c")
+        self.ns[name] = val
+        return name
+
+    def fn(self, plan: Plan) -> str:
+        if isinstance(plan, CustomPlan):
+            return self.const(plan.parser)
+        elif name := self._fns.get(id(plan)):
+            return name
+        else:
+            name = self._fns[id(plan)] = self.uid("_f")
+            lines: MutableSequence[str] = []
+            x = self.uid("x")
+            base, at = self.base, self.at
+            if isinstance(plan, DataclassPlan):
+                self.base = self.at = ()
+            y = _gen(self, plan=plan, x=x, lines=lines, ind=1, inline=True)
+            self.base, self.at = base, at
+            body = _LF.join(lines)
+            self.defs.append(
+                f"def {name}({x}):{_LF}{body}{_LF}{_INDENT}return True, {y}"
+            )
+            return name
+
+
+def _shared(plan: Plan) -> AbstractSet[int]:
+    """
+    Dataclass nodes referenced more than once get their own function
+
+    This covers both repeated and recursive types
+    """
+
+    seen: MutableMapping[int, int] = {}
+
+    def cont(plan: Plan) -> None:
+        if isinstance(plan, DataclassPlan):
+            seen[id(plan)] = seen.get(id(plan), 0) + 1
+            if seen[id(plan)] == 1:
+                for f in plan.fields:
+                    cont(f.plan)
+        elif isinstance(plan, UnionPlan):
+            for b in plan.branches:
+                cont(b)
+        elif isinstance(plan, MapPlan):
+            cont(plan.key)
+            cont(plan.val)
+        elif isinstance(plan, (SetPlan, SeqPlan)):
+            cont(plan.item)
+        elif isinstance(plan, TuplePlan):
+            for i in plan.items:
+                cont(i)
+
+    cont(plan)
+    return {k for k, v in seen.items() if v > 1}
+
+
+def _emit(lines: MutableSequence[str], ind: int, line: str) -> None:
+    lines.append(_INDENT * ind + line)
+
+
+def _fail(m: _Module, plan: Plan, x: str, **kwargs: str) -> str:
+    extra = "".join(f", {k}={v}" for k, v in kwargs.items())
+    path = m.const((*m.base, *plan.path))
+    return f"return False, _Failure(path={path}, actual={x}{extra})"
+
+
+def _unwind(m: _Module, y: str, prefix: Sequence[Any]) -> str:
+    return (
+        f"return False, _rebase({m.const(prefix)}, {y})"
+        if prefix
+        else f"return False, {y}"
+    )
+
+
+def _is_mapping(x: str) -> str:
+    return f"(type({x}) is dict or isinstance({x}, _Mapping))"
+
+
+def _is_iterable(x: str) -> str:
+    return f"(type({x}) in _ITERABLES or _is_iterable_not_str({x}))"
+
+
+def _cond(m: _Module, plan: Plan, x: str) -> Optional[str]:
+    if isinstance(plan, AnyPlan):
+        return "True"
+    elif isinstance(plan, NonePlan):
+        return f"{x} is None"
+    elif isinstance(plan, LiteralPlan):
+        return f"(type({x}) in _PRIMITIVES and {x} in {m.const(plan.values)})"
+    elif isinstance(plan, FloatPlan):
+        return f"(type({x}) in _FLOATS or isinstance({x}, _SupportsFloat))"
+    elif isinstance(plan, InstancePlan):
+        return f"isinstance({x}, {m.const(plan.tp)})"
+    else:
+        return None
+
+
+def _union(
+    m: _Module, plan: UnionPlan, x: str, lines: MutableSequence[str], ind: int
+) -> str:
+    y = m.uid("y")
+
+    if m.decode and (dispatch := new_dispatch(plan)):
+        s, n, bs = m.uid("s"), m.uid("n"), m.uid("_b")
+        fns = "".join(f"{m.fn(b)}, " for b in plan.branches)
+        m.tail.append(f"{bs} = ({fns})")
+        _emit(lines, ind, f"for {n} in {m.const(dispatch)}({x}):")
+        _emit(lines, ind + 1, f"{s}, {y} = {bs}[{n}]({x})")
+        _emit(lines, ind + 1, f"if {s}:")
+        _emit(lines, ind + 2, "break")
+        _emit(lines, ind, "else:")
+        _emit(lines, ind + 1, _fail(m, plan=plan, x=x))
+        return y
+
+    def cont(branches: Any, ind: int) -> None:
+        if not branches:
+            _emit(lines, ind, _fail(m, plan=plan, x=x))
+        else:
+            b, *rest = branches
+            if (cond := _cond(m, plan=b, x=x)) == "True":
+                _emit(lines, ind, f"{y} = {x}")
+            elif cond:
+                _emit(lines, ind, f"if {cond}:")
+                _emit(lines, ind + 1, f"{y} = {x}")
+                _emit(lines, ind, "else:")
+                cont(rest, ind=ind + 1)
+            else:
+                s = m.uid("s")
+                _emit(lines, ind, f"{s}, {y} = {m.fn(b)}({x})")
+                _emit(lines, ind, f"if not {s}:")
+                cont(rest, ind=ind + 1)
+
+    if not m.decode and (
+        dcs := tuple(b for b in plan.branches if isinstance(b, DataclassPlan))
+    ):
+        s, f, tbl = m.uid("s"), m.uid("f"), m.uid("_t")
+        fns = "".join(f"{m.const(b.tp)}: {m.fn(b)}, " for b in dcs)
+        m.tail.append(f"{tbl} = {{{fns}}}")
+        _emit(lines, ind, f"{f} = {tbl}.get(type({x}))")
+        _emit(lines, ind, f"if {f} is not None:")
+        _emit(lines, ind + 1, f"{s}, {y} = {f}({x})")
+        _emit(lines, ind, f"if {f} is None or not {s}:")
+        cont(plan.branches, ind=ind + 1)
+    else:
+        cont(plan.branches, ind=ind)
+    return y
+
+
+def _dataclass_dec(
+    m: _Module, plan: DataclassPlan, x: str, lines: MutableSequence[str], ind: int
+) -> str:
+    y, kw, miss = m.uid("y"), m.uid("kw"), m.uid("miss")
+    rq = frozenset(f.name for f in plan.fields if f.required)
+    _emit(lines, ind, f"if not {_is_mapping(x)}:")
+    _emit(lines, ind + 1, _fail(m, plan=plan, x=x))
+    _emit(lines, ind, f"{kw} = {{}}")
+    if rq:
+        _emit(lines, ind, f"{miss} = False")
+    for field in plan.fields:
+        key, v = repr(field.name), m.uid("v")
+        _emit(lines, ind, f"if {key} in {x}:")
+        _emit(lines, ind + 1, f"{v} = {x}[{key}]")
+        m.at = (*plan.path, field.field)
+        r = _gen(m, plan=field.plan, x=v, lines=lines, ind=ind + 1)
+        _emit(lines, ind + 1, f"{kw}[{key}] = {r}")
+        if field.required:
+            _emit(lines, ind, "else:")
+            _emit(lines, ind + 1, f"{miss} = True")
+
+    if rq:
+        mk = f"{m.const(rq)} - {kw}.keys()"
+        _emit(lines, ind, f"if {miss}:")
+        _emit(lines, ind + 1, _fail(m, plan=plan, x=x, missing_keys=mk))
+    if m.strict:
+        ek = f"{x}.keys() - {kw}.keys()"
+        _emit(lines, ind, f"if len({x}) != len({kw}):")
+        _emit(lines, ind + 1, _fail(m, plan=plan, x=x, extra_keys=ek))
+
+    if plan.partial:
+        _emit(lines, ind, f"{y} = {m.const(new_partial_builder(plan.tp))}({kw})")
+    elif m.fast_init and (build := new_builder(plan.tp)):
+        _emit(lines, ind, f"{y} = {m.const(build)}({kw})")
+    else:
+        _emit(lines, ind, f"{y} = {m.const(plan.tp)}(**{kw})")
+    return y
+
+
+def _dataclass_val(
+    m: _Module, plan: DataclassPlan, x: str, lines: MutableSequence[str], ind: int
+) -> str:
+    n, nr = m.uid("n"), m.uid("nr")
+    rq = frozenset(f.name for f in plan.fields if f.required)
+    _emit(lines, ind, f"if not {_is_mapping(x)}:")
+    _emit(lines, ind + 1, _fail(m, plan=plan, x=x))
+    _emit(lines, ind, f"{n} = {nr} = 0")
+    for field in plan.fields:
+        key, v = repr(field.name), m.uid("v")
+        _emit(lines, ind, f"if {key} in {x}:")
+        _emit(lines, ind + 1, f"{v} = {x}[{key}]")
+        m.at = (*plan.path, field.field)
+        _gen(m, plan=field.plan, x=v, lines=lines, ind=ind + 1)
+        _emit(lines, ind + 1, f"{n} += 1")
+        if field.required:
+            _emit(lines, ind + 1, f"{nr} += 1")
+
+    if rq:
+        mk = f"{m.const(rq)} - {x}.keys()"
+        _emit(lines, ind, f"if {nr} != {len(rq)}:")
+        _emit(lines, ind + 1, _fail(m, plan=plan, x=x, missing_keys=mk))
+    if m.strict:
+        names = frozenset(f.name for f in plan.fields)
+        ek = f"{x}.keys() - {m.const(names)}"
+        _emit(lines, ind, f"if len({x}) != {n}:")
+        _emit(lines, ind + 1, _fail(m, plan=plan, x=x, extra_keys=ek))
+    return x
+
+
+def _dataclass_enc(
+    m: _Module, plan: DataclassPlan, x: str, lines: MutableSequence[str], ind: int
+) -> str:
+    assert m.fallback
+    y, tp = m.uid("y"), m.const(plan.tp)
+    attrs = tuple(m.uid("a") for _ in plan.fields)
+    s, fallback = m.uid("s"), m.const(m.fallback(plan))
+    _emit(lines, ind, f"{s} = isinstance({x}, {tp})")
+    if attrs:
+        _emit(lines, ind, f"if {s}:")
+        _emit(lines, ind + 1, "try:")
+        for a, field in zip(attrs, plan.fields):
+            _emit(lines, ind + 2, f"{a} = {x}.{field.name}")
+        _emit(lines, ind + 1, "except AttributeError:")
+        _emit(lines, ind + 2, f"{s} = False")
+
+    # anything but an instance with every field set is left to the interpreter
+    _emit(lines, ind, f"if not {s}:")
+    _emit(lines, ind + 1, f"{s}, {y} = {fallback}({x})")
+    _emit(lines, ind + 1, f"if not {s}:")
+    _emit(lines, ind + 2, _unwind(m, y=y, prefix=m.base))
+    _emit(lines, ind, "else:")
+    rs: MutableSequence[str] = []
+    for a, field in zip(attrs, plan.fields):
+        m.at = (*plan.path, field.field)
+        rs.append(_gen(m, plan=field.plan, x=a, lines=lines, ind=ind + 1))
+    items = ", ".join(f"{f.name!r}: {r}" for f, r in zip(plan.fields, rs))
+    _emit(lines, ind + 1, f"{y} = {{{items}}}")
+    return y
+
+
+def _gen(
+    m: _Module,
+    plan: Plan,
+    x: str,
+    lines: MutableSequence[str],
+    ind: int,
+    inline: bool = False,
+) -> str:
+    if isinstance(plan, CustomPlan):
+        s, y = m.uid("s"), m.uid("y")
+        _emit(lines, ind, f"{s}, {y} = {m.const(plan.parser)}({x})")
+        _emit(lines, ind, f"if not {s}:")
+        _emit(lines, ind + 1, _unwind(m, y=y, prefix=m.base))
+        return y
+
+    elif cond := _cond(m, plan=plan, x=x):
+        if cond != "True":
+            _emit(lines, ind, f"if not {cond}:")
+            _emit(lines, ind + 1, _fail(m, plan=plan, x=x))
+        return x
+
+    elif isinstance(plan, UnionPlan):
+        return _union(m, plan=plan, x=x, lines=lines, ind=ind)
+
+    elif isinstance(plan, MapPlan):
+        acc, k, v = m.uid("acc"), m.uid("k"), m.uid("v")
+        _emit(lines, ind, f"if not {_is_mapping(x)}:")
+        _emit(lines, ind + 1, _fail(m, plan=plan, x=x))
+        if (lc := new_check(plan.key)) and (rc := new_check(plan.val)):
+            checks = " and ".join(
+                f"{m.const(c)}({x}.{attr}())"
+                for c, p, attr in ((lc, plan.key, "keys"), (rc, plan.val, "values"))
+                if not isinstance(p, AnyPlan)
+            )
+            if checks:
+                _emit(lines, ind, f"if not ({checks}):")
+                _emit(lines, ind + 1, f"for {k}, {v} in {x}.items():")
+                _gen(m, plan=plan.key, x=k, lines=lines, ind=ind + 2)
+                _gen(m, plan=plan.val, x=v, lines=lines, ind=ind + 2)
+            if m.validate:
+                return x
+            else:
+                _emit(lines, ind, f"{acc} = dict({x})")
+                return acc
+        elif m.validate:
+            _emit(lines, ind, f"for {k}, {v} in {x}.items():")
+            _gen(m, plan=plan.key, x=k, lines=lines, ind=ind + 1)
+            _gen(m, plan=plan.val, x=v, lines=lines, ind=ind + 1)
+            return x
+        _emit(lines, ind, f"{acc} = {{}}")
+        _emit(lines, ind, f"for {k}, {v} in {x}.items():")
+        l = _gen(m, plan=plan.key, x=k, lines=lines, ind=ind + 1)
+        r = _gen(m, plan=plan.val, x=v, lines=lines, ind=ind + 1)
+        _emit(lines, ind + 1, f"{acc}[{l}] = {r}")
+        return acc
+
+    elif isinstance(plan, (SetPlan, SeqPlan)):
+        acc, i = m.uid("acc"), m.uid("i")
+        init, add = (
+            ("[]", "{acc}.append({y})")
+            if isinstance(plan, SeqPlan)
+            else ("set()", "{acc}.add({y})")
+            if m.decode
+            else ("{}", "{acc}[{y}] = True")
+        )
+        _emit(lines, ind, f"if not {_is_iterable(x)}:")
+        _emit(lines, ind + 1, _fail(m, plan=plan, x=x))
+        if m.validate:
+            if check := new_check(plan.item):
+                if not isinstance(plan.item, AnyPlan):
+                    cond = f"type({x}) not in _SEQUENCES or not {m.const(check)}({x})"
+                    _emit(lines, ind, f"if {cond}:")
+                    _emit(lines, ind + 1, f"for {i} in {x}:")
+                    _gen(m, plan=plan.item, x=i, lines=lines, ind=ind + 2)
+            else:
+                _emit(lines, ind, f"for {i} in {x}:")
+                _gen(m, plan=plan.item, x=i, lines=lines, ind=ind + 1)
+            return x
+        elif isinstance(plan, SeqPlan) and (check := new_check(plan.item)):
+            _emit(lines, ind, f"{acc} = list({x})")
+            if not isinstance(plan.item, AnyPlan):
+                _emit(lines, ind, f"if not {m.const(check)}({acc}):")
+                _emit(lines, ind + 1, f"for {i} in {acc}:")
+                _gen(m, plan=plan.item, x=i, lines=lines, ind=ind + 2)
+            return acc
+        _emit(lines, ind, f"{acc} = {init}")
+        _emit(lines, ind, f"for {i} in {x}:")
+        y = _gen(m, plan=plan.item, x=i, lines=lines, ind=ind + 1)
+        _emit(lines, ind + 1, add.format(acc=acc, y=y))
+        return acc
+
+    elif isinstance(plan, TuplePlan):
+        acc, n, i = m.uid("acc"), m.uid("n"), m.uid("i")
+        _emit(lines, ind, f"if not {_is_iterable(x)}:")
+        _emit(lines, ind + 1, _fail(m, plan=plan, x=x))
+        if not m.validate:
+            _emit(lines, ind, f"{acc} = []")
+        if plan.items:
+            _emit(lines, ind, f"for {n}, {i} in enumerate({x}):")
+            for idx, item in enumerate(plan.items):
+                _emit(lines, ind + 1, f"{'if' if not idx else 'elif'} {n} == {idx}:")
+                y = _gen(m, plan=item, x=i, lines=lines, ind=ind + 2)
+                _emit(lines, ind + 2, "pass" if m.validate else f"{acc}.append({y})")
+            _emit(lines, ind + 1, "else:")
+            _emit(lines, ind + 2, "break")
+        return x if m.validate else acc
+
+    elif isinstance(plan, EnumPlan):
+        y = m.uid("y")
+        if m.decode:
+            _emit(lines, ind, f"{y} = {m.const(plan.tp.__members__)}.get({x})")
+            _emit(lines, ind, f"if not {y}:")
+            _emit(lines, ind + 1, _fail(m, plan=plan, x=x))
+        else:
+            _emit(lines, ind, f"if not isinstance({x}, _Enum):")
+            _emit(lines, ind + 1, _fail(m, plan=plan, x=x))
+            _emit(lines, ind, f"{y} = {x}.name")
+        return y
+
+    elif isinstance(plan, DataclassPlan):
+        base, at = m.base, m.at
+        if not inline and id(plan) in m.shared:
+            s, y = m.uid("s"), m.uid("y")
+            _emit(lines, ind, f"{s}, {y} = {m.fn(plan)}({x})")
+            _emit(lines, ind, f"if not {s}:")
+            _emit(lines, ind + 1, _unwind(m, y=y, prefix=(*base, *at)))
+            return y
+
+        if not inline:
+            m.base = (*base, *at)
+        if m.validate:
+            y = _dataclass_val(m, plan=plan, x=x, lines=lines, ind=ind)
+        elif m.decode:
+            y = _dataclass_dec(m, plan=plan, x=x, lines=lines, ind=ind)
+        else:
+            y = _dataclass_enc(m, plan=plan, x=x, lines=lines, ind=ind)
+        m.base, m.at = base, at
+        return y
+
+    else:
+        raise ValueError(f"Unexpected plan -- {plan}")
+
+
+def _link(m: _Module, plan: Plan) -> Callable[[Any], Any]:
+    m.shared = _shared(plan)
+    name = m.fn(plan)
+    src = (_LF * 2).join(chain(m.defs, m.tail)) + _LF
+    filename = f"<std2.pickle.codegen-{next(_FILES)} {plan.tp}>"
+    cache[filename] = (len(src), None, src.splitlines(keepends=True), filename)
+    exec(compile(src, filename, "exec"), m.ns)
+    fn = cast(Callable[[Any], Any], m.ns[name])
+    # evicted plans take their source with them
+    finalize(fn, cache.pop, filename, None)
+    return fn
+
+
+def compile_decoder(plan: Plan, strict: bool, fast_init: bool = False) -> DParser:
+    m = _Module(decode=True, strict=strict, fast_init=fast_init)
+    return _link(m, plan=plan)
+
+
+def compile_validator(plan: Plan, strict: bool) -> DParser:
+    m = _Module(decode=True, strict=strict, validate=True)
+    return _link(m, plan=plan)
+
+
+def compile_encoder(plan: Plan, fallback: Callable[[Plan], EParser]) -> EParser:
+    return _link(_Module(decode=False, strict=False, fallback=fallback), plan=plan)
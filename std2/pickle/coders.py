@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from email.utils import format_datetime, parsedate_to_datetime
 from ipaddress import (
     IPv4Address,
@@ -11,10 +11,19 @@ from ipaddress import (
     IPv6Network,
 )
 from pathlib import Path, PurePath
-from typing import Any, Optional, Sequence, SupportsFloat, Type
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Optional,
+    Sequence,
+    SupportsFloat,
+    Tuple,
+    Type,
+)
 from uuid import UUID
 
-from .types import DecodeError, Decoder, DParser, DStep, EncodeError, Encoder, EParser
+from .types import Decoder, DParser, DStep, Encoder, EParser, Failure
 
 
 def _base_encoder(t: Type) -> Encoder:
@@ -22,12 +31,13 @@ def _base_encoder(t: Type) -> Encoder:
         tp: Any, path: Sequence[Any], encoders: Sequence[Encoder]
     ) -> Optional[EParser]:
         if issubclass(tp, t):
+            ep = (*path, tp)
 
             def p(x: Any) -> DStep:
                 if isinstance(x, t):
                     return True, str(x)
                 else:
-                    return False, EncodeError(path=(*path, tp), actual=x)
+                    return False, Failure(path=ep, actual=x)
 
             return p
         else:
@@ -51,15 +61,16 @@ def _base_decoder(t: Type) -> Decoder:
         tp: Any, path: Sequence[Any], strict: bool, decoders: Sequence[Decoder]
     ) -> Optional[DParser]:
         if issubclass(tp, t):
+            ep = (*path, tp)
 
             def p(x: Any) -> DStep:
                 if isinstance(x, str):
                     try:
                         return True, t(x)
                     except ValueError as e:
-                        return False, DecodeError(e, path=(*path, tp), actual=x)
+                        return False, Failure(e, path=ep, actual=x)
                 else:
-                    return False, DecodeError(path=(*path, tp), actual=x)
+                    return False, Failure(path=ep, actual=x)
 
             return p
         else:
@@ -81,6 +92,77 @@ DEFAULT_DECODERS = (
 )
 
 
+"""
+Date Parsing
+"""
+
+_DATE_CACHE_SIZE = 1024
+_MONTHS = {
+    m: idx
+    for idx, m in enumerate(
+        ("Jan", "Feb", "Mar", "Apr", "May", "Jun")
+        + ("Jul", "Aug", "Sep", "Oct", "Nov", "Dec"),
+        start=1,
+    )
+}
+
+
+def _cached(parse: Callable[[str], datetime]) -> Callable[[str], datetime]:
+    cache: Dict[str, datetime] = {}
+
+    def cont(x: str) -> datetime:
+        if (d := cache.get(x)) is None:
+            if len(cache) >= _DATE_CACHE_SIZE:
+                cache.clear()
+            d = cache[x] = parse(x)
+        return d
+
+    return cont
+
+
+def _is_digits(s: str) -> bool:
+    return s.isascii() and s.isdigit()
+
+
+def _parse_iso(x: str) -> datetime:
+    # `fromisoformat` is implemented in C, only normalise the UTC designator
+    iso = x[:-1] + "+00:00" if x[-1:] == "Z" else x
+    return datetime.fromisoformat(iso).replace(tzinfo=timezone.utc)
+
+
+def _parse_internet(x: str) -> datetime:
+    # fixed `format_datetime(..., usegmt=True)` layout: Www, DD Mmm YYYY HH:MM:SS GMT
+    if (
+        len(x) == 29
+        and x[3:5] == ", "
+        and x[7] == " "
+        and x[11] == " "
+        and x[16] == " "
+        and x[19] == ":"
+        and x[22] == ":"
+        and x[25:] == " GMT"
+        and (month := _MONTHS.get(x[8:11]))
+        and _is_digits(x[5:7] + x[12:16] + x[17:19] + x[20:22] + x[23:25])
+    ):
+        return datetime(
+            int(x[12:16]),
+            month,
+            int(x[5:7]),
+            int(x[17:19]),
+            int(x[20:22]),
+            int(x[23:25]),
+            tzinfo=timezone.utc,
+        )
+    else:
+        try:
+            parsed = parsedate_to_datetime(x)
+        except TypeError:
+            # <3.10 fails to unpack `None` on unparsable input
+            raise ValueError(f"Unparsable date -- {x!r}")
+        else:
+            return parsed.replace(tzinfo=timezone.utc)
+
+
 """
 UNIX
 """
@@ -90,12 +172,13 @@ def unix_date_encoder(
     tp: Any, path: Sequence[Any], encoders: Sequence[Encoder]
 ) -> Optional[EParser]:
     if issubclass(tp, datetime):
+        ep = (*path, tp)
 
         def p(x: Any) -> DStep:
             if isinstance(x, datetime):
                 return True, x.replace(tzinfo=timezone.utc).timestamp()
             else:
-                return False, EncodeError(path=(*path, tp), actual=x)
+                return False, Failure(path=ep, actual=x)
 
         return p
     else:
@@ -108,15 +191,16 @@ def unix_date_decoder(
     if not issubclass(tp, datetime):
         return None
     else:
+        ep = (*path, tp)
 
         def cont(x: Any) -> DStep:
             if not isinstance(x, SupportsFloat):
-                return False, DecodeError(path=(*path, tp), actual=x)
+                return False, Failure(path=ep, actual=x)
             else:
                 try:
                     return True, datetime.fromtimestamp(float(x), tz=timezone.utc)
                 except ValueError as e:
-                    return False, DecodeError(e, path=(*path, tp), actual=x)
+                    return False, Failure(e, path=ep, actual=x)
 
         return cont
 
@@ -130,12 +214,13 @@ def iso_date_encoder(
     tp: Any, path: Sequence[Any], encoders: Sequence[Encoder]
 ) -> Optional[EParser]:
     if issubclass(tp, datetime):
+        ep = (*path, tp)
 
         def p(x: Any) -> DStep:
             if isinstance(x, datetime):
                 return True, x.replace(tzinfo=timezone.utc).isoformat()
             else:
-                return False, EncodeError(path=(*path, tp), actual=x)
+                return False, Failure(path=ep, actual=x)
 
         return p
     else:
@@ -148,15 +233,18 @@ def iso_date_decoder(
     if not issubclass(tp, datetime):
         return None
     else:
+        ep = (*path, tp)
+
+        parse = _cached(_parse_iso)
 
         def cont(x: Any) -> DStep:
             if not isinstance(x, str):
-                return False, DecodeError(path=(*path, tp), actual=x)
+                return False, Failure(path=ep, actual=x)
             else:
                 try:
-                    return True, datetime.fromisoformat(x).replace(tzinfo=timezone.utc)
+                    return True, parse(x)
                 except ValueError as e:
-                    return False, DecodeError(e, path=(*path, tp), actual=x)
+                    return False, Failure(e, path=ep, actual=x)
 
         return cont
 
@@ -170,6 +258,7 @@ def internet_date_encoder(
     tp: Any, path: Sequence[Any], encoders: Sequence[Encoder]
 ) -> Optional[EParser]:
     if issubclass(tp, datetime):
+        ep = (*path, tp)
 
         def p(x: Any) -> DStep:
             if isinstance(x, datetime):
@@ -177,7 +266,7 @@ def internet_date_encoder(
                     x.replace(tzinfo=timezone.utc), usegmt=True
                 )
             else:
-                return False, EncodeError(path=(*path, tp), actual=x)
+                return False, Failure(path=ep, actual=x)
 
         return p
     else:
@@ -190,14 +279,140 @@ def internet_date_decoder(
     if not issubclass(tp, datetime):
         return None
     else:
+        ep = (*path, tp)
+        parse = _cached(_parse_internet)
 
         def cont(x: Any) -> DStep:
             if not isinstance(x, str):
-                return False, DecodeError(path=(*path, tp), actual=x)
+                return False, Failure(path=ep, actual=x)
             else:
                 try:
-                    return True, parsedate_to_datetime(x).replace(tzinfo=timezone.utc)
+                    return True, parse(x)
                 except ValueError as e:
-                    return False, DecodeError(e, path=(*path, tp), actual=x)
+                    return False, Failure(e, path=ep, actual=x)
 
         return cont
+
+
+"""
+Native
+"""
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NAIVE_EPOCH = _EPOCH.replace(tzinfo=None)
+_BYTES = (bytes, bytearray, memoryview)
+_PACKED = (int, bytes)
+
+
+def _native_encoder(t: Type, to_native: Callable[[Any], Any]) -> Encoder:
+    def e(
+        tp: Any, path: Sequence[Any], encoders: Sequence[Encoder]
+    ) -> Optional[EParser]:
+        if issubclass(tp, t):
+            ep = (*path, tp)
+
+            def p(x: Any) -> DStep:
+                if isinstance(x, t):
+                    return True, to_native(x)
+                else:
+                    return False, Failure(path=ep, actual=x)
+
+            return p
+        else:
+            return None
+
+    return e
+
+
+def _native_decoder(
+    t: Type, accepts: Tuple[Type, ...], from_native: Callable[[Any], Any]
+) -> Decoder:
+    def d(
+        tp: Any, path: Sequence[Any], strict: bool, decoders: Sequence[Decoder]
+    ) -> Optional[DParser]:
+        if issubclass(tp, t):
+            ep = (*path, tp)
+
+            def p(x: Any) -> DStep:
+                if isinstance(x, accepts) and not isinstance(x, bool):
+                    try:
+                        return True, from_native(x)
+                    except (OverflowError, TypeError, ValueError) as e:
+                        return False, Failure(e, path=ep, actual=x)
+                else:
+                    return False, Failure(path=ep, actual=x)
+
+            return p
+        else:
+            return None
+
+    return d
+
+
+def _ns_from_date(x: datetime) -> int:
+    td = x.replace(tzinfo=None) - _NAIVE_EPOCH
+    return (td.days * 86400 + td.seconds) * 1_000_000_000 + td.microseconds * 1000
+
+
+def _date_from_ns(x: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=x // 1000)
+
+
+def _net_from_pair(t: Type) -> Callable[[Any], Any]:
+    def cont(x: Sequence[Any]) -> Any:
+        addr, prefix = x
+        if not isinstance(addr, _PACKED) or type(prefix) is not int:
+            raise TypeError(x)
+        else:
+            return t((addr, prefix))
+
+    return cont
+
+
+native_date_encoder = _native_encoder(datetime, to_native=_ns_from_date)
+native_date_decoder = _native_decoder(
+    datetime, accepts=(int,), from_native=_date_from_ns
+)
+
+
+NATIVE_ENCODERS = (
+    _native_encoder(UUID, to_native=lambda x: x.bytes),
+    _base_encoder(PurePath),
+    _native_encoder(
+        IPv6Network, to_native=lambda x: (int(x.network_address), x.prefixlen)
+    ),
+    _native_encoder(
+        IPv4Network, to_native=lambda x: (int(x.network_address), x.prefixlen)
+    ),
+    _native_encoder(
+        IPv6Interface, to_native=lambda x: (int(x.ip), x.network.prefixlen)
+    ),
+    _native_encoder(
+        IPv4Interface, to_native=lambda x: (int(x.ip), x.network.prefixlen)
+    ),
+    _native_encoder(IPv6Address, to_native=int),
+    _native_encoder(IPv4Address, to_native=int),
+    native_date_encoder,
+)
+
+
+NATIVE_DECODERS = (
+    _native_decoder(UUID, accepts=_BYTES, from_native=lambda x: UUID(bytes=bytes(x))),
+    _base_decoder(Path),
+    _base_decoder(PurePath),
+    _native_decoder(
+        IPv6Network, accepts=(list, tuple), from_native=_net_from_pair(IPv6Network)
+    ),
+    _native_decoder(
+        IPv4Network, accepts=(list, tuple), from_native=_net_from_pair(IPv4Network)
+    ),
+    _native_decoder(
+        IPv6Interface, accepts=(list, tuple), from_native=_net_from_pair(IPv6Interface)
+    ),
+    _native_decoder(
+        IPv4Interface, accepts=(list, tuple), from_native=_net_from_pair(IPv4Interface)
+    ),
+    _native_decoder(IPv6Address, accepts=_PACKED, from_native=IPv6Address),
+    _native_decoder(IPv4Address, accepts=_PACKED, from_native=IPv4Address),
+    native_date_decoder,
+)
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from array import array
+from dataclasses import MISSING
+from typing import (
+    Any,
+    Generic,
+    Iterable,
+    Iterator,
+    Mapping,
+    MutableMapping,
+    MutableSequence,
+    Sequence,
+    TypeVar,
+)
+
+from ..types import is_iterable_not_str
+from .coders import DEFAULT_DECODERS
+from .decoder import _from_plan, _new_plan, _rooted
+from .plan import DataclassPlan, FieldPlan, FloatPlan, InstancePlan
+from .types import DecodeError, Decoder, DParser, to_error
+
+_T = TypeVar("_T")
+
+_TYPECODES = {int: "q", float: "d", bool: "b"}
+
+
+def _field_parser(plan: DataclassPlan, field: FieldPlan, strict: bool) -> DParser:
+    p = _from_plan(field.plan, strict=strict)
+    if isinstance(field.plan, DataclassPlan):
+        return _rooted(p, at=(*plan.path, field.field))
+    else:
+        return p
+
+
+class Row(Generic[_T]):
+    __slots__ = ("_columns", "_idx")
+
+    def __init__(self, columns: Columns[_T], idx: int) -> None:
+        self._columns, self._idx = columns, idx
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            col = self._columns.columns[name]
+        except KeyError:
+            raise AttributeError(name)
+        else:
+            val = col[self._idx]
+            return bool(val) if name in self._columns.bools else val
+
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{name}={getattr(self, name)!r}" for name in self._columns.columns
+        )
+        return f"{self._columns.tp.__qualname__}({fields})"
+
+
+class Columns(Generic[_T]):
+    def __init__(
+        self,
+        tp: Any,
+        columns: Mapping[str, MutableSequence[Any]],
+        bools: Iterable[str],
+        length: int,
+    ) -> None:
+        self.tp, self.columns, self.bools = tp, columns, frozenset(bools)
+        self._len = length
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, idx: int) -> Row[_T]:
+        if idx < 0:
+            idx += self._len
+        if not 0 <= idx < self._len:
+            raise IndexError(idx)
+        return Row(self, idx=idx)
+
+    def __iter__(self) -> Iterator[Row[_T]]:
+        for idx in range(self._len):
+            yield Row(self, idx=idx)
+
+
+class new_columnar_decoder(Generic[_T]):
+    def __init__(
+        self,
+        tp: Any,
+        strict: bool = True,
+        decoders: Sequence[Decoder] = DEFAULT_DECODERS,
+    ) -> None:
+        plan = _new_plan(tp, path=(), strict=strict, decoders=decoders)
+        if not isinstance(plan, DataclassPlan):
+            raise ValueError(f"Unexpected type -- {tp}")
+
+        self._tp, self._plan, self._strict = tp, plan, strict
+        self._fields = tuple(
+            (
+                f.name,
+                f.required,
+                f.field.default,
+                f.field.default_factory,
+                _field_parser(plan, field=f, strict=strict),
+                _TYPECODES.get(f.plan.tp)
+                if isinstance(f.plan, (InstancePlan, FloatPlan))
+                else None,
+            )
+            for f in plan.fields
+        )
+        self._names = frozenset(f.name for f in plan.fields)
+        self._required = frozenset(f.name for f in plan.fields if f.required)
+
+    def __call__(self, xs: Any) -> Columns[_T]:
+        path = self._plan.path
+        if not is_iterable_not_str(xs):
+            raise DecodeError(path=path, actual=xs)
+
+        columns: MutableMapping[str, MutableSequence[Any]] = {
+            name: array(code) if code else [] for name, _, _, _, _, code in self._fields
+        }
+        length = 0
+        for x in xs:
+            if not isinstance(x, Mapping):
+                raise DecodeError(path=path, actual=x)
+            for name, req, default, factory, p, _ in self._fields:
+                if name in x:
+                    ok, val = p(x[name])
+                    if not ok:
+                        raise to_error(DecodeError, val)
+                elif req:
+                    mk = self._required - x.keys()
+                    raise DecodeError(path=path, actual=x, missing_keys=mk)
+                else:
+                    val = default if factory is MISSING else factory()
+
+                col = columns[name]
+                try:
+                    col.append(val)
+                except (OverflowError, TypeError):
+                    columns[name] = [*col, val]
+
+            if self._strict and (ek := x.keys() - self._names):
+                raise DecodeError(path=path, actual=x, extra_keys=ek)
+            length += 1
+
+        bools = (name for name, *_, code in self._fields if code == "b")
+        return Columns(self._tp, columns=columns, bools=bools, length=length)
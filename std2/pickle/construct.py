@@ -0,0 +1,108 @@
+from dataclasses import MISSING, fields, is_dataclass
+from inspect import signature
+from typing import Any, Callable, MutableMapping, Optional
+
+Builder = Callable[[MutableMapping[str, Any]], Any]
+
+
+def _generated_init(tp: Any) -> bool:
+    """
+    `dataclass` compiles the `__init__` it generates from source, via `exec`
+    """
+
+    code = getattr(getattr(tp, "__init__", None), "__code__", None)
+    params = getattr(tp, "__dataclass_params__", None)
+    return (
+        bool(params and params.init) and getattr(code, "co_filename", "") == "<string>"
+    )
+
+
+def _plain(tp: Any) -> bool:
+    try:
+        params = signature(tp).parameters
+    except (TypeError, ValueError):
+        return False
+    else:
+        return (
+            is_dataclass(tp)
+            and _generated_init(tp)
+            and not hasattr(tp, "__post_init__")
+            and tp.__new__ is object.__new__
+            and tuple(params) == tuple(f.name for f in fields(tp))
+        )
+
+
+def new_builder(tp: Any) -> Optional[Builder]:
+    """
+    Construct without `__init__`, only for dataclasses whose `__init__` is exactly their fields
+    """
+
+    if not _plain(tp):
+        return None
+    else:
+        fs = fields(tp)
+        names = tuple(f.name for f in fs)
+        defaults = tuple(
+            (f.name, f.default, f.default_factory)
+            for f in fs
+            if f.default is not MISSING or f.default_factory is not MISSING
+        )
+        slotted = any("__slots__" in vars(c) for c in tp.__mro__)
+        new, setattr = object.__new__, object.__setattr__
+
+        def fill(kw: MutableMapping[str, Any]) -> MutableMapping[str, Any]:
+            for name, default, factory in defaults:
+                if name not in kw:
+                    kw[name] = default if factory is MISSING else factory()
+            return {name: kw[name] for name in names}
+
+        def build(kw: MutableMapping[str, Any]) -> Any:
+            if len(kw) != len(names):
+                kw = fill(kw)
+            obj = new(tp)
+            if slotted:
+                for name in names:
+                    setattr(obj, name, kw[name])
+            else:
+                obj.__dict__.update(kw)
+            return obj
+
+        return build
+
+
+class _Unprojected:
+    def __repr__(self) -> str:
+        return "<unprojected>"
+
+
+UNPROJECTED: Any = _Unprojected()
+
+
+def new_partial_builder(tp: Any) -> Builder:
+    """
+    Neither `__init__` nor `__post_init__` run
+
+    Fields not given take their default, or `UNPROJECTED` without one
+    """
+
+    defaults = tuple(
+        (f.name, UNPROJECTED if f.default is MISSING else f.default, f.default_factory)
+        for f in fields(tp)
+    )
+    slotted = any("__slots__" in vars(c) for c in tp.__mro__)
+    new, setattr = object.__new__, object.__setattr__
+
+    def build(kw: MutableMapping[str, Any]) -> Any:
+        for name, default, factory in defaults:
+            if name not in kw:
+                kw[name] = default if factory is MISSING else factory()
+
+        obj = new(tp)
+        if slotted:
+            for name, val in kw.items():
+                setattr(obj, name, val)
+        else:
+            obj.__dict__.update(kw)
+        return obj
+
+    return build
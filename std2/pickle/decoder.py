@@ -1,132 +1,281 @@
 from __future__ import annotations
 
-from dataclasses import MISSING, fields, is_dataclass
-from enum import Enum
-from inspect import isclass
-from itertools import chain, repeat
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+from itertools import repeat
+from pickle import Pickler, PicklingError, Unpickler
 from typing import (
+    AbstractSet,
     Any,
     Generic,
-    Literal,
+    Iterable,
     Mapping,
     MutableMapping,
-    MutableSet,
+    MutableSequence,
+    Optional,
     Sequence,
     SupportsFloat,
+    Tuple,
     TypeVar,
     Union,
     cast,
-    get_args,
-    get_origin,
-    get_type_hints,
 )
 
+from ..itertools import batched_into
 from ..types import is_iterable_not_str
-from .coders import DEFAULT_DECODERS
-from .types import MAPS, PRIMITIVES, SEQS, SETS, DecodeError, Decoder, DParser, DStep
+from .cache import LRU, CacheInfo, Interner, type_key
+from .codegen import compile_decoder, compile_validator
+from .coders import DEFAULT_DECODERS, NATIVE_DECODERS
+from .construct import Builder, new_builder, new_partial_builder
+from .delta import Delta, patch
+from .dispatch import new_dispatch
+from .persist import PlanCache
+from .plan import (
+    AnyPlan,
+    CustomPlan,
+    DataclassPlan,
+    EnumPlan,
+    FloatPlan,
+    Hints,
+    InstancePlan,
+    LiteralPlan,
+    MapPlan,
+    NonePlan,
+    Plan,
+    SeqPlan,
+    SetPlan,
+    TuplePlan,
+    UnionPlan,
+    intern_plan,
+    new_check,
+    new_plan,
+    new_projection,
+    project_plan,
+    tie,
+    type_hints,
+)
+from .profile import Profiler
+from .registry import Registry, coders_key
+from .types import (
+    PRIMITIVES,
+    DecodeError,
+    Decoder,
+    DParser,
+    DStep,
+    Failure,
+    rebase,
+    to_error,
+)
+from .validate import Validator, new_validator
 
 _T = TypeVar("_T")
 
+_CACHE = LRU[DParser](maxsize=1024)
+_VALIDATORS = LRU[Validator](maxsize=1024)
+
+_SHIPPED = (*DEFAULT_DECODERS, *NATIVE_DECODERS)
+_REFS = {id(d): idx for idx, d in enumerate(_SHIPPED)}
+
+
+def _new_plan(
+    tp: Any,
+    path: Sequence[Any],
+    strict: bool,
+    decoders: Sequence[Decoder],
+    hints: Hints = type_hints,
+) -> Plan:
+    def custom(tp: Any, path: Sequence[Any]) -> Optional[DParser]:
+        coders = decoders.resolve(tp) if isinstance(decoders, Registry) else decoders
+        for d in coders:
+            if dp := d(tp, path=path, strict=strict, decoders=decoders):
+                return dp
+        else:
+            return None
 
-def _new_parser(
-    tp: Any, path: Sequence[Any], strict: bool, decoders: Sequence[Decoder]
+    return new_plan(tp, path=path, custom=custom, hints=hints)
+
+
+def _from_plan(
+    plan: Plan,
+    strict: bool,
+    fast_init: bool = False,
+    profiler: Optional[Profiler] = None,
+    memo: Optional[MutableMapping[int, Any]] = None,
+    base: Sequence[Any] = (),
 ) -> DParser:
-    for d in decoders:
-        if isclass(tp) and (dp := d(tp, path=path, strict=strict, decoders=decoders)):
-            return dp
-    else:
-        origin, args = get_origin(tp), get_args(tp)
+    memo = {} if memo is None else memo
 
-        if tp is Any:
-            return lambda x: (True, x)
+    def build() -> DParser:
+        p = _new_node(
+            plan,
+            strict=strict,
+            fast_init=fast_init,
+            profiler=profiler,
+            memo=memo,
+            base=base,
+        )
+        return profiler.wrap(plan, p, base=base) if profiler else p
 
-        elif tp is None:
+    return tie(memo, plan=plan, build=build)
 
-            def p(x: Any) -> DStep:
-                if x is None:
-                    return True, None
-                else:
-                    return False, DecodeError(path=(*path, tp), actual=x)
 
-            return p
+def _rooted(p: DParser, at: Sequence[Any]) -> DParser:
+    def q(x: Any) -> DStep:
+        succ, y = p(x)
+        return (True, y) if succ else (False, rebase(at, y))
+
+    return q
+
+
+def _new_node(
+    plan: Plan,
+    strict: bool,
+    fast_init: bool,
+    profiler: Optional[Profiler],
+    memo: MutableMapping[int, Any],
+    base: Sequence[Any],
+) -> DParser:
+    tp, path = plan.tp, plan.path
+
+    def sub(plan: Plan, at: Sequence[Any] = path[:-1], unwind: bool = True) -> DParser:
+        if not isinstance(plan, DataclassPlan):
+            return _from_plan(
+                plan,
+                strict=strict,
+                fast_init=fast_init,
+                profiler=profiler,
+                memo=memo,
+                base=base,
+            )
+        else:
+            # profiling expands shared nodes per use site, only cycles stay shared
+            p = _from_plan(
+                plan,
+                strict=strict,
+                fast_init=fast_init,
+                profiler=profiler,
+                memo={**memo} if profiler else memo,
+                base=(*base, *at),
+            )
+            return _rooted(p, at=at) if at and unwind else p
+
+    if isinstance(plan, CustomPlan):
+        return plan.parser
+
+    elif isinstance(plan, AnyPlan):
+        return lambda x: (True, x)
+
+    elif isinstance(plan, NonePlan):
+
+        def p(x: Any) -> DStep:
+            if x is None:
+                return True, None
+            else:
+                return False, Failure(path=path, actual=x)
 
-        elif origin is Literal:
-            a = {*args}
+        return p
+
+    elif isinstance(plan, LiteralPlan):
+        a = plan.values
+
+        def p(x: Any) -> DStep:
+            if type(x) in PRIMITIVES and x in a:
+                return True, x
+            else:
+                return False, Failure(path=path, actual=x)
+
+        return p
+
+    elif isinstance(plan, UnionPlan):
+        # failed branches are discarded, no need to unwind them
+        ps = tuple(sub(b, unwind=False) for b in plan.branches)
+
+        if dispatch := new_dispatch(plan):
 
             def p(x: Any) -> DStep:
-                if type(x) in PRIMITIVES and x in a:
-                    return True, x
+                for succ, y in (ps[i](x) for i in dispatch(x)):
+                    if succ:
+                        return True, y
                 else:
-                    return False, DecodeError(path=(*path, tp), actual=x)
-
-            return p
+                    return False, Failure(path=path, actual=x)
 
-        elif origin is Union:
-            ps = tuple(
-                _new_parser(a, path=path, strict=strict, decoders=decoders)
-                for a in args
-            )
+        else:
 
             def p(x: Any) -> DStep:
                 for succ, y in (p(x) for p in ps):
                     if succ:
                         return True, y
                 else:
-                    return False, DecodeError(path=(*path, tp), actual=x)
+                    return False, Failure(path=path, actual=x)
 
-            return p
+        return p
 
-        elif origin in MAPS:
-            lp, rp = (
-                _new_parser(a, path=path, strict=strict, decoders=decoders)
-                for a in args
-            )
+    elif isinstance(plan, MapPlan):
+        lp = sub(plan.key)
+        rp = sub(plan.val)
+        lc, rc = new_check(plan.key), new_check(plan.val)
 
-            def p(x: Any) -> DStep:
-                if not isinstance(x, Mapping):
-                    return False, DecodeError(path=(*path, tp), actual=x)
+        def p(x: Any) -> DStep:
+            if not isinstance(x, Mapping):
+                return False, Failure(path=path, actual=x)
+            elif lc and rc and lc(x.keys()) and rc(x.values()):
+                return True, dict(x)
+            else:
+                acc = {}
+                for k, v in x.items():
+                    sl, l = lp(k)
+                    if not sl:
+                        return False, l
+                    sr, r = rp(v)
+                    if not sr:
+                        return False, r
+
+                    acc[l] = r
                 else:
-                    acc = {}
-                    for k, v in x.items():
-                        sl, l = lp(k)
-                        if not sl:
-                            return False, l
-                        sr, r = rp(v)
-                        if not sr:
-                            return False, r
-
-                        acc[l] = r
+                    return True, acc
+
+        return p
+
+    elif isinstance(plan, SetPlan):
+        pp = sub(plan.item)
+
+        def p(x: Any) -> DStep:
+            if not is_iterable_not_str(x):
+                return False, Failure(path=path, actual=x)
+            else:
+                acc = set()
+                for succ, m in map(pp, x):
+                    if succ:
+                        acc.add(m)
                     else:
-                        return True, acc
+                        return False, m
+                else:
+                    return True, acc
 
-            return p
+        return p
 
-        elif origin in SETS:
-            a, *_ = args
-            pp = _new_parser(a, path=path, strict=strict, decoders=decoders)
+    elif isinstance(plan, SeqPlan):
+        pp = sub(plan.item)
+
+        if check := new_check(plan.item):
 
             def p(x: Any) -> DStep:
                 if not is_iterable_not_str(x):
-                    return False, DecodeError(path=(*path, tp), actual=x)
+                    return False, Failure(path=path, actual=x)
                 else:
-                    acc = set()
-                    for succ, m in map(pp, x):
-                        if succ:
-                            acc.add(m)
-                        else:
-                            return False, m
-                    else:
-                        return True, acc
-
-            return p
+                    acc = list(x)
+                    if not check(acc):
+                        for succ, m in map(pp, acc):
+                            if not succ:
+                                return False, m
+                    return True, acc
 
-        elif origin in SEQS:
-            a, *_ = args
-            pp = _new_parser(a, path=path, strict=strict, decoders=decoders)
+        else:
 
             def p(x: Any) -> DStep:
                 if not is_iterable_not_str(x):
-                    return False, DecodeError(path=(*path, tp), actual=x)
+                    return False, Failure(path=path, actual=x)
                 else:
                     acc = []
                     for succ, m in map(pp, x):
@@ -137,137 +286,142 @@ def _new_parser(
                     else:
                         return True, acc
 
-            return p
+        return p
 
-        elif origin is tuple:
-            if len(args) >= 2 and args[-1] is Ellipsis:
-                bp = tuple(
-                    _new_parser(a, path=path, strict=strict, decoders=decoders)
-                    for a in args[:-1]
-                )
-                ep = repeat(
-                    _new_parser(args[-2], path=path, strict=strict, decoders=decoders)
-                )
+    elif isinstance(plan, TuplePlan):
+        ps = tuple(map(sub, plan.items))
 
-                def p(x: Any) -> DStep:
-                    if not is_iterable_not_str(x):
-                        return False, DecodeError(path=(*path, tp), actual=x)
+        def p(x: Any) -> DStep:
+            if not is_iterable_not_str(x):
+                return False, Failure(path=path, actual=x)
+            else:
+                acc = []
+                for succ, y in (p(m) for p, m in zip(ps, x)):
+                    if succ:
+                        acc.append(y)
                     else:
-                        acc = []
-                        for succ, y in (p(m) for p, m in zip(chain(bp, ep), x)):
-                            if succ:
-                                acc.append(y)
-                            else:
-                                return False, y
-                        else:
-                            return True, acc
+                        return False, y
+                else:
+                    return True, acc
 
+        return p
+
+    elif isinstance(plan, EnumPlan):
+        members = tp.__members__
+
+        def p(x: Any) -> DStep:
+            if member := members.get(x):
+                return True, member
             else:
-                ps = tuple(
-                    _new_parser(a, path=path, strict=strict, decoders=decoders)
-                    for a in args
-                )
+                return False, Failure(path=path, actual=x)
 
-                def p(x: Any) -> DStep:
-                    if not is_iterable_not_str(x):
-                        return False, DecodeError(path=(*path, tp), actual=x)
-                    else:
-                        acc = []
-                        for succ, y in (p(m) for p, m in zip(ps, x)):
-                            if succ:
-                                acc.append(y)
-                            else:
-                                return False, y
+        return p
+
+    elif isinstance(plan, DataclassPlan):
+        cls_fields = {f.name: sub(f.plan, at=(*path, f.field)) for f in plan.fields}
+        rq_fields = {f.name for f in plan.fields if f.required}
+        if plan.partial:
+            build: Optional[Builder] = new_partial_builder(tp)
+        else:
+            build = new_builder(tp) if fast_init else None
+
+        def p(x: Any) -> DStep:
+            if not isinstance(x, Mapping):
+                return False, Failure(path=path, actual=x)
+            else:
+                kwargs: MutableMapping[str, Any] = {}
+                for k, p in cls_fields.items():
+                    if k in x:
+                        succ, v = p(x[k])
+                        if succ:
+                            kwargs[k] = v
                         else:
-                            return True, acc
+                            return False, v
 
-            return p
+                ks = kwargs.keys()
+                if mk := rq_fields - ks:
+                    return False, Failure(path=path, actual=x, missing_keys=mk)
 
-        elif origin and args:
-            raise ValueError(f"Unexpected type -- {tp}")
+                if strict:
+                    ek = x.keys() - ks
+                    if ek:
+                        return False, Failure(path=path, actual=x, extra_keys=ek)
 
-        elif isclass(tp) and issubclass(tp, Enum):
+                return True, build(kwargs) if build else tp(**kwargs)
 
-            def p(x: Any) -> DStep:
-                if member := tp.__members__.get(x):
-                    return True, member
-                else:
-                    return False, DecodeError(path=(*path, tp), actual=x)
+        return p
 
-            return p
+    elif isinstance(plan, FloatPlan):
 
-        elif is_dataclass(tp):
-            hints = get_type_hints(tp, globalns=None, localns=None)
-            cls_fields: MutableMapping[str, DParser] = {}
-            rq_fields: MutableSet[str] = set()
-            for field in fields(tp):
-                if field.init:
-                    fp = _new_parser(
-                        hints[field.name],
-                        path=(*path, tp, field),
-                        strict=strict,
-                        decoders=decoders,
-                    )
-                    req = field.default is MISSING and field.default_factory is MISSING
-                    cls_fields[field.name] = fp
-                    if req:
-                        rq_fields.add(field.name)
+        def p(x: Any) -> DStep:
+            if isinstance(x, SupportsFloat):
+                return True, x
+            else:
+                return False, Failure(path=path, actual=x)
 
-            def p(x: Any) -> DStep:
-                if not isinstance(x, Mapping):
-                    return False, DecodeError(path=(*path, tp), actual=x)
-                else:
-                    kwargs: MutableMapping[str, Any] = {}
-                    for k, p in cls_fields.items():
-                        if k in x:
-                            succ, v = p(x[k])
-                            if succ:
-                                kwargs[k] = v
-                            else:
-                                return False, v
-
-                    ks = kwargs.keys()
-                    if mk := rq_fields - ks:
-                        return False, DecodeError(
-                            path=(*path, tp), actual=x, missing_keys=mk
-                        )
-
-                    if strict:
-                        ek = x.keys() - ks
-                        if ek:
-                            return False, DecodeError(
-                                path=(*path, tp), actual=x, extra_keys=ek
-                            )
-
-                    return True, tp(**kwargs)
+        return p
 
-            return p
+    elif isinstance(plan, InstancePlan):
 
-        elif tp is float:
+        def p(x: Any) -> DStep:
+            if isinstance(x, tp):
+                return True, x
+            else:
+                return False, Failure(path=path, actual=x)
 
-            def p(x: Any) -> DStep:
-                if isinstance(x, SupportsFloat):
-                    return True, x
-                else:
-                    return False, DecodeError(path=(*path, tp), actual=x)
+        return p
 
-            return p
+    else:
+        raise ValueError(f"Unexpected plan -- {plan}")
 
-        else:
-            try:
-                isinstance(None, tp)
-            except TypeError:
-                # Typed Dict
-                return lambda x: (True, x)
-            else:
 
-                def p(x: Any) -> DStep:
-                    if isinstance(x, tp):
-                        return True, x
-                    else:
-                        return False, DecodeError(path=(*path, tp), actual=x)
+def _new_parser(
+    tp: Any, path: Sequence[Any], strict: bool, decoders: Sequence[Decoder]
+) -> DParser:
+    plan = _new_plan(tp, path=path, strict=strict, decoders=decoders)
+    return _from_plan(plan, strict=strict)
+
+
+@lru_cache
+def _pool() -> Executor:
+    return ProcessPoolExecutor()
 
-                return p
+
+class _Pickler(Pickler):
+    # coder factories return closures, which only travel as registry indices
+    def persistent_id(self, obj: Any) -> Optional[int]:
+        return _REFS.get(id(obj))
+
+
+class _Unpickler(Unpickler):
+    def persistent_load(self, pid: Any) -> Any:
+        return _SHIPPED[pid]
+
+
+def _portable(spec: Any) -> Optional[bytes]:
+    buf = BytesIO()
+    try:
+        _Pickler(buf).dump(spec)
+    except (PicklingError, AttributeError, TypeError):
+        return None
+    else:
+        return buf.getvalue()
+
+
+def _decode_chunk(spec: bytes, chunk: Sequence[Any]) -> Tuple[bool, Any]:
+    tp, strict, decoders, compile, fast_init, project = _Unpickler(BytesIO(spec)).load()
+    p = new_decoder[Any](
+        tp,
+        strict=strict,
+        decoders=decoders,
+        compile=compile,
+        fast_init=fast_init,
+        project=project,
+    )
+    try:
+        return True, p(chunk)
+    except DecodeError:
+        return False, None
 
 
 class new_decoder(Generic[_T]):
@@ -276,12 +430,201 @@ class new_decoder(Generic[_T]):
         tp: Any,
         strict: bool = True,
         decoders: Sequence[Decoder] = DEFAULT_DECODERS,
+        compile: bool = False,
+        fast_init: bool = False,
+        project: Optional[AbstractSet[str]] = None,
+        intern: Optional[Interner] = None,
+        intern_paths: Optional[AbstractSet[str]] = None,
+        plan_cache: Optional[PlanCache] = None,
+        profiler: Optional[Profiler] = None,
     ) -> None:
-        self._p = _new_parser(tp, path=(), strict=strict, decoders=decoders)
+        if project is not None and strict:
+            raise ValueError("Projection requires strict=False")
+        if profiler and compile:
+            raise ValueError("Profiling requires compile=False")
+
+        projection = None if project is None else new_projection(project)
+        interning = None if intern_paths is None else new_projection(intern_paths)
+
+        def plan(interned: bool = True) -> Plan:
+            hints = plan_cache.hints if plan_cache else type_hints
+            p = _new_plan(tp, path=(), strict=strict, decoders=decoders, hints=hints)
+            if projection is not None:
+                p = project_plan(p, projection=projection)
+            if intern is not None and interned:
+                p = intern_plan(p, intern=intern, projection=interning)
+            return p
+
+        def build() -> DParser:
+            if compile:
+                return compile_decoder(plan(), strict=strict, fast_init=fast_init)
+            else:
+                return _from_plan(
+                    plan(), strict=strict, fast_init=fast_init, profiler=profiler
+                )
+
+        def validator() -> Validator:
+            if compile:
+                cv = compile_validator(plan(interned=False), strict=strict)
+
+                def v(x: Any) -> Optional[Union[Failure, DecodeError]]:
+                    ok, thing = cv(x)
+                    return None if ok else thing
+
+                return v
+            else:
+                return new_validator(plan(interned=False), strict=strict)
+
+        paths = None if project is None else frozenset(project)
+        interns = None if intern_paths is None else frozenset(intern_paths)
+        key = (
+            type_key(tp),
+            strict,
+            coders_key(decoders),
+            compile,
+            fast_init,
+            paths,
+            intern,
+            interns,
+            profiler,
+        )
+        self._p = _CACHE.get(key, build=build)
+        vkey = (type_key(tp), strict, coders_key(decoders), compile, paths)
+        self._vkey, self._validator = vkey, validator
+        self._v: Optional[Validator] = None
+        self._spec = (tp, strict, decoders, compile, fast_init, paths)
+        self._in_process = intern is not None or profiler is not None
+
+        def batch() -> Optional[DParser]:
+            if profiler:
+                return None
+            else:
+                return new_decoder[Any](
+                    cast(Any, Sequence)[tp],
+                    strict=strict,
+                    decoders=decoders,
+                    compile=compile,
+                    fast_init=fast_init,
+                    project=project,
+                    intern=intern,
+                    intern_paths=intern_paths,
+                    plan_cache=plan_cache,
+                )._p
+
+        self._batch = batch
+        self._plan = plan
+        self._shipped, self._ship = False, cast(Optional[bytes], None)
+
+    @staticmethod
+    def cache_info() -> CacheInfo:
+        return _CACHE.info()
+
+    @staticmethod
+    def cache_clear() -> None:
+        _CACHE.clear()
+        _VALIDATORS.clear()
+
+    @staticmethod
+    def cache_resize(maxsize: int) -> None:
+        _CACHE.resize(maxsize)
+        _VALIDATORS.resize(maxsize)
 
     def __call__(self, x: Any) -> _T:
         ok, thing = self._p(x)
         if ok:
             return cast(_T, thing)
         else:
-            raise thing
+            raise to_error(DecodeError, thing)
+
+    def validate(self, x: Any) -> Optional[Sequence[Any]]:
+        if not (v := self._v):
+            v = self._v = _VALIDATORS.get(self._vkey, build=self._validator)
+
+        err = v(x)
+        return err.path if err else None
+
+    def decode_parallel(
+        self,
+        xs: Sequence[Any],
+        executor: Optional[Executor] = None,
+        chunks: Optional[int] = None,
+    ) -> _T:
+        """
+        Decode a top level homogeneous sequence in chunks,
+        each worker rebuilds its own plan
+
+        Anything else, or coders that cannot be pickled, decodes in process.
+        Without an `executor`, a process pool is shared across calls
+        """
+
+        if self._in_process:
+            raise ValueError("Parallel decoding does not support intern or profiler")
+
+        if not self._shipped:
+            homogeneous = isinstance(self._plan(interned=False), SeqPlan)
+            self._ship = _portable(self._spec) if homogeneous else None
+            self._shipped = True
+
+        spec = self._ship
+        if (
+            spec is None
+            or not isinstance(xs, Sequence)
+            or isinstance(xs, str)
+            or len(xs) < 2
+        ):
+            return self(xs)
+
+        parts = tuple(batched_into(xs) if chunks is None else batched_into(xs, chunks))
+
+        ex = executor or _pool()
+        results = tuple(ex.map(_decode_chunk, repeat(spec), parts))
+
+        acc: MutableSequence[Any] = []
+        for part, (ok, ys) in zip(parts, results):
+            # re-decode locally for the full error
+            acc.extend(ys if ok else cast(Iterable[Any], self(part)))
+        return cast(_T, acc)
+
+    def decode_delta(self, base: Any, delta: Delta) -> Tuple[_T, Any]:
+        """
+        Apply `delta` to `base` without mutating it, then decode the result
+
+        Also returns the patched encoding, to be used as the next `base`
+        """
+
+        try:
+            x = patch(base, delta)
+        except (LookupError, TypeError, ValueError) as e:
+            raise DecodeError(e, path=(), actual=delta)
+        else:
+            return self(x), x
+
+    def decode_many(
+        self,
+        xs: Iterable[Any],
+        errors: Optional[MutableMapping[int, DecodeError]] = None,
+    ) -> Sequence[_T]:
+        """
+        One pass of the `Sequence[...]` coder over the batch,
+        rows are only decoded one by one to report failures
+        """
+
+        rows = xs if type(xs) is list else [*xs]
+        if batch := self._batch():
+            ok, thing = batch(rows)
+            if ok:
+                return cast(Sequence[_T], thing)
+
+        p = self._p
+        acc: MutableSequence[_T] = []
+        append = acc.append
+        for idx, x in enumerate(rows):
+            ok, thing = p(x)
+            if ok:
+                append(cast(_T, thing))
+            elif errors is None:
+                raise to_error(DecodeError, thing)
+            else:
+                errors[idx] = to_error(DecodeError, thing)
+
+        return acc
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from typing import Any, Mapping, MutableSequence, MutableSet, Sequence, Tuple
+
+Op = Tuple[Any, ...]
+Delta = Sequence[Op]
+
+
+def diff(base: Any, x: Any) -> Delta:
+    """
+    Ops are `(path, value)` to set, or `(path,)` to delete, against an encoding
+
+    Paths are mapping keys and sequence indices,
+    sequences of a different length are replaced whole
+    """
+
+    acc: MutableSequence[Op] = []
+
+    def cont(path: Tuple[Any, ...], a: Any, b: Any) -> None:
+        if type(a) is dict and type(b) is dict:
+            for k, v in b.items():
+                if k not in a:
+                    acc.append(((*path, k), v))
+                else:
+                    cont((*path, k), a[k], v)
+            for k in a.keys() - b.keys():
+                acc.append(((*path, k),))
+        elif type(a) is list and type(b) is list and len(a) == len(b):
+            for idx, (l, r) in enumerate(zip(a, b)):
+                cont((*path, idx), l, r)
+        elif a is not b and (type(a) is not type(b) or a != b):
+            acc.append((path, b))
+
+    cont((), base, x)
+    return acc
+
+
+def patch(base: Any, delta: Delta) -> Any:
+    """
+    Copy on write, `base` and anything it shares with the result are untouched
+
+    Raises `LookupError` or `ValueError` on a delta that does not fit `base`
+    """
+
+    owned: MutableSet[int] = set()
+
+    def own(x: Any) -> Any:
+        if id(x) in owned:
+            return x
+        else:
+            if isinstance(x, Mapping):
+                y: Any = dict(x)
+            elif isinstance(x, Sequence) and not isinstance(x, (str, bytes)):
+                y = list(x)
+            else:
+                raise ValueError(f"Path goes through a non container -- {x!r}")
+            owned.add(id(y))
+            return y
+
+    root = [base]
+    for path, *val in delta:
+        node, key = root, 0
+        for k in path:
+            child = node[key] = own(node[key])
+            node, key = child, k
+
+        if val:
+            node[key] = val[0]
+        else:
+            del node[key]
+
+    return root[0]
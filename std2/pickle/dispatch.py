@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from typing import (
+    AbstractSet,
+    Any,
+    Callable,
+    Iterable,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Sequence,
+    SupportsFloat,
+    Tuple,
+)
+
+from .plan import (
+    DataclassPlan,
+    EnumPlan,
+    FloatPlan,
+    InstancePlan,
+    LiteralPlan,
+    MapPlan,
+    NonePlan,
+    Plan,
+    SeqPlan,
+    SetPlan,
+    TuplePlan,
+    UnionPlan,
+)
+from .types import PRIMITIVES
+
+_MIN_BRANCHES = 4
+_HASHABLE = frozenset(PRIMITIVES - {bytearray})
+_PLAIN = frozenset(PRIMITIVES | {list, tuple, dict, set, frozenset})
+_ANY, _ABSENT = object(), object()
+
+Dispatch = Callable[[Any], Sequence[int]]
+
+
+def _admits(plan: Plan, t: type) -> bool:
+    try:
+        if isinstance(plan, NonePlan):
+            return t is type(None)
+        elif isinstance(plan, LiteralPlan):
+            return t in PRIMITIVES
+        elif isinstance(plan, InstancePlan):
+            return issubclass(t, plan.tp)
+        elif isinstance(plan, FloatPlan):
+            return issubclass(t, SupportsFloat)
+        elif isinstance(plan, (MapPlan, DataclassPlan)):
+            return issubclass(t, Mapping)
+        elif isinstance(plan, (SeqPlan, SetPlan, TuplePlan)):
+            return issubclass(t, Iterable) and not issubclass(
+                t, (str, bytes, bytearray)
+            )
+        elif isinstance(plan, EnumPlan):
+            return issubclass(t, str) or t not in _PLAIN
+        else:
+            return True
+    except TypeError:
+        return True
+
+
+def new_dispatch(plan: UnionPlan) -> Optional[Dispatch]:
+    branches, tag = plan.branches, plan.tag
+    if not tag and len(branches) < _MIN_BRANCHES:
+        return None
+    else:
+        memo: MutableMapping[Tuple[type, Any], Sequence[int]] = {}
+        mappings: MutableMapping[type, bool] = {}
+        tagged = tag.tagged if tag else frozenset()
+
+        def admitted(t: type, variant: Any) -> Sequence[int]:
+            if not tag or variant is _ANY:
+                allowed: Optional[AbstractSet[int]] = None
+            elif variant is _ABSENT:
+                allowed = tag.untagged
+            else:
+                allowed = frozenset(() if variant is None else (variant,))
+
+            return tuple(
+                idx
+                for idx, b in enumerate(branches)
+                if _admits(b, t=t)
+                and (allowed is None or idx not in tagged or idx in allowed)
+            )
+
+        def dispatch(x: Any) -> Sequence[int]:
+            t, variant = type(x), _ANY
+            if tag:
+                if (is_map := mappings.get(t)) is None:
+                    is_map = mappings[t] = issubclass(t, Mapping)
+                if is_map:
+                    if tag.key in x:
+                        v = x[tag.key]
+                        variant = tag.variants.get(v) if type(v) in _HASHABLE else None
+                    else:
+                        variant = _ABSENT
+
+            key = (t, variant)
+            if (idxs := memo.get(key)) is None:
+                idxs = memo[key] = admitted(t, variant=variant)
+            return idxs
+
+        return dispatch
@@ -1,122 +1,222 @@
-from dataclasses import MISSING, fields, is_dataclass
+from dataclasses import is_dataclass
 from enum import Enum
-from inspect import isclass
-from itertools import chain, repeat
 from typing import (
     Any,
     Generic,
-    Literal,
+    Iterable,
     Mapping,
     MutableMapping,
-    MutableSet,
+    MutableSequence,
+    Optional,
     Sequence,
     SupportsFloat,
+    Tuple,
     TypeVar,
-    Union,
     cast,
-    get_args,
-    get_origin,
-    get_type_hints,
 )
 
 from ..types import is_iterable_not_str
+from .cache import LRU, CacheInfo, type_key
+from .codegen import compile_encoder
 from .coders import DEFAULT_ENCODERS
-from .types import MAPS, PRIMITIVES, SEQS, SETS, EncodeError, Encoder, EParser, EStep
+from .delta import Delta, diff
+from .plan import (
+    AnyPlan,
+    CustomPlan,
+    DataclassPlan,
+    EnumPlan,
+    FloatPlan,
+    InstancePlan,
+    LiteralPlan,
+    MapPlan,
+    NonePlan,
+    Plan,
+    SeqPlan,
+    SetPlan,
+    TuplePlan,
+    UnionPlan,
+    new_check,
+    new_plan,
+    tie,
+)
+from .profile import Profiler
+from .registry import Registry, coders_key
+from .types import (
+    PRIMITIVES,
+    EncodeError,
+    Encoder,
+    EParser,
+    EStep,
+    Failure,
+    rebase,
+    to_error,
+)
 
 _T = TypeVar("_T")
 
+_CACHE = LRU[EParser](maxsize=1024)
 
-def _new_parser(tp: Any, path: Sequence[Any], encoders: Sequence[Encoder]) -> EParser:
-    for e in encoders:
-        if isclass(tp) and (epp := e(tp, path=path, encoders=encoders)):
-            return epp
-    else:
-        origin, args = get_origin(tp), get_args(tp)
 
-        if tp is Any:
-            return lambda x: (True, x)
+def _new_plan(tp: Any, path: Sequence[Any], encoders: Sequence[Encoder]) -> Plan:
+    def custom(tp: Any, path: Sequence[Any]) -> Optional[EParser]:
+        coders = encoders.resolve(tp) if isinstance(encoders, Registry) else encoders
+        for e in coders:
+            if epp := e(tp, path=path, encoders=encoders):
+                return epp
+        else:
+            return None
 
-        elif tp is None:
+    return new_plan(tp, path=path, custom=custom)
 
-            def p(x: Any) -> EStep:
-                if x is None:
-                    return True, None
-                else:
-                    return False, EncodeError(path=(*path, tp), actual=x)
 
-            return p
+def _from_plan(
+    plan: Plan,
+    profiler: Optional[Profiler] = None,
+    memo: Optional[MutableMapping[int, Any]] = None,
+    base: Sequence[Any] = (),
+) -> EParser:
+    memo = {} if memo is None else memo
 
-        elif origin is Literal:
-            a = {*args}
+    def build() -> EParser:
+        p = _new_node(plan, profiler=profiler, memo=memo, base=base)
+        return profiler.wrap(plan, p, base=base) if profiler else p
 
-            def p(x: Any) -> EStep:
-                if type(x) in PRIMITIVES and x in a:
-                    return True, x
-                else:
-                    return False, EncodeError(path=(*path, tp), actual=x)
+    return tie(memo, plan=plan, build=build)
 
-            return p
 
-        elif origin is Union:
-            ps = tuple(_new_parser(a, path=path, encoders=encoders) for a in args)
+def _rooted(p: EParser, at: Sequence[Any]) -> EParser:
+    def q(x: Any) -> EStep:
+        succ, y = p(x)
+        return (True, y) if succ else (False, rebase(at, y))
 
-            def p(x: Any) -> EStep:
-                for succ, y in (p(x) for p in ps):
-                    if succ:
-                        return True, y
-                else:
-                    return False, EncodeError(path=(*path, tp), actual=x)
+    return q
 
-            return p
 
-        elif origin in MAPS:
-            lp, rp = (_new_parser(a, path=path, encoders=encoders) for a in args)
+def _new_node(
+    plan: Plan,
+    profiler: Optional[Profiler],
+    memo: MutableMapping[int, Any],
+    base: Sequence[Any],
+) -> EParser:
+    tp, path = plan.tp, plan.path
 
-            def p(x: Any) -> EStep:
-                if not isinstance(x, Mapping):
-                    return False, EncodeError(path=(*path, tp), actual=x)
+    def sub(plan: Plan, at: Sequence[Any] = path[:-1], unwind: bool = True) -> EParser:
+        if not isinstance(plan, DataclassPlan):
+            return _from_plan(plan, profiler=profiler, memo=memo, base=base)
+        else:
+            # profiling expands shared nodes per use site, only cycles stay shared
+            p = _from_plan(
+                plan,
+                profiler=profiler,
+                memo={**memo} if profiler else memo,
+                base=(*base, *at),
+            )
+            return _rooted(p, at=at) if at and unwind else p
+
+    if isinstance(plan, CustomPlan):
+        return plan.parser
+
+    elif isinstance(plan, AnyPlan):
+        return lambda x: (True, x)
+
+    elif isinstance(plan, NonePlan):
+
+        def p(x: Any) -> EStep:
+            if x is None:
+                return True, None
+            else:
+                return False, Failure(path=path, actual=x)
+
+        return p
+
+    elif isinstance(plan, LiteralPlan):
+        a = plan.values
+
+        def p(x: Any) -> EStep:
+            if type(x) in PRIMITIVES and x in a:
+                return True, x
+            else:
+                return False, Failure(path=path, actual=x)
+
+        return p
+
+    elif isinstance(plan, UnionPlan):
+        # failed branches are discarded, no need to unwind them
+        ps = tuple(sub(b, unwind=False) for b in plan.branches)
+
+        def p(x: Any) -> EStep:
+            for succ, y in (p(x) for p in ps):
+                if succ:
+                    return True, y
+            else:
+                return False, Failure(path=path, actual=x)
+
+        return p
+
+    elif isinstance(plan, MapPlan):
+        lp, rp = sub(plan.key), sub(plan.val)
+        lc, rc = new_check(plan.key), new_check(plan.val)
+
+        def p(x: Any) -> EStep:
+            if not isinstance(x, Mapping):
+                return False, Failure(path=path, actual=x)
+            elif lc and rc and lc(x.keys()) and rc(x.values()):
+                return True, dict(x)
+            else:
+                acc = {}
+                for k, v in x.items():
+                    sl, l = lp(k)
+                    if not sl:
+                        return False, l
+                    sr, r = rp(v)
+                    if not sr:
+                        return False, r
+
+                    acc[l] = r
                 else:
-                    acc = {}
-                    for k, v in x.items():
-                        sl, l = lp(k)
-                        if not sl:
-                            return False, l
-                        sr, r = rp(v)
-                        if not sr:
-                            return False, r
-
-                        acc[l] = r
+                    return True, acc
+
+        return p
+
+    elif isinstance(plan, SetPlan):
+        pp = sub(plan.item)
+
+        def p(x: Any) -> EStep:
+            if not is_iterable_not_str(x):
+                return False, Failure(path=path, actual=x)
+            else:
+                acc = {}
+                for succ, m in map(pp, x):
+                    if succ:
+                        acc[m] = True
                     else:
-                        return True, acc
+                        return False, m
+                else:
+                    return True, acc
 
-            return p
+        return p
 
-        elif origin in SETS:
-            a, *_ = args
-            pp = _new_parser(a, path=path, encoders=encoders)
+    elif isinstance(plan, SeqPlan):
+        pp = sub(plan.item)
+
+        if check := new_check(plan.item):
 
             def p(x: Any) -> EStep:
                 if not is_iterable_not_str(x):
-                    return False, EncodeError(path=(*path, tp), actual=x)
+                    return False, Failure(path=path, actual=x)
                 else:
-                    acc = {}
-                    for succ, m in map(pp, x):
-                        if succ:
-                            acc[m] = True
-                        else:
-                            return False, m
-                    else:
-                        return True, acc
-
-            return p
+                    acc = list(x)
+                    if not check(acc):
+                        for succ, m in map(pp, acc):
+                            if not succ:
+                                return False, m
+                    return True, acc
 
-        elif origin in SEQS:
-            a, *_ = args
-            pp = _new_parser(a, path=path, encoders=encoders)
+        else:
 
             def p(x: Any) -> EStep:
                 if not is_iterable_not_str(x):
-                    return False, EncodeError(path=(*path, tp), actual=x)
+                    return False, Failure(path=path, actual=x)
                 else:
                     acc = []
                     for succ, m in map(pp, x):
@@ -127,128 +227,172 @@ def _new_parser(tp: Any, path: Sequence[Any], encoders: Sequence[Encoder]) -> EP
                     else:
                         return True, acc
 
-            return p
+        return p
 
-        elif origin is tuple:
-            if len(args) >= 2 and args[-1] is Ellipsis:
-                bp = tuple(
-                    _new_parser(a, path=path, encoders=encoders) for a in args[:-1]
-                )
-                ep = repeat(_new_parser(args[-2], path=path, encoders=encoders))
+    elif isinstance(plan, TuplePlan):
+        ps = tuple(map(sub, plan.items))
 
-                def p(x: Any) -> EStep:
-                    if not is_iterable_not_str(x):
-                        return False, EncodeError(path=(*path, tp), actual=x)
+        def p(x: Any) -> EStep:
+            if not is_iterable_not_str(x):
+                return False, Failure(path=path, actual=x)
+            else:
+                acc = []
+                for succ, y in (p(m) for p, m in zip(ps, x)):
+                    if succ:
+                        acc.append(y)
                     else:
-                        acc = []
-                        for succ, y in (p(m) for p, m in zip(chain(bp, ep), x)):
-                            if succ:
-                                acc.append(y)
-                            else:
-                                return False, y
-                        else:
-                            return True, acc
+                        return False, y
+                else:
+                    return True, acc
+
+        return p
 
+    elif isinstance(plan, EnumPlan):
+
+        def p(x: Any) -> EStep:
+            if not isinstance(x, Enum):
+                return False, Failure(path=path, actual=x)
             else:
-                ps = tuple(_new_parser(a, path=path, encoders=encoders) for a in args)
+                return True, x.name
 
-                def p(x: Any) -> EStep:
-                    if not is_iterable_not_str(x):
-                        return False, EncodeError(path=(*path, tp), actual=x)
-                    else:
-                        acc = []
-                        for succ, y in (p(m) for p, m in zip(ps, x)):
-                            if succ:
-                                acc.append(y)
-                            else:
-                                return False, y
+        return p
+
+    elif isinstance(plan, DataclassPlan):
+        cls_fields = tuple(
+            (f.name, f.required, sub(f.plan, at=(*path, f.field))) for f in plan.fields
+        )
+
+        def p(x: Any) -> EStep:
+            if not is_dataclass(x):
+                return False, Failure(path=path, actual=x)
+            else:
+                acc: MutableMapping[str, Any] = {}
+                for k, req, p in cls_fields:
+                    if hasattr(x, k):
+                        succ, v = p(getattr(x, k))
+                        if succ:
+                            acc[k] = v
                         else:
-                            return True, acc
+                            return False, v
+                    elif req:
+                        return False, Failure(path=path, actual=x, missing_keys={k})
 
-            return p
+                return True, acc
 
-        elif origin and args:
-            raise ValueError(f"Unexpected type -- {tp}")
+        return p
 
-        elif isclass(tp) and issubclass(tp, Enum):
+    elif isinstance(plan, FloatPlan):
 
-            def p(x: Any) -> EStep:
-                if not isinstance(x, Enum):
-                    return False, EncodeError(path=(*path, tp), actual=x)
-                else:
-                    return True, x.name
-
-            return p
-
-        elif is_dataclass(tp):
-            hints = get_type_hints(tp, globalns=None, localns=None)
-            cls_fields: MutableMapping[str, EParser] = {}
-            rq_fields: MutableSet[str] = set()
-            for field in fields(tp):
-                if field.init:
-                    fp = _new_parser(
-                        hints[field.name], path=(*path, tp, field), encoders=encoders
-                    )
-                    req = field.default is MISSING and field.default_factory is MISSING
-                    cls_fields[field.name] = fp
-                    if req:
-                        rq_fields.add(field.name)
+        def p(x: Any) -> EStep:
+            if isinstance(x, SupportsFloat):
+                return True, x
+            else:
+                return False, Failure(path=path, actual=x)
 
-            def p(x: Any) -> EStep:
-                if not is_dataclass(x):
-                    return False, EncodeError(path=(*path, tp), actual=x)
-                else:
-                    acc: MutableMapping[str, Any] = {}
-                    for k, p in cls_fields.items():
-                        if hasattr(x, k):
-                            succ, v = p(getattr(x, k))
-                            if succ:
-                                acc[k] = v
-                            else:
-                                return False, v
-                        elif req:
-                            return False, EncodeError(
-                                path=(*path, tp), actual=x, missing_keys=k
-                            )
+        return p
 
-                    return True, acc
+    elif isinstance(plan, InstancePlan):
 
-            return p
+        def p(x: Any) -> EStep:
+            if isinstance(x, tp):
+                return True, x
+            else:
+                return False, Failure(path=path, actual=x)
 
-        elif tp is float:
+        return p
 
-            def p(x: Any) -> EStep:
-                if isinstance(x, SupportsFloat):
-                    return True, x
-                else:
-                    return False, EncodeError(path=(*path, tp), actual=x)
+    else:
+        raise ValueError(f"Unexpected plan -- {plan}")
 
-            return p
 
-        else:
-            try:
-                isinstance(None, tp)
-            except TypeError:
-                # Typed Dict
-                return lambda x: (True, x)
+def _new_parser(tp: Any, path: Sequence[Any], encoders: Sequence[Encoder]) -> EParser:
+    return _from_plan(_new_plan(tp, path=path, encoders=encoders))
+
+
+class new_encoder(Generic[_T]):
+    def __init__(
+        self,
+        tp: Any,
+        encoders: Sequence[Encoder] = DEFAULT_ENCODERS,
+        compile: bool = False,
+        profiler: Optional[Profiler] = None,
+    ) -> None:
+        if profiler and compile:
+            raise ValueError("Profiling requires compile=False")
+
+        def build() -> EParser:
+            plan = _new_plan(tp, path=(), encoders=encoders)
+            if compile:
+                return compile_encoder(plan, fallback=_from_plan)
             else:
+                return _from_plan(plan, profiler=profiler)
 
-                def p(x: Any) -> EStep:
-                    if isinstance(x, tp):
-                        return True, x
-                    else:
-                        return False, EncodeError(path=(*path, tp), actual=x)
+        def batch() -> Optional[EParser]:
+            if profiler:
+                return None
+            else:
+                rows = cast(Any, Sequence)[tp]
+                return new_encoder[Any](rows, encoders=encoders, compile=compile)._p
 
-                return p
+        key = (type_key(tp), coders_key(encoders), compile, profiler)
+        self._p = _CACHE.get(key, build=build)
+        self._batch = batch
 
+    @staticmethod
+    def cache_info() -> CacheInfo:
+        return _CACHE.info()
 
-class new_encoder(Generic[_T]):
-    def __init__(self, tp: Any, encoders: Sequence[Encoder] = DEFAULT_ENCODERS) -> None:
-        self._p = _new_parser(tp, path=(), encoders=encoders)
+    @staticmethod
+    def cache_clear() -> None:
+        _CACHE.clear()
+
+    @staticmethod
+    def cache_resize(maxsize: int) -> None:
+        _CACHE.resize(maxsize)
 
     def __call__(self, x: _T) -> Any:
         ok, thing = self._p(x)
         if ok:
             return cast(_T, thing)
         else:
-            raise thing
+            raise to_error(EncodeError, thing)
+
+    def encode_many(
+        self,
+        xs: Iterable[_T],
+        errors: Optional[MutableMapping[int, EncodeError]] = None,
+    ) -> Sequence[Any]:
+        """
+        One pass of the `Sequence[...]` coder over the batch,
+        rows are only encoded one by one to report failures
+        """
+
+        rows = xs if type(xs) is list else [*xs]
+        if batch := self._batch():
+            ok, thing = batch(rows)
+            if ok:
+                return cast(Sequence[Any], thing)
+
+        p = self._p
+        acc: MutableSequence[Any] = []
+        append = acc.append
+        for idx, x in enumerate(rows):
+            ok, thing = p(x)
+            if ok:
+                append(thing)
+            elif errors is None:
+                raise to_error(EncodeError, thing)
+            else:
+                errors[idx] = to_error(EncodeError, thing)
+
+        return acc
+
+    def encode_delta(self, x: _T, base: Any) -> Tuple[Delta, Any]:
+        """
+        Encode `x` as the changes from `base`, the previous encoding
+
+        Also returns the full encoding of `x`, to be used as the next `base`
+        """
+
+        y = self(x)
+        return diff(base, y), y
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from hashlib import blake2b
+from inspect import isclass
+from os import replace
+from pathlib import Path, PurePath
+from pickle import HIGHEST_PROTOCOL, dumps, loads
+from sys import modules, version_info
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from typing import (
+    AbstractSet,
+    Any,
+    Iterable,
+    Mapping,
+    MutableMapping,
+    MutableSet,
+    Sequence,
+    Tuple,
+    cast,
+    get_args,
+    get_origin,
+)
+
+from .plan import type_hints
+
+_FORMAT = 2
+
+_Entries = MutableMapping[str, Tuple[Sequence[str], str, bytes]]
+
+
+def _modules(hints: Mapping[str, Any]) -> AbstractSet[str]:
+    """
+    Modules the resolved hints point into, string annotations included
+    """
+
+    acc: MutableSet[str] = set()
+
+    def cont(tp: Any) -> None:
+        if isclass(tp):
+            acc.add(tp.__module__)
+        if origin := get_origin(tp):
+            cont(origin)
+        for arg in get_args(tp):
+            cont(arg)
+
+    for tp in hints.values():
+        cont(tp)
+    return acc
+
+
+def _fingerprint(tp: Any, deps: Iterable[str]) -> str:
+    h = blake2b(digest_size=16)
+    for name in sorted({tp.__module__, *deps}):
+        file = getattr(modules.get(name), "__file__", None)
+        if file:
+            try:
+                st = Path(file).stat()
+            except OSError:
+                pass
+            else:
+                h.update(f"{name}:{st.st_mtime_ns}:{st.st_size}".encode())
+
+    for cls in tp.__mro__:
+        annotations = cls.__dict__.get("__annotations__", {})
+        h.update(f"{cls.__module__}:{cls.__qualname__}:{annotations!r}".encode())
+
+    return h.hexdigest()
+
+
+class PlanCache:
+    """
+    Persists resolved dataclass annotations across processes
+
+    Entries are keyed by `module:qualname` and invalidated by a fingerprint of
+    the raw annotations along the `__mro__`, and the files of the defining
+    module and of every module the resolved hints point into.
+
+    The file is unpickled on load -- only point this at trusted locations
+    """
+
+    def __init__(self, path: PurePath) -> None:
+        self._path = Path(path)
+        self._lock = Lock()
+        self._version = (*version_info[:2], _FORMAT)
+        self._entries = self._load()
+        self._dirty = False
+
+    def _load(self) -> _Entries:
+        try:
+            version, entries = loads(self._path.read_bytes())
+        except Exception:
+            return {}
+        else:
+            return entries if version == self._version else {}
+
+    def hints(self, tp: Any) -> Mapping[str, Any]:
+        if "<locals>" in tp.__qualname__:
+            return type_hints(tp)
+
+        key = f"{tp.__module__}:{tp.__qualname__}"
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry:
+            deps, fp, blob = entry
+            if _fingerprint(tp, deps=deps) == fp:
+                try:
+                    return cast(Mapping[str, Any], loads(blob))
+                except Exception:
+                    pass
+
+        hints = type_hints(tp)
+        deps = tuple(sorted(_modules(hints)))
+        try:
+            blob = dumps(hints, protocol=HIGHEST_PROTOCOL)
+        except Exception:
+            return hints
+        else:
+            with self._lock:
+                self._entries[key] = (deps, _fingerprint(tp, deps=deps), blob)
+                self._dirty = True
+            return hints
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            data = dumps((self._version, dict(self._entries)), HIGHEST_PROTOCOL)
+            self._dirty = False
+
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with NamedTemporaryFile(dir=self._path.parent, delete=False) as fd:
+            fd.write(data)
+        replace(fd.name, self._path)
@@ -0,0 +1,444 @@
+from __future__ import annotations
+
+from dataclasses import MISSING, Field, dataclass, fields, is_dataclass, replace
+from enum import Enum
+from inspect import isclass
+from itertools import repeat
+from operator import is_
+from typing import (
+    AbstractSet,
+    Any,
+    Callable,
+    Iterable,
+    Literal,
+    Mapping,
+    MutableMapping,
+    MutableSequence,
+    MutableSet,
+    Optional,
+    Sequence,
+    SupportsFloat,
+    Tuple,
+    TypeVar,
+    Union,
+    cast,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+
+from .types import MAPS, PRIMITIVES, SEQS, SETS, Failure
+
+Custom = Callable[[Any, Sequence[Any]], Optional[Callable[[Any], Tuple[bool, Any]]]]
+Check = Callable[[Iterable[Any]], bool]
+Hints = Callable[[Any], Mapping[str, Any]]
+Projection = Mapping[str, Optional["Projection"]]
+
+_FLOATS = frozenset((float, int, bool))
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+@dataclass(frozen=True)
+class Plan:
+    tp: Any
+    path: Sequence[Any]
+
+
+@dataclass(frozen=True)
+class AnyPlan(Plan):
+    ...
+
+
+@dataclass(frozen=True)
+class NonePlan(Plan):
+    ...
+
+
+@dataclass(frozen=True)
+class LiteralPlan(Plan):
+    values: AbstractSet[Any]
+
+
+@dataclass(frozen=True)
+class Tag:
+    key: str
+    variants: Mapping[Any, int]
+    untagged: AbstractSet[int]
+    tagged: AbstractSet[int]
+
+
+@dataclass(frozen=True)
+class UnionPlan(Plan):
+    branches: Sequence[Plan]
+    tag: Optional[Tag]
+
+
+@dataclass(frozen=True)
+class MapPlan(Plan):
+    key: Plan
+    val: Plan
+
+
+@dataclass(frozen=True)
+class SetPlan(Plan):
+    item: Plan
+
+
+@dataclass(frozen=True)
+class SeqPlan(Plan):
+    item: Plan
+
+
+@dataclass(frozen=True)
+class TuplePlan(Plan):
+    items: Sequence[Plan]
+
+
+@dataclass(frozen=True)
+class EnumPlan(Plan):
+    ...
+
+
+@dataclass(frozen=True)
+class FieldPlan:
+    name: str
+    field: Field
+    plan: Plan
+    required: bool
+
+
+@dataclass(frozen=True, eq=False)
+class DataclassPlan(Plan):
+    fields: Sequence[FieldPlan]
+    partial: bool = False
+
+
+@dataclass(frozen=True)
+class FloatPlan(Plan):
+    ...
+
+
+@dataclass(frozen=True)
+class InstancePlan(Plan):
+    ...
+
+
+@dataclass(frozen=True)
+class CustomPlan(Plan):
+    parser: Callable[[Any], Tuple[bool, Any]]
+
+
+def _new_tag(branches: Sequence[Plan]) -> Optional[Tag]:
+    dcs = {
+        idx: {f.name: f for f in b.fields}
+        for idx, b in enumerate(branches)
+        if isinstance(b, DataclassPlan)
+    }
+    if len(dcs) < 2:
+        return None
+    else:
+        first, *_ = dcs.values()
+        for key in first:
+            variants: MutableMapping[Any, int] = {}
+            untagged: MutableSet[int] = set()
+            for idx, fs in dcs.items():
+                f = fs.get(key)
+                if not f or not isinstance(f.plan, LiteralPlan):
+                    break
+                elif any(v in variants for v in f.plan.values):
+                    break
+                else:
+                    variants.update((v, idx) for v in f.plan.values)
+                    if not f.required:
+                        untagged.add(idx)
+            else:
+                return Tag(
+                    key=key,
+                    variants=variants,
+                    untagged=frozenset(untagged),
+                    tagged=frozenset(dcs),
+                )
+        else:
+            return None
+
+
+def type_hints(tp: Any) -> Mapping[str, Any]:
+    return get_type_hints(tp, globalns=None, localns=None)
+
+
+def new_plan(
+    tp: Any, path: Sequence[Any], custom: Custom, hints: Hints = type_hints
+) -> Plan:
+    """
+    Dataclass nodes are memoized by type, forming a graph:
+
+    Repeated dataclasses share one node, recursive ones refer back to it.
+    Their paths are therefore rooted at the dataclass itself,
+    backends prepend the path of each use site as failures unwind.
+    """
+
+    memo: MutableMapping[Any, DataclassPlan] = {}
+    building: MutableSet[int] = set()
+
+    def cont(tp: Any, path: Sequence[Any]) -> Plan:
+        if isclass(tp) and (cp := custom(tp, path)):
+            return CustomPlan(tp=tp, path=(*path, tp), parser=cp)
+
+        origin, args = get_origin(tp), get_args(tp)
+        p = (*path, tp)
+
+        if tp is Any:
+            return AnyPlan(tp=tp, path=p)
+
+        elif tp is None:
+            return NonePlan(tp=tp, path=p)
+
+        elif origin is Literal:
+            return LiteralPlan(tp=tp, path=p, values=frozenset(args))
+
+        elif origin is Union:
+            branches = tuple(cont(a, path=path) for a in args)
+            cyclic = any(id(b) in building for b in branches)
+            tag = None if cyclic else _new_tag(branches)
+            return UnionPlan(tp=tp, path=p, branches=branches, tag=tag)
+
+        elif origin in MAPS:
+            key, val = (cont(a, path=path) for a in args)
+            return MapPlan(tp=tp, path=p, key=key, val=val)
+
+        elif origin in SETS:
+            a, *_ = args
+            return SetPlan(tp=tp, path=p, item=cont(a, path=path))
+
+        elif origin in SEQS:
+            a, *_ = args
+            return SeqPlan(tp=tp, path=p, item=cont(a, path=path))
+
+        elif origin is tuple:
+            if len(args) >= 2 and args[-1] is Ellipsis:
+                return SeqPlan(tp=tp, path=p, item=cont(args[-2], path=path))
+            else:
+                items = tuple(cont(a, path=path) for a in args)
+                return TuplePlan(tp=tp, path=p, items=items)
+
+        elif origin and args:
+            raise ValueError(f"Unexpected type -- {tp}")
+
+        elif isclass(tp) and issubclass(tp, Enum):
+            return EnumPlan(tp=tp, path=p)
+
+        elif is_dataclass(tp):
+            if plan := memo.get(tp):
+                return plan
+
+            annotations, rp = hints(tp), (tp,)
+            cls_fields: MutableSequence[FieldPlan] = []
+            plan = memo[tp] = DataclassPlan(tp=tp, path=rp, fields=cls_fields)
+            building.add(id(plan))
+            for field in fields(tp):
+                if field.init:
+                    fp = cont(annotations[field.name], path=(*rp, field))
+                    req = field.default is MISSING and field.default_factory is MISSING
+                    cls_fields.append(
+                        FieldPlan(name=field.name, field=field, plan=fp, required=req)
+                    )
+            building.discard(id(plan))
+            return plan
+
+        elif tp is float:
+            return FloatPlan(tp=tp, path=p)
+
+        else:
+            try:
+                isinstance(None, tp)
+            except TypeError:
+                # Typed Dict
+                return AnyPlan(tp=tp, path=p)
+            else:
+                return InstancePlan(tp=tp, path=p)
+
+    return cont(tp, path=path)
+
+
+def tie(memo: MutableMapping[int, Any], plan: Plan, build: Callable[[], _F]) -> _F:
+    """
+    Build each dataclass node once, back references get a forwarding stub
+    """
+
+    if not isinstance(plan, DataclassPlan):
+        return build()
+    elif (built := memo.get(id(plan))) is not None:
+        return cast(_F, built)
+    else:
+        cell: MutableSequence[_F] = []
+
+        def fwd(*args: Any) -> Any:
+            return cell[0](*args)
+
+        memo[id(plan)] = fwd
+        built = memo[id(plan)] = build()
+        cell.append(built)
+        return built
+
+
+def new_check(plan: Plan) -> Optional[Check]:
+    if isinstance(plan, AnyPlan):
+        return lambda xs: True
+    elif isinstance(plan, NonePlan):
+        return lambda xs: all(map(is_, xs, repeat(None)))
+    elif isinstance(plan, LiteralPlan):
+        a = plan.values
+        return lambda xs: all(type(x) in PRIMITIVES and x in a for x in xs)
+    elif isinstance(plan, FloatPlan):
+        return lambda xs: _FLOATS.issuperset(map(type, xs)) or all(
+            map(isinstance, xs, repeat(SupportsFloat))
+        )
+    elif isinstance(plan, InstancePlan):
+        tp = plan.tp
+        return lambda xs: all(map(isinstance, xs, repeat(tp)))
+    else:
+        return None
+
+
+def new_projection(paths: Iterable[str]) -> Projection:
+    root: MutableMapping[str, Any] = {}
+    for path in paths:
+        *parents, leaf = path.split(".")
+        node: Optional[MutableMapping[str, Any]] = root
+        for name in parents:
+            if node is None:
+                break
+            elif name not in node:
+                node[name] = {}
+            node = node[name]
+        if node is not None:
+            node[leaf] = None
+    return root
+
+
+def _project(plan: Plan, projection: Projection) -> Optional[Plan]:
+    if isinstance(plan, DataclassPlan):
+        fs = {f.name: f for f in plan.fields}
+        if unknown := projection.keys() - fs.keys():
+            raise ValueError(f"Unexpected fields -- {plan.tp} :: {unknown}")
+
+        cls_fields: MutableSequence[FieldPlan] = []
+        for f in plan.fields:
+            if f.name in projection:
+                if (sub := projection[f.name]) is None:
+                    cls_fields.append(f)
+                elif fp := _project(f.plan, projection=sub):
+                    cls_fields.append(replace(f, plan=fp))
+                else:
+                    raise ValueError(f"Unexpected projection -- {f.plan.tp} :: {sub}")
+
+        partial = plan.partial or len(cls_fields) != len(fs)
+        return replace(plan, fields=cls_fields, partial=partial)
+
+    elif isinstance(plan, UnionPlan):
+        tagged = {**projection, plan.tag.key: None} if plan.tag else projection
+        ps = tuple(
+            _project(
+                b, projection=tagged if isinstance(b, DataclassPlan) else projection
+            )
+            for b in plan.branches
+        )
+        if not any(ps):
+            return None
+        else:
+            branches = tuple(p or b for p, b in zip(ps, plan.branches))
+            return replace(plan, branches=branches, tag=_new_tag(branches))
+
+    elif isinstance(plan, MapPlan):
+        val = _project(plan.val, projection=projection)
+        return replace(plan, val=val) if val else None
+
+    elif isinstance(plan, (SetPlan, SeqPlan)):
+        item = _project(plan.item, projection=projection)
+        return replace(plan, item=item) if item else None
+
+    elif isinstance(plan, TuplePlan):
+        ps = tuple(_project(i, projection=projection) for i in plan.items)
+        if not any(ps):
+            return None
+        else:
+            items = tuple(p or i for p, i in zip(ps, plan.items))
+            return replace(plan, items=items)
+
+    else:
+        return None
+
+
+def project_plan(plan: Plan, projection: Projection) -> Plan:
+    if p := _project(plan, projection=projection):
+        return p
+    else:
+        raise ValueError(f"Unexpected projection -- {plan.tp} :: {projection}")
+
+
+def intern_plan(
+    plan: Plan,
+    intern: Callable[[str], str],
+    projection: Optional[Projection],
+    memo: Optional[MutableMapping[int, DataclassPlan]] = None,
+) -> Plan:
+    memo = {} if memo is None else memo
+
+    if isinstance(plan, DataclassPlan):
+        names = {f.name for f in plan.fields}
+        if projection is not None and (unknown := projection.keys() - names):
+            raise ValueError(f"Unexpected fields -- {plan.tp} :: {unknown}")
+        elif projection is None and (interned := memo.get(id(plan))):
+            return interned
+
+        cls_fields: MutableSequence[FieldPlan] = []
+        new = replace(plan, fields=cls_fields)
+        if projection is None:
+            memo[id(plan)] = new
+
+        for f in plan.fields:
+            if projection is None or f.name in projection:
+                sub = None if projection is None else projection[f.name]
+                fp = intern_plan(f.plan, intern=intern, projection=sub, memo=memo)
+                cls_fields.append(replace(f, plan=fp))
+            else:
+                cls_fields.append(f)
+        return new
+
+    elif isinstance(plan, UnionPlan):
+        branches = tuple(
+            intern_plan(b, intern=intern, projection=projection, memo=memo)
+            for b in plan.branches
+        )
+        return replace(plan, branches=branches)
+
+    elif isinstance(plan, MapPlan):
+        key = intern_plan(plan.key, intern=intern, projection=projection, memo=memo)
+        val = intern_plan(plan.val, intern=intern, projection=projection, memo=memo)
+        return replace(plan, key=key, val=val)
+
+    elif isinstance(plan, (SetPlan, SeqPlan)):
+        item = intern_plan(plan.item, intern=intern, projection=projection, memo=memo)
+        return replace(plan, item=item)
+
+    elif isinstance(plan, TuplePlan):
+        items = tuple(
+            intern_plan(i, intern=intern, projection=projection, memo=memo)
+            for i in plan.items
+        )
+        return replace(plan, items=items)
+
+    elif projection is None and isinstance(plan, InstancePlan) and plan.tp is str:
+        path = plan.path
+
+        def p(x: Any) -> Tuple[bool, Any]:
+            if isinstance(x, str):
+                return True, intern(x)
+            else:
+                return False, Failure(path=path, actual=x)
+
+        return CustomPlan(tp=plan.tp, path=path, parser=p)
+
+    else:
+        return plan
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from dataclasses import Field
+from inspect import isclass
+from os import linesep
+from threading import Lock
+from time import perf_counter_ns
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Literal,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    get_args,
+    get_origin,
+)
+
+from .plan import Plan
+
+_Step = Tuple[bool, Any]
+_Parser = Callable[[Any], _Step]
+_Path = Tuple[Any, ...]
+
+
+class NodeStats:
+    __slots__ = ("calls", "failures", "ns")
+
+    def __init__(self) -> None:
+        self.calls = self.failures = self.ns = 0
+
+    def __repr__(self) -> str:
+        return f"NodeStats(calls={self.calls}, failures={self.failures}, ns={self.ns})"
+
+
+def _name(thing: Any) -> str:
+    if isinstance(thing, Field):
+        return thing.name
+    elif isclass(thing):
+        return thing.__name__
+    elif origin := get_origin(thing):
+        name = getattr(origin, "__name__", None) or getattr(origin, "_name", origin)
+        return f"{name}[{', '.join(map(_name, get_args(thing)))}]"
+    else:
+        return repr(thing)
+
+
+class Profiler:
+    """
+    Per plan node counters, keyed by the same `path` errors report
+
+    Nodes sharing a path share a counter, times are inclusive of child nodes.
+    Shared dataclass nodes are counted per use site, recursive ones per cycle.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._stats: Dict[_Path, NodeStats] = {}
+
+    def wrap(self, plan: Plan, parser: _Parser, base: Sequence[Any] = ()) -> _Parser:
+        key = (*base, *plan.path)
+        with self._lock:
+            stats = self._stats.setdefault(key, NodeStats())
+
+        def p(x: Any) -> _Step:
+            t0 = perf_counter_ns()
+            ok, y = parser(x)
+            stats.ns += perf_counter_ns() - t0
+            stats.calls += 1
+            if not ok:
+                stats.failures += 1
+            return ok, y
+
+        return p
+
+    def stats(self) -> Mapping[_Path, NodeStats]:
+        with self._lock:
+            return dict(self._stats)
+
+    def reset(self) -> None:
+        with self._lock:
+            for stats in self._stats.values():
+                stats.calls = stats.failures = stats.ns = 0
+
+    def report(
+        self,
+        sort_by: Literal["ns", "calls", "failures"] = "ns",
+        limit: Optional[int] = None,
+    ) -> str:
+        rows = sorted(
+            self.stats().items(),
+            key=lambda kv: getattr(kv[1], sort_by),
+            reverse=True,
+        )[:limit]
+
+        def cont(path: Sequence[Any], stats: NodeStats) -> str:
+            avg = stats.ns // stats.calls if stats.calls else 0
+            name = " -> ".join(map(_name, path))
+            return f"{stats.ns:>14} {stats.calls:>10} {stats.failures:>10} {avg:>10}  {name}"
+
+        header = f"{'ns':>14} {'calls':>10} {'failures':>10} {'ns/call':>10}  path"
+        return linesep.join((header, *(cont(path, stats) for path, stats in rows)))
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from itertools import chain
+from typing import Any, Dict, Hashable, Iterable, List, Sequence, Tuple, TypeVar
+
+_C = TypeVar("_C")
+
+
+class Registry(Sequence[_C]):
+    """
+    Coders indexed by the class they handle, resolved through the `__mro__`
+
+    `fallback` coders are consulted after the indexed ones, in order
+    """
+
+    def __init__(
+        self, indexed: Iterable[Tuple[type, _C]] = (), fallback: Iterable[_C] = ()
+    ) -> None:
+        index: Dict[type, List[_C]] = {}
+        for t, coder in indexed:
+            index.setdefault(t, []).append(coder)
+
+        self._index = {t: tuple(coders) for t, coders in index.items()}
+        self._fallback = tuple(fallback)
+        self._coders = (*chain.from_iterable(self._index.values()), *self._fallback)
+        self._resolved: Dict[Any, Tuple[_C, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._coders)
+
+    def __getitem__(self, idx: Any) -> Any:
+        return self._coders[idx]
+
+    def items(self) -> Sequence[Tuple[type, Sequence[_C]]]:
+        return tuple(self._index.items())
+
+    @property
+    def fallback(self) -> Sequence[_C]:
+        return self._fallback
+
+    def resolve(self, tp: Any) -> Sequence[_C]:
+        try:
+            return self._resolved[tp]
+        except KeyError:
+            pass
+        except TypeError:
+            return self._resolve(tp)
+
+        coders = self._resolved[tp] = self._resolve(tp)
+        return coders
+
+    def _resolve(self, tp: Any) -> Tuple[_C, ...]:
+        mro = getattr(tp, "__mro__", ())
+        indexed = chain.from_iterable(self._index.get(t, ()) for t in mro)
+        return (*indexed, *self._fallback)
+
+
+def coders_key(coders: Sequence[Any]) -> Hashable:
+    """
+    Cache key for a coder sequence, registries also key on what they index
+    """
+
+    if isinstance(coders, Registry):
+        return Registry, coders.items(), coders.fallback
+    else:
+        return tuple(coders)
@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import re
+from codecs import getincrementaldecoder, getincrementalencoder
+from functools import partial
+from io import IOBase
+from json import JSONDecodeError, JSONDecoder, loads
+from os import linesep
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    BinaryIO,
+    Iterable,
+    Iterator,
+    Literal,
+    MutableSequence,
+    Protocol,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from .decoder import new_decoder
+from .types import DecodeError
+
+_T = TypeVar("_T")
+
+Chunks = Union[bytes, bytearray, memoryview, BinaryIO, Iterable[bytes]]
+
+_CHUNK_SIZE = 2**16
+_NON_WS = re.compile(r"[^ \t\r\n]")
+# longest token a chunk boundary can cut short and still scan, e.g. `-Infinity`
+_TAIL = 16
+
+
+class StreamDecodeError(DecodeError):
+    """
+    `line` is 1-based, `offset` counts bytes from the start of the stream
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        line: int,
+        offset: int,
+        path: Sequence[Any],
+        actual: Any,
+        missing_keys: Any = (),
+        extra_keys: Any = (),
+    ) -> None:
+        super().__init__(
+            *args,
+            path=path,
+            actual=actual,
+            missing_keys=missing_keys,
+            extra_keys=extra_keys,
+        )
+        self.line, self.offset = line, offset
+
+    def __str__(self) -> str:
+        l0 = f"Line: {self.line}, Offset: {self.offset}"
+        return linesep.join((super().__str__(), "", l0))
+
+
+def _relocate(e: Exception, actual: Any, line: int, offset: int) -> StreamDecodeError:
+    if isinstance(e, DecodeError):
+        return StreamDecodeError(
+            *e.args,
+            line=line,
+            offset=offset,
+            path=e.path,
+            actual=e.actual,
+            missing_keys=e.missing_keys,
+            extra_keys=e.extra_keys,
+        )
+    else:
+        return StreamDecodeError(e, line=line, offset=offset, path=(), actual=actual)
+
+
+def _chunks(stream: Chunks, chunk_size: int) -> Iterator[bytes]:
+    if isinstance(stream, (bytes, bytearray, memoryview)):
+        mv = memoryview(stream).cast("B")
+        for idx in range(0, len(mv), chunk_size):
+            yield bytes(mv[idx : idx + chunk_size])
+    elif isinstance(stream, IOBase):
+        yield from iter(partial(stream.read, chunk_size), b"")
+    else:
+        yield from stream
+
+
+class _Framer(Protocol):
+    overhead: int
+
+    def feed(self, chunk: bytes) -> Iterator[bytes]:
+        ...
+
+    def close(self) -> Iterator[bytes]:
+        ...
+
+
+class _Lines:
+    overhead = 1
+
+    def __init__(self) -> None:
+        self._pending: MutableSequence[bytes] = []
+
+    def feed(self, chunk: bytes) -> Iterator[bytes]:
+        *lines, rest = chunk.split(b"\n")
+        if lines:
+            head, *body = lines
+            self._pending.append(head)
+            yield b"".join(self._pending)
+            self._pending.clear()
+            yield from body
+        if rest:
+            self._pending.append(rest)
+
+    def close(self) -> Iterator[bytes]:
+        if self._pending:
+            yield b"".join(self._pending)
+            self._pending.clear()
+
+
+class _Prefixed:
+    def __init__(self, width: int, byteorder: Literal["little", "big"]) -> None:
+        self.overhead, self._byteorder = width, byteorder
+        self._buf = bytearray()
+
+    def feed(self, chunk: bytes) -> Iterator[bytes]:
+        buf, width = self._buf, self.overhead
+        buf += chunk
+        while len(buf) >= width:
+            size = int.from_bytes(buf[:width], byteorder=self._byteorder)
+            if len(buf) < width + size:
+                break
+            else:
+                frame = bytes(buf[width : width + size])
+                del buf[: width + size]
+                yield frame
+
+    def close(self) -> Iterator[bytes]:
+        if self._buf:
+            raise EOFError(bytes(self._buf))
+        else:
+            return iter(())
+
+
+def _decode_frame(decoder: new_decoder[_T], frame: bytes, line: int, offset: int) -> _T:
+    try:
+        return decoder(loads(frame))
+    except (JSONDecodeError, DecodeError) as e:
+        raise _relocate(e, actual=frame, line=line, offset=offset) from e
+
+
+def _frames(framer: _Framer, chunks: Iterable[bytes]) -> Iterator[bytes]:
+    for chunk in chunks:
+        yield from framer.feed(chunk)
+    yield from framer.close()
+
+
+async def _aframes(
+    framer: _Framer, chunks: AsyncIterable[bytes]
+) -> AsyncIterator[bytes]:
+    async for chunk in chunks:
+        for frame in framer.feed(chunk):
+            yield frame
+    for frame in framer.close():
+        yield frame
+
+
+def _decode(
+    decoder: new_decoder[_T], framer: _Framer, chunks: Iterable[bytes]
+) -> Iterator[_T]:
+    line, offset = 1, 0
+    try:
+        for frame in _frames(framer, chunks=chunks):
+            if frame.strip():
+                yield _decode_frame(decoder, frame=frame, line=line, offset=offset)
+            line, offset = line + 1, offset + len(frame) + framer.overhead
+    except EOFError as e:
+        raise _relocate(e, actual=None, line=line, offset=offset) from e
+
+
+async def _adecode(
+    decoder: new_decoder[_T], framer: _Framer, chunks: AsyncIterable[bytes]
+) -> AsyncIterator[_T]:
+    line, offset = 1, 0
+    try:
+        async for frame in _aframes(framer, chunks=chunks):
+            if frame.strip():
+                yield _decode_frame(decoder, frame=frame, line=line, offset=offset)
+            line, offset = line + 1, offset + len(frame) + framer.overhead
+    except EOFError as e:
+        raise _relocate(e, actual=None, line=line, offset=offset) from e
+
+
+def decode_ndjson(
+    decoder: new_decoder[_T], stream: Chunks, chunk_size: int = _CHUNK_SIZE
+) -> Iterator[_T]:
+    chunks = _chunks(stream, chunk_size=chunk_size)
+    return _decode(decoder, framer=_Lines(), chunks=chunks)
+
+
+def decode_prefixed(
+    decoder: new_decoder[_T],
+    stream: Chunks,
+    width: int = 4,
+    byteorder: Literal["little", "big"] = "big",
+    chunk_size: int = _CHUNK_SIZE,
+) -> Iterator[_T]:
+    chunks = _chunks(stream, chunk_size=chunk_size)
+    framer = _Prefixed(width, byteorder=byteorder)
+    return _decode(decoder, framer=framer, chunks=chunks)
+
+
+def adecode_ndjson(
+    decoder: new_decoder[_T], stream: AsyncIterable[bytes]
+) -> AsyncIterator[_T]:
+    return _adecode(decoder, framer=_Lines(), chunks=stream)
+
+
+def adecode_prefixed(
+    decoder: new_decoder[_T],
+    stream: AsyncIterable[bytes],
+    width: int = 4,
+    byteorder: Literal["little", "big"] = "big",
+) -> AsyncIterator[_T]:
+    framer = _Prefixed(width, byteorder=byteorder)
+    return _adecode(decoder, framer=framer, chunks=stream)
+
+
+def decode_json_array(
+    decoder: new_decoder[_T],
+    stream: Chunks,
+    chunk_size: int = _CHUNK_SIZE,
+    encoding: str = "utf-8",
+) -> Iterator[_T]:
+    chunks = _chunks(stream, chunk_size=chunk_size)
+    text = getincrementaldecoder(encoding)()
+    # offsets are reported in bytes, the same as the framed readers
+    size = getincrementalencoder(encoding)().encode
+    scan = JSONDecoder().raw_decode
+    buf, pos, eof = "", 0, False
+    dropped, dropped_lines = 0, 0
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof, dropped, dropped_lines
+        if eof:
+            return False
+        else:
+            if pos:
+                dropped_lines += buf.count("\n", 0, pos)
+                dropped += len(size(buf[:pos]))
+                buf, pos = buf[pos:], 0
+
+            chunk = next(chunks, None)
+            if chunk is None:
+                eof = True
+                buf += text.decode(b"", final=True)
+            else:
+                buf += text.decode(chunk)
+            return True
+
+    def location() -> Tuple[int, int]:
+        line = dropped_lines + buf.count("\n", 0, pos) + 1
+        return line, dropped + len(size(buf[:pos]))
+
+    def skip() -> str:
+        nonlocal pos
+        while True:
+            if m := _NON_WS.search(buf, pos):
+                pos = m.start()
+                return buf[pos]
+            else:
+                pos = len(buf)
+                if not fill():
+                    return ""
+
+    def expect(chars: str) -> str:
+        c = skip()
+        if c and c in chars:
+            return c
+        else:
+            line, offset = location()
+            msg = f"Expected one of {chars!r}, got {c or 'EOF'!r}"
+            err = JSONDecodeError(msg, doc=buf, pos=pos)
+            raise _relocate(err, actual=c, line=line, offset=offset)
+
+    def close() -> None:
+        nonlocal pos
+        pos += 1
+        if c := skip():
+            line, offset = location()
+            err = JSONDecodeError("Extra data", doc=buf, pos=pos)
+            raise _relocate(err, actual=c, line=line, offset=offset)
+
+    expect("[")
+    pos += 1
+    if skip() == "]":
+        close()
+        return
+
+    while True:
+        skip()
+        while True:
+            try:
+                thing, end = scan(buf, pos)
+            except JSONDecodeError as e:
+                # an error before the tail of the buffer is not cured by reading on
+                truncated = e.pos >= len(buf) - _TAIL or e.msg.startswith(
+                    "Unterminated string"
+                )
+                want, grown = max(2 * (len(buf) - pos), 1), False
+                while truncated and len(buf) - pos < want and fill():
+                    grown = True
+                if not grown:
+                    line, offset = location()
+                    raise _relocate(e, actual=None, line=line, offset=offset)
+            else:
+                if end < len(buf) - _TAIL or not fill():
+                    break
+
+        try:
+            yield decoder(thing)
+        except DecodeError as e:
+            line, offset = location()
+            raise _relocate(e, actual=thing, line=line, offset=offset) from e
+
+        pos = end
+        if expect(",]") == "]":
+            close()
+            break
+        else:
+            pos += 1
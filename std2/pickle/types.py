@@ -12,7 +12,7 @@ from enum import Enum
 from inspect import isclass
 from locale import strxfrm
 from os import linesep
-from pprint import pformat
+from reprlib import Repr
 from typing import (
     AbstractSet,
     Any,
@@ -31,6 +31,8 @@ from typing import (
     Sequence,
     Set,
     Tuple,
+    Type,
+    TypeVar,
     Union,
 )
 
@@ -45,6 +47,12 @@ SEQS = {Iterable, Sequence, ABC_Sequence} | _SEQS_M
 
 PRIMITIVES = {bool, int, float, bytes, bytearray, str, type(None)}
 
+_REPR = Repr()
+_REPR.maxlevel = 4
+_REPR.maxstring = _REPR.maxother = 160
+_REPR.maxdict = _REPR.maxlist = _REPR.maxtuple = _REPR.maxset = 16
+_REPR.maxfrozenset = _REPR.maxdeque = _REPR.maxarray = 16
+
 
 def _pprn(thingy: Any) -> str:
     if is_dataclass(thingy):
@@ -79,7 +87,7 @@ class _BaseError(Exception):
         missing = ", ".join(sorted(self.missing_keys, key=strxfrm))
         extra = ", ".join(sorted(self.extra_keys, key=strxfrm))
         args = ", ".join(map(str, self.args))
-        actual = pformat(self.actual, indent=2)
+        actual = _REPR.repr(self.actual)
 
         l0 = linesep
         l1 = f"Path:{linesep}{path}"
@@ -98,7 +106,52 @@ class DecodeError(_BaseError):
     ...
 
 
-EStep = Tuple[Literal[False, True], Union[EncodeError, Any]]
+_E = TypeVar("_E", bound=_BaseError)
+
+
+class Failure:
+    __slots__ = ("args", "path", "actual", "missing_keys", "extra_keys")
+
+    def __init__(
+        self,
+        *args: Any,
+        path: Sequence[Any],
+        actual: Any,
+        missing_keys: Collection[str] = (),
+        extra_keys: Collection[str] = (),
+    ) -> None:
+        self.args, self.path, self.actual = args, path, actual
+        self.missing_keys, self.extra_keys = missing_keys, extra_keys
+
+    def error(self, tp: Type[_E]) -> _E:
+        return tp(
+            *self.args,
+            path=self.path,
+            actual=self.actual,
+            missing_keys=self.missing_keys,
+            extra_keys=self.extra_keys,
+        )
+
+
+def to_error(tp: Type[_E], thing: Union[_E, Failure]) -> _E:
+    return thing.error(tp) if isinstance(thing, Failure) else thing
+
+
+_T = TypeVar("_T")
+
+
+def rebase(prefix: Sequence[Any], thing: _T) -> _T:
+    """
+    Shared dataclass nodes report paths rooted at themselves,
+    each use site prepends its own as the failure unwinds
+    """
+
+    if isinstance(thing, (Failure, _BaseError)):
+        thing.path = (*prefix, *thing.path)
+    return thing
+
+
+EStep = Tuple[Literal[False, True], Union[EncodeError, Failure, Any]]
 EParser = Callable[[Any], EStep]
 
 
@@ -109,7 +162,7 @@ class Encoder(Protocol):
         ...
 
 
-DStep = Tuple[Literal[False, True], Union[DecodeError, Any]]
+DStep = Tuple[Literal[False, True], Union[DecodeError, Failure, Any]]
 DParser = Callable[[Any], DStep]
 
 
@@ -0,0 +1,208 @@
+from typing import (
+    Any,
+    Callable,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Sequence,
+    SupportsFloat,
+    Union,
+)
+
+from ..types import is_iterable_not_str
+from .dispatch import new_dispatch
+from .plan import (
+    AnyPlan,
+    CustomPlan,
+    DataclassPlan,
+    EnumPlan,
+    FloatPlan,
+    InstancePlan,
+    LiteralPlan,
+    MapPlan,
+    NonePlan,
+    Plan,
+    SeqPlan,
+    SetPlan,
+    TuplePlan,
+    UnionPlan,
+    new_check,
+    tie,
+)
+from .types import PRIMITIVES, DecodeError, Failure, rebase
+
+Validator = Callable[[Any], Optional[Union[Failure, DecodeError]]]
+
+
+def new_validator(
+    plan: Plan, strict: bool, memo: Optional[MutableMapping[int, Any]] = None
+) -> Validator:
+    memo = {} if memo is None else memo
+    return tie(memo, plan=plan, build=lambda: _new_node(plan, strict=strict, memo=memo))
+
+
+def _rooted(v: Validator, at: Sequence[Any]) -> Validator:
+    def u(x: Any) -> Optional[Union[Failure, DecodeError]]:
+        err = v(x)
+        return err and rebase(at, err)
+
+    return u
+
+
+def _new_node(plan: Plan, strict: bool, memo: MutableMapping[int, Any]) -> Validator:
+    tp, path = plan.tp, plan.path
+
+    def sub(
+        plan: Plan, at: Sequence[Any] = path[:-1], unwind: bool = True
+    ) -> Validator:
+        v = new_validator(plan, strict=strict, memo=memo)
+        return (
+            _rooted(v, at=at)
+            if isinstance(plan, DataclassPlan) and at and unwind
+            else v
+        )
+
+    if isinstance(plan, CustomPlan):
+        parser = plan.parser
+
+        def v(x: Any) -> Optional[Union[Failure, DecodeError]]:
+            succ, y = parser(x)
+            return None if succ else y
+
+        return v
+
+    elif isinstance(plan, AnyPlan):
+        return lambda x: None
+
+    elif isinstance(plan, NonePlan):
+        return lambda x: None if x is None else Failure(path=path, actual=x)
+
+    elif isinstance(plan, LiteralPlan):
+        a = plan.values
+
+        def v(x: Any) -> Optional[Union[Failure, DecodeError]]:
+            if type(x) in PRIMITIVES and x in a:
+                return None
+            else:
+                return Failure(path=path, actual=x)
+
+        return v
+
+    elif isinstance(plan, UnionPlan):
+        # failed branches are discarded, no need to unwind them
+        vs = tuple(sub(b, unwind=False) for b in plan.branches)
+        dispatch = new_dispatch(plan)
+
+        def v(x: Any) -> Optional[Union[Failure, DecodeError]]:
+            for idx in dispatch(x) if dispatch else range(len(vs)):
+                if not vs[idx](x):
+                    return None
+            else:
+                return Failure(path=path, actual=x)
+
+        return v
+
+    elif isinstance(plan, MapPlan):
+        lv = sub(plan.key)
+        rv = sub(plan.val)
+        lc, rc = new_check(plan.key), new_check(plan.val)
+
+        def v(x: Any) -> Optional[Union[Failure, DecodeError]]:
+            if not isinstance(x, Mapping):
+                return Failure(path=path, actual=x)
+            elif lc and rc and lc(x.keys()) and rc(x.values()):
+                return None
+            else:
+                for k, y in x.items():
+                    if err := lv(k) or rv(y):
+                        return err
+                else:
+                    return None
+
+        return v
+
+    elif isinstance(plan, (SetPlan, SeqPlan)):
+        iv = sub(plan.item)
+        check = new_check(plan.item)
+
+        def v(x: Any) -> Optional[Union[Failure, DecodeError]]:
+            if not is_iterable_not_str(x):
+                return Failure(path=path, actual=x)
+            elif check and isinstance(x, (list, tuple)) and check(x):
+                return None
+            else:
+                for y in x:
+                    if err := iv(y):
+                        return err
+                else:
+                    return None
+
+        return v
+
+    elif isinstance(plan, TuplePlan):
+        vs = tuple(map(sub, plan.items))
+
+        def v(x: Any) -> Optional[Union[Failure, DecodeError]]:
+            if not is_iterable_not_str(x):
+                return Failure(path=path, actual=x)
+            else:
+                for iv, y in zip(vs, x):
+                    if err := iv(y):
+                        return err
+                else:
+                    return None
+
+        return v
+
+    elif isinstance(plan, EnumPlan):
+        members = tp.__members__
+
+        def v(x: Any) -> Optional[Union[Failure, DecodeError]]:
+            return None if members.get(x) else Failure(path=path, actual=x)
+
+        return v
+
+    elif isinstance(plan, DataclassPlan):
+        cls_fields = tuple(
+            (f.name, f.required, sub(f.plan, at=(*path, f.field))) for f in plan.fields
+        )
+        rq_fields = {f.name for f in plan.fields if f.required}
+        n_rq = len(rq_fields)
+
+        def v(x: Any) -> Optional[Union[Failure, DecodeError]]:
+            if not isinstance(x, Mapping):
+                return Failure(path=path, actual=x)
+            else:
+                seen, seen_rq = 0, 0
+                for k, req, fv in cls_fields:
+                    if k in x:
+                        if err := fv(x[k]):
+                            return err
+                        seen, seen_rq = seen + 1, seen_rq + req
+
+                if seen_rq != n_rq:
+                    mk = rq_fields - x.keys()
+                    return Failure(path=path, actual=x, missing_keys=mk)
+                elif strict and seen != len(x):
+                    ek = x.keys() - {k for k, _, _ in cls_fields}
+                    return Failure(path=path, actual=x, extra_keys=ek)
+                else:
+                    return None
+
+        return v
+
+    elif isinstance(plan, FloatPlan):
+
+        def v(x: Any) -> Optional[Union[Failure, DecodeError]]:
+            if isinstance(x, SupportsFloat):
+                return None
+            else:
+                return Failure(path=path, actual=x)
+
+        return v
+
+    elif isinstance(plan, InstancePlan):
+        return lambda x: None if isinstance(x, tp) else Failure(path=path, actual=x)
+
+    else:
+        raise ValueError(f"Unexpected plan -- {plan}")
@@ -0,0 +1,666 @@
+from __future__ import annotations
+
+from dataclasses import is_dataclass
+from enum import Enum
+from io import TextIOBase
+from itertools import islice
+from json import JSONEncoder
+from json.encoder import encode_basestring, encode_basestring_ascii
+from math import isfinite
+from typing import (
+    AbstractSet,
+    Any,
+    BinaryIO,
+    Callable,
+    Generator,
+    Generic,
+    Iterable,
+    Iterator,
+    Mapping,
+    MutableMapping,
+    MutableSequence,
+    Optional,
+    Sequence,
+    SupportsFloat,
+    TextIO,
+    Tuple,
+    TypeVar,
+    Union,
+    cast,
+)
+
+from ..types import is_iterable_not_str
+from .cache import LRU, type_key
+from .coders import DEFAULT_ENCODERS
+from .encoder import _new_plan
+from .plan import (
+    AnyPlan,
+    CustomPlan,
+    DataclassPlan,
+    EnumPlan,
+    FloatPlan,
+    InstancePlan,
+    LiteralPlan,
+    MapPlan,
+    NonePlan,
+    Plan,
+    SeqPlan,
+    SetPlan,
+    TuplePlan,
+    UnionPlan,
+    new_check,
+    tie,
+)
+from .registry import coders_key
+from .types import PRIMITIVES, EncodeError, Encoder, Failure, rebase, to_error
+
+_T = TypeVar("_T")
+
+_CHUNK_SIZE = 2**16
+_BATCH = 2**10
+# element count between flushes, when elements are written whole
+_EVERY = 2**6
+_SEQUENCES = frozenset((list, tuple))
+_ITERABLES = frozenset((list, tuple, set, frozenset))
+_SIZED = frozenset((list, tuple, set, frozenset, dict))
+_ABSENT = object()
+
+_Err = Union[Failure, EncodeError]
+_Parts = MutableSequence[str]
+_Writer = Callable[[Any, _Parts], Optional[_Err]]
+_Stream = Generator[None, None, Optional[_Err]]
+_Streamer = Callable[[Any, _Parts], _Stream]
+_Sink = Union[TextIO, BinaryIO, bytearray]
+
+_CACHE = LRU[Tuple[_Writer, Optional[_Streamer]]](maxsize=1024)
+
+
+def _new_dump(ensure_ascii: bool) -> Callable[[Any], str]:
+    return JSONEncoder(ensure_ascii=ensure_ascii, separators=(",", ":")).encode
+
+
+def _new_scalar(ensure_ascii: bool) -> Callable[[Any], str]:
+    escape = encode_basestring_ascii if ensure_ascii else encode_basestring
+    dump = _new_dump(ensure_ascii)
+
+    def scalar(x: Any) -> str:
+        t = type(x)
+        if t is str:
+            return escape(x)
+        elif t is int:
+            return int.__repr__(x)
+        elif t is float and isfinite(x):
+            return float.__repr__(x)
+        elif x is None:
+            return "null"
+        elif x is True:
+            return "true"
+        elif x is False:
+            return "false"
+        else:
+            return dump(x)
+
+    return scalar
+
+
+def _key(text: str) -> str:
+    if text.startswith('"'):
+        return text
+    elif text.startswith(("[", "{")):
+        raise TypeError(f"keys must be str, int, float, bool or None -- {text}")
+    else:
+        return f'"{text}"'
+
+
+def _from_plan(
+    plan: Plan, ensure_ascii: bool, memo: Optional[MutableMapping[int, Any]] = None
+) -> _Writer:
+    memo = {} if memo is None else memo
+
+    def build() -> _Writer:
+        return _new_node(plan, ensure_ascii=ensure_ascii, memo=memo)
+
+    return tie(memo, plan=plan, build=build)
+
+
+def _rooted(w: _Writer, at: Sequence[Any]) -> _Writer:
+    def v(x: Any, parts: _Parts) -> Optional[_Err]:
+        err = w(x, parts)
+        return err and rebase(at, err)
+
+    return v
+
+
+def _new_node(
+    plan: Plan, ensure_ascii: bool, memo: MutableMapping[int, Any]
+) -> _Writer:
+    tp, path = plan.tp, plan.path
+    scalar, dump = _new_scalar(ensure_ascii), _new_dump(ensure_ascii)
+    escape = encode_basestring_ascii if ensure_ascii else encode_basestring
+
+    def sub(plan: Plan, at: Sequence[Any] = path[:-1], unwind: bool = True) -> _Writer:
+        w = _from_plan(plan, ensure_ascii=ensure_ascii, memo=memo)
+        return (
+            _rooted(w, at=at)
+            if isinstance(plan, DataclassPlan) and at and unwind
+            else w
+        )
+
+    if isinstance(plan, CustomPlan):
+        parser = plan.parser
+
+        def w(x: Any, parts: _Parts) -> Optional[_Err]:
+            ok, y = parser(x)
+            if ok:
+                parts.append(scalar(y))
+                return None
+            else:
+                return cast(_Err, y)
+
+        return w
+
+    elif isinstance(plan, AnyPlan):
+
+        def w(x: Any, parts: _Parts) -> Optional[_Err]:
+            parts.append(scalar(x))
+            return None
+
+        return w
+
+    elif isinstance(plan, NonePlan):
+
+        def w(x: Any, parts: _Parts) -> Optional[_Err]:
+            if x is None:
+                parts.append("null")
+                return None
+            else:
+                return Failure(path=path, actual=x)
+
+        return w
+
+    elif isinstance(plan, LiteralPlan):
+        a = plan.values
+
+        def w(x: Any, parts: _Parts) -> Optional[_Err]:
+            if type(x) in PRIMITIVES and x in a:
+                parts.append(scalar(x))
+                return None
+            else:
+                return Failure(path=path, actual=x)
+
+        return w
+
+    elif isinstance(plan, UnionPlan):
+        # failed branches are discarded, no need to unwind them
+        ws = tuple(sub(b, unwind=False) for b in plan.branches)
+
+        def w(x: Any, parts: _Parts) -> Optional[_Err]:
+            for bw in ws:
+                acc: _Parts = []
+                if not bw(x, acc):
+                    parts.extend(acc)
+                    return None
+            else:
+                return Failure(path=path, actual=x)
+
+        return w
+
+    elif isinstance(plan, MapPlan):
+        lw, rw = sub(plan.key), sub(plan.val)
+        lc, rc = new_check(plan.key), new_check(plan.val)
+        str_keys = isinstance(plan.key, InstancePlan) and plan.key.tp is str
+
+        def w(x: Any, parts: _Parts) -> Optional[_Err]:
+            if type(x) is not dict and not isinstance(x, Mapping):
+                return Failure(path=path, actual=x)
+            elif type(x) is dict and lc and rc and lc(x.keys()) and rc(x.values()):
+                parts.append(dump(x))
+                return None
+            else:
+                append, sep = parts.append, "{"
+                for n, (k, v) in enumerate(x.items(), 1):
+                    if str_keys and type(k) is str:
+                        key = escape(k)
+                    else:
+                        acc: _Parts = []
+                        if err := lw(k, acc):
+                            return err
+                        key = _key("".join(acc))
+
+                    append(sep)
+                    append(key)
+                    append(":")
+                    if err := rw(v, parts):
+                        return err
+                    sep = ","
+
+                append("{}" if sep == "{" else "}")
+                return None
+
+        return w
+
+    elif isinstance(plan, SetPlan):
+        iw = sub(plan.item)
+
+        def w(x: Any, parts: _Parts) -> Optional[_Err]:
+            if type(x) not in _ITERABLES and not is_iterable_not_str(x):
+                return Failure(path=path, actual=x)
+            else:
+                append, sep = parts.append, "{"
+                for i in x:
+                    acc: _Parts = []
+                    if err := iw(i, acc):
+                        return err
+                    append(sep)
+                    append(_key("".join(acc)))
+                    append(":true")
+                    sep = ","
+
+                append("{}" if sep == "{" else "}")
+                return None
+
+        return w
+
+    elif isinstance(plan, SeqPlan):
+        iw, check = sub(plan.item), new_check(plan.item)
+
+        def w(x: Any, parts: _Parts) -> Optional[_Err]:
+            if type(x) not in _ITERABLES and not is_iterable_not_str(x):
+                return Failure(path=path, actual=x)
+            elif check and type(x) in _SEQUENCES and check(x):
+                parts.append(dump(x))
+                return None
+            else:
+                append, sep = parts.append, "["
+                for i in x:
+                    append(sep)
+                    if err := iw(i, parts):
+                        return err
+                    sep = ","
+
+                append("[]" if sep == "[" else "]")
+                return None
+
+        return w
+
+    elif isinstance(plan, TuplePlan):
+        ws = tuple(map(sub, plan.items))
+
+        def w(x: Any, parts: _Parts) -> Optional[_Err]:
+            if type(x) not in _ITERABLES and not is_iterable_not_str(x):
+                return Failure(path=path, actual=x)
+            else:
+                append, sep = parts.append, "["
+                for iw, i in zip(ws, x):
+                    append(sep)
+                    if err := iw(i, parts):
+                        return err
+                    sep = ","
+
+                append("[]" if sep == "[" else "]")
+                return None
+
+        return w
+
+    elif isinstance(plan, EnumPlan):
+        names = {m: escape(m.name) for m in tp}
+
+        def w(x: Any, parts: _Parts) -> Optional[_Err]:
+            if not isinstance(x, Enum):
+                return Failure(path=path, actual=x)
+            else:
+                parts.append(names.get(x) or escape(x.name))
+                return None
+
+        return w
+
+    elif isinstance(plan, DataclassPlan):
+        cls_fields = tuple(
+            (f.name, f.required, escape(f.name) + ":", sub(f.plan, at=(*path, f.field)))
+            for f in plan.fields
+        )
+
+        def w(x: Any, parts: _Parts) -> Optional[_Err]:
+            if not is_dataclass(x):
+                return Failure(path=path, actual=x)
+            else:
+                append, sep = parts.append, "{"
+                for k, req, key, fw in cls_fields:
+                    if (v := getattr(x, k, _ABSENT)) is not _ABSENT:
+                        append(sep)
+                        append(key)
+                        if err := fw(v, parts):
+                            return err
+                        sep = ","
+                    elif req:
+                        return Failure(path=path, actual=x, missing_keys={k})
+
+                append("{}" if sep == "{" else "}")
+                return None
+
+        return w
+
+    elif isinstance(plan, FloatPlan):
+
+        def w(x: Any, parts: _Parts) -> Optional[_Err]:
+            if isinstance(x, SupportsFloat):
+                parts.append(scalar(x))
+                return None
+            else:
+                return Failure(path=path, actual=x)
+
+        return w
+
+    elif isinstance(plan, InstancePlan):
+        to_text = escape if tp is str else scalar
+
+        def w(x: Any, parts: _Parts) -> Optional[_Err]:
+            if isinstance(x, tp):
+                parts.append(to_text(x))
+                return None
+            else:
+                return Failure(path=path, actual=x)
+
+        return w
+
+    else:
+        raise ValueError(f"Unexpected plan -- {plan}")
+
+
+def _optional(plan: UnionPlan) -> Tuple[Sequence[Plan], bool]:
+    others = tuple(b for b in plan.branches if not isinstance(b, NonePlan))
+    return others, len(others) != len(plan.branches)
+
+
+def _streams(plan: Plan, seen: AbstractSet[int] = frozenset()) -> bool:
+    if isinstance(plan, UnionPlan):
+        others, _ = _optional(plan)
+        return len(others) == 1 and _streams(others[0], seen=seen)
+    elif isinstance(plan, DataclassPlan):
+        seen = {*seen, id(plan)}
+        return any(
+            id(f.plan) not in seen and _streams(f.plan, seen=seen) for f in plan.fields
+        )
+    else:
+        return isinstance(plan, (SeqPlan, TuplePlan, MapPlan))
+
+
+def _stream_from_plan(
+    plan: Plan,
+    ensure_ascii: bool,
+    memo: MutableMapping[int, Any],
+    writers: MutableMapping[int, Any],
+) -> Optional[_Streamer]:
+    """
+    Containers yield after each element, so that the caller can flush `parts`
+
+    Unions other than `Optional[...]` and everything else are written whole
+    """
+
+    if not _streams(plan):
+        return None
+
+    def build() -> _Streamer:
+        return _new_stream(plan, ensure_ascii=ensure_ascii, memo=memo, writers=writers)
+
+    return tie(memo, plan=plan, build=build)
+
+
+def _rooted_stream(s: _Streamer, at: Sequence[Any]) -> _Streamer:
+    def t(x: Any, parts: _Parts) -> _Stream:
+        err = yield from s(x, parts)
+        return err and rebase(at, err)
+
+    return t
+
+
+def _new_stream(
+    plan: Plan,
+    ensure_ascii: bool,
+    memo: MutableMapping[int, Any],
+    writers: MutableMapping[int, Any],
+) -> _Streamer:
+    path = plan.path
+    dump = _new_dump(ensure_ascii)
+    escape = encode_basestring_ascii if ensure_ascii else encode_basestring
+
+    def small(x: Any) -> bool:
+        return type(x) in _SIZED and len(x) < _BATCH
+
+    def sub(
+        plan: Plan, at: Sequence[Any] = path[:-1]
+    ) -> Tuple[Optional[_Streamer], _Writer]:
+        s = _stream_from_plan(
+            plan, ensure_ascii=ensure_ascii, memo=memo, writers=writers
+        )
+        w = _from_plan(plan, ensure_ascii=ensure_ascii, memo=writers)
+        if isinstance(plan, DataclassPlan) and at:
+            return s and _rooted_stream(s, at=at), _rooted(w, at=at)
+        else:
+            return s, w
+
+    if isinstance(plan, UnionPlan):
+        (branch, *_), nullable = _optional(plan)
+        bs, _ = sub(branch)
+        assert bs
+
+        def s(x: Any, parts: _Parts) -> _Stream:
+            if nullable and x is None:
+                parts.append("null")
+                return None
+            elif err := (yield from bs(x, parts)):
+                return Failure(path=path, actual=x)
+            else:
+                return None
+
+        return s
+
+    elif isinstance(plan, MapPlan):
+        lw = _from_plan(plan.key, ensure_ascii=ensure_ascii, memo=writers)
+        vs, vw = sub(plan.val)
+        lc, rc = new_check(plan.key), new_check(plan.val)
+        str_keys = isinstance(plan.key, InstancePlan) and plan.key.tp is str
+
+        def s(x: Any, parts: _Parts) -> _Stream:
+            if type(x) is not dict and not isinstance(x, Mapping):
+                return Failure(path=path, actual=x)
+
+            append, sep = parts.append, "{"
+            if type(x) is dict and lc and rc and lc(x.keys()) and rc(x.values()):
+                items = iter(x.items())
+                while batch := dict(islice(items, _BATCH)):
+                    append(sep)
+                    append(dump(batch)[1:-1])
+                    sep = ","
+                    yield
+            else:
+                for n, (k, v) in enumerate(x.items(), 1):
+                    if str_keys and type(k) is str:
+                        key = escape(k)
+                    else:
+                        acc: _Parts = []
+                        if err := lw(k, acc):
+                            return err
+                        key = _key("".join(acc))
+
+                    append(sep)
+                    append(key)
+                    append(":")
+                    if err := (
+                        (yield from vs(v, parts))
+                        if vs and not small(v)
+                        else vw(v, parts)
+                    ):
+                        return err
+                    sep = ","
+                    if not n % _EVERY:
+                        yield
+
+            append("{}" if sep == "{" else "}")
+            return None
+
+        return s
+
+    elif isinstance(plan, SeqPlan):
+        ist, iw = sub(plan.item)
+        check = new_check(plan.item)
+
+        def s(x: Any, parts: _Parts) -> _Stream:
+            if type(x) not in _ITERABLES and not is_iterable_not_str(x):
+                return Failure(path=path, actual=x)
+
+            append, sep = parts.append, "["
+            if check and type(x) in _SEQUENCES and check(x):
+                for idx in range(0, len(x), _BATCH):
+                    append(sep)
+                    append(dump(x[idx : idx + _BATCH])[1:-1])
+                    sep = ","
+                    yield
+            else:
+                for n, i in enumerate(x, 1):
+                    append(sep)
+                    if err := (
+                        (yield from ist(i, parts))
+                        if ist and not small(i)
+                        else iw(i, parts)
+                    ):
+                        return err
+                    sep = ","
+                    if not n % _EVERY:
+                        yield
+
+            append("[]" if sep == "[" else "]")
+            return None
+
+        return s
+
+    elif isinstance(plan, TuplePlan):
+        subs = tuple(map(sub, plan.items))
+
+        def s(x: Any, parts: _Parts) -> _Stream:
+            if type(x) not in _ITERABLES and not is_iterable_not_str(x):
+                return Failure(path=path, actual=x)
+
+            append, sep = parts.append, "["
+            for (ist, iw), i in zip(subs, x):
+                append(sep)
+                if err := (
+                    (yield from ist(i, parts)) if ist and not small(i) else iw(i, parts)
+                ):
+                    return err
+                sep = ","
+                yield
+
+            append("[]" if sep == "[" else "]")
+            return None
+
+        return s
+
+    elif isinstance(plan, DataclassPlan):
+        cls_fields = tuple(
+            (
+                f.name,
+                f.required,
+                escape(f.name) + ":",
+                *sub(f.plan, at=(*path, f.field)),
+            )
+            for f in plan.fields
+        )
+
+        def s(x: Any, parts: _Parts) -> _Stream:
+            if not is_dataclass(x):
+                return Failure(path=path, actual=x)
+
+            append, sep = parts.append, "{"
+            for k, req, key, fs, fw in cls_fields:
+                if (v := getattr(x, k, _ABSENT)) is not _ABSENT:
+                    append(sep)
+                    append(key)
+                    if err := (
+                        (yield from fs(v, parts))
+                        if fs and not small(v)
+                        else fw(v, parts)
+                    ):
+                        return err
+                    sep = ","
+                    yield
+                elif req:
+                    return Failure(path=path, actual=x, missing_keys={k})
+
+            append("{}" if sep == "{" else "}")
+            return None
+
+        return s
+
+    else:
+        raise ValueError(f"Unexpected plan -- {plan}")
+
+
+class new_json_writer(Generic[_T]):
+    def __init__(
+        self,
+        tp: Any,
+        encoders: Sequence[Encoder] = DEFAULT_ENCODERS,
+        ensure_ascii: bool = True,
+    ) -> None:
+        def build() -> Tuple[_Writer, Optional[_Streamer]]:
+            plan = _new_plan(tp, path=(), encoders=encoders)
+            w = _from_plan(plan, ensure_ascii=ensure_ascii)
+            s = _stream_from_plan(plan, ensure_ascii=ensure_ascii, memo={}, writers={})
+            return w, s
+
+        key = (type_key(tp), coders_key(encoders), ensure_ascii)
+        self._w, self._s = _CACHE.get(key, build=build)
+
+    def __call__(self, x: _T) -> str:
+        parts: _Parts = []
+        if err := self._w(x, parts):
+            raise to_error(EncodeError, err)
+        else:
+            return "".join(parts)
+
+    def chunks(self, x: _T, chunk_size: int = _CHUNK_SIZE) -> Iterator[str]:
+        """
+        Sequences, mappings, tuples and dataclasses at any depth are streamed
+
+        Unions are written whole, except for `Optional[...]`
+        """
+
+        if not (s := self._s):
+            text = self(x)
+            for idx in range(0, len(text), chunk_size):
+                yield text[idx : idx + chunk_size]
+        else:
+            parts: _Parts = []
+            stream, counted, size = s(x, parts), 0, 0
+            while True:
+                try:
+                    next(stream)
+                except StopIteration as e:
+                    if err := e.value:
+                        raise to_error(EncodeError, err)
+                    break
+
+                size += sum(map(len, parts[counted:]))
+                counted = len(parts)
+                if size >= chunk_size:
+                    yield "".join(parts)
+                    parts.clear()
+                    counted = size = 0
+
+            yield "".join(parts)
+
+    def write(
+        self,
+        x: _T,
+        out: _Sink,
+        chunk_size: int = _CHUNK_SIZE,
+        encoding: str = "utf-8",
+    ) -> None:
+        for chunk in self.chunks(x, chunk_size=chunk_size):
+            if isinstance(out, bytearray):
+                out += chunk.encode(encoding)
+            elif isinstance(out, TextIOBase):
+                out.write(chunk)
+            else:
+                cast(BinaryIO, out).write(chunk.encode(encoding))
@@ -1,26 +1,50 @@
-from dataclasses import dataclass
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import InitVar, dataclass, field, fields, replace
 from datetime import datetime, timezone
 from enum import Enum
-from ipaddress import IPv4Address, IPv4Interface
-from pathlib import PurePath
+from gc import collect
+from importlib import import_module
+from io import BytesIO, StringIO
+from ipaddress import IPv4Address, IPv4Interface, IPv6Network
+from json import loads
+from linecache import cache as linecache
+from pathlib import Path, PurePath
+from sys import modules
+from sys import path as sys_path
+from tempfile import TemporaryDirectory
 from typing import (
     AbstractSet,
     Any,
     ClassVar,
     Generic,
+    Iterator,
     List,
     Literal,
     Mapping,
+    MutableMapping,
+    MutableSequence,
     Optional,
     Sequence,
     Tuple,
     TypeVar,
     Union,
+    get_type_hints,
 )
-from unittest import TestCase
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import patch
 from uuid import UUID, uuid4
 
+from ..std2.aitertools import to_async
+from ..std2.pickle import delta, persist, stream
+from ..std2.pickle.binary import new_binary_decoder, new_binary_encoder
+from ..std2.pickle.cache import Interner
+from ..std2.pickle.codegen import compile_decoder
 from ..std2.pickle.coders import (
+    DEFAULT_DECODERS,
+    DEFAULT_ENCODERS,
+    NATIVE_DECODERS,
+    NATIVE_ENCODERS,
     internet_date_decoder,
     internet_date_encoder,
     iso_date_decoder,
@@ -28,9 +52,31 @@ from ..std2.pickle.coders import (
     unix_date_decoder,
     unix_date_encoder,
 )
+from ..std2.pickle.columnar import new_columnar_decoder
+from ..std2.pickle.construct import UNPROJECTED, new_builder
 from ..std2.pickle.decoder import new_decoder
 from ..std2.pickle.encoder import new_encoder
-from ..std2.pickle.types import DecodeError
+from ..std2.pickle.persist import PlanCache
+from ..std2.pickle.plan import DataclassPlan, SeqPlan, new_plan, type_hints
+from ..std2.pickle.profile import Profiler
+from ..std2.pickle.registry import Registry
+from ..std2.pickle.stream import (
+    StreamDecodeError,
+    adecode_ndjson,
+    adecode_prefixed,
+    decode_json_array,
+    decode_ndjson,
+    decode_prefixed,
+)
+from ..std2.pickle.types import (
+    DecodeError,
+    Decoder,
+    DParser,
+    EncodeError,
+    Encoder,
+    EParser,
+)
+from ..std2.pickle.writer import new_json_writer
 
 T = TypeVar("T")
 
@@ -344,3 +390,1445 @@ class Coders(TestCase):
         t1 = p1(t0)
         t2 = p2(t1)
         self.assertEqual(t2, t0.replace(tzinfo=timezone.utc))
+
+    def test_9(self) -> None:
+        p = new_decoder[Sequence[datetime]](
+            Sequence[datetime], decoders=(iso_date_decoder,)
+        )
+        expected = datetime(2001, 2, 3, 4, 5, 6, 7000, tzinfo=timezone.utc)
+        xs = ["2001-02-03T04:05:06.007Z", "2001-02-03 04:05:06.007+01:00"] * 2
+        self.assertEqual(p(xs), [expected] * 4)
+        for _ in range(2):
+            with self.assertRaises(DecodeError):
+                p(["2001-02-30T04:05:06"])
+
+    def test_10(self) -> None:
+        p = new_decoder[datetime](datetime, decoders=(internet_date_decoder,))
+        self.assertEqual(
+            p("Sat, 03 Feb 2001 04:05:06 GMT"),
+            datetime(2001, 2, 3, 4, 5, 6, tzinfo=timezone.utc),
+        )
+        self.assertEqual(
+            p("3 Feb 2001 04:05:06 -0000"),
+            datetime(2001, 2, 3, 4, 5, 6, tzinfo=timezone.utc),
+        )
+        with self.assertRaises(DecodeError):
+            p("Sat, 03 Bad 2001 04:05:06 GMT")
+
+
+class Compiled(TestCase):
+    def test_1(self) -> None:
+        @dataclass(frozen=True)
+        class A:
+            a: int
+            b: Optional[Sequence[str]] = None
+
+        @dataclass(frozen=True)
+        class C:
+            a: Mapping[str, A]
+            t: Tuple[int, str]
+            u: Union[int, A, UUID, None]
+            s: AbstractSet[Literal[1, 2]]
+
+        uuid = uuid4()
+        x = {
+            "a": {"k": {"a": 1, "b": ["a"]}},
+            "t": [1, "b"],
+            "u": str(uuid),
+            "s": [1, 2, 1],
+        }
+        p1 = new_decoder[C](C)
+        p2 = new_decoder[C](C, compile=True)
+        self.assertEqual(p2(x), p1(x))
+        self.assertEqual(p2(x).u, uuid)
+
+    def test_2(self) -> None:
+        @dataclass(frozen=True)
+        class A:
+            a: int
+
+        @dataclass(frozen=True)
+        class C:
+            a: Sequence[A]
+
+        p1 = new_decoder[C](C)
+        p2 = new_decoder[C](C, compile=True)
+        x = {"a": [{"a": 1}, {"a": "b"}]}
+        with self.assertRaises(DecodeError) as e1:
+            p1(x)
+        with self.assertRaises(DecodeError) as e2:
+            p2(x)
+        self.assertEqual(e2.exception.path, e1.exception.path)
+        self.assertEqual(e2.exception.actual, "b")
+
+    def test_3(self) -> None:
+        @dataclass(frozen=True)
+        class C:
+            a: int
+            b: List[str]
+            c: bool = False
+
+        p = new_decoder[C](C, compile=True)
+        with self.assertRaises(DecodeError) as e:
+            p({"a": 1})
+        self.assertEqual(e.exception.missing_keys, {"b"})
+        with self.assertRaises(DecodeError) as e:
+            p({"a": 1, "b": [], "d": "d"})
+        self.assertEqual(e.exception.extra_keys, {"d"})
+
+    def test_4(self) -> None:
+        @dataclass(frozen=True)
+        class C:
+            a: int
+            c: bool = False
+
+        p = new_decoder[C](C, strict=False, compile=True)
+        thing = p({"a": 1, "d": "d"})
+        self.assertEqual(thing, C(a=1, c=False))
+
+    def test_5(self) -> None:
+        class E(Enum):
+            a = "b"
+            b = "a"
+
+        p = new_decoder[Tuple[E, ...]](Tuple[E, ...], compile=True)
+        self.assertEqual(p(("a", "b")), [E.a, E.b])
+        with self.assertRaises(DecodeError):
+            p(("name", "b"))
+
+    def test_6(self) -> None:
+        class E(Enum):
+            a = b"a"
+
+        @dataclass(frozen=True)
+        class A:
+            c: int
+
+        @dataclass(frozen=True)
+        class C:
+            a: A
+            b: Sequence[str]
+            c: Mapping[str, Optional[E]]
+            d: AbstractSet[int]
+            e: Union[A, IPv4Address]
+
+        x = C(
+            a=A(c=2),
+            b=["a", "b"],
+            c={"a": E.a, "b": None},
+            d={1},
+            e=IPv4Address("1.1.1.1"),
+        )
+        p1 = new_encoder[C](C)
+        p2 = new_encoder[C](C, compile=True)
+        self.assertEqual(p2(x), p1(x))
+        self.assertEqual(
+            p2(x),
+            {
+                "a": {"c": 2},
+                "b": ["a", "b"],
+                "c": {"a": "a", "b": None},
+                "d": {1: True},
+                "e": "1.1.1.1",
+            },
+        )
+
+    def test_7(self) -> None:
+        @dataclass(frozen=True)
+        class C:
+            a: int
+
+        @dataclass(frozen=True)
+        class D:
+            b: int
+
+        p = new_encoder[C](C, compile=True)
+        with self.assertRaises(EncodeError) as e:
+            p(D(b=1))  # type: ignore
+        self.assertEqual(e.exception.missing_keys, {"a"})
+        with self.assertRaises(EncodeError):
+            p(C(a="a"))  # type: ignore
+
+    def test_8(self) -> None:
+        @dataclass(frozen=True)
+        class A:
+            kind: Literal["a"]
+            a: int
+
+        @dataclass(frozen=True)
+        class B:
+            kind: Literal["b"]
+            b: str
+
+        @dataclass(frozen=True)
+        class Like:
+            kind: Literal["a"]
+            a: int
+
+        @dataclass(frozen=True)
+        class C:
+            u: Union[A, B]
+            v: Sequence[Union[A, B]]
+
+        p1 = new_encoder[C](C)
+        p2 = new_encoder[C](C, compile=True)
+        for x in (
+            C(u=B(kind="b", b="x"), v=[A(kind="a", a=1), B(kind="b", b="y")]),
+            C(u=Like(kind="a", a=2), v=[Like(kind="a", a=3)]),  # type: ignore
+        ):
+            self.assertEqual(p2(x), p1(x))
+        with self.assertRaises(EncodeError):
+            p2(C(u=A(kind="a", a="x"), v=[]))  # type: ignore
+
+    def test_9(self) -> None:
+        @dataclass(frozen=True)
+        class C:
+            a: int
+
+        p = compile_decoder(
+            new_plan(C, path=(), custom=lambda tp, path: None), strict=True
+        )
+        filename = p.__code__.co_filename
+        self.assertIn(filename, linecache)
+        del p
+        collect()
+        self.assertNotIn(filename, linecache)
+
+
+class Cache(TestCase):
+    def test_1(self) -> None:
+        @dataclass(frozen=True)
+        class C:
+            a: int
+
+        new_decoder.cache_clear()
+        p1 = new_decoder[C](C)
+        p2 = new_decoder[C](C)
+        p3 = new_decoder[C](C, strict=False)
+        info = new_decoder.cache_info()
+        self.assertIs(p1._p, p2._p)
+        self.assertIsNot(p1._p, p3._p)
+        self.assertEqual((info.hits, info.misses, info.currsize), (1, 2, 2))
+
+    def test_2(self) -> None:
+        new_encoder.cache_clear()
+        new_encoder.cache_resize(1)
+        try:
+            new_encoder[int](int)
+            new_encoder[str](str)
+            new_encoder[int](int)
+            info = new_encoder.cache_info()
+            self.assertEqual((info.hits, info.misses, info.currsize), (0, 3, 1))
+        finally:
+            new_encoder.cache_resize(1024)
+
+    def test_3(self) -> None:
+        new_decoder.cache_clear()
+        p = new_decoder[int](int, decoders=[unix_date_decoder])
+        self.assertEqual(p(1), 1)
+        new_decoder.cache_clear()
+        self.assertEqual(new_decoder.cache_info().currsize, 0)
+
+    def test_4(self) -> None:
+        uuid = uuid4()
+        for compile in (False, True):
+            p1 = new_decoder[Union[str, UUID]](Union[str, UUID], compile=compile)
+            p2 = new_decoder[Union[UUID, str]](Union[UUID, str], compile=compile)
+            self.assertEqual(p1(str(uuid)), str(uuid))
+            self.assertEqual(p2(str(uuid)), uuid)
+            # 3.8 typing caches `Literal[1]` and `Literal[True]` as one object
+            if Literal[1] is not Literal[True]:
+                p3 = new_decoder[Literal[1]](Literal[1], compile=compile)
+                p4 = new_decoder[Literal[True]](Literal[True], compile=compile)
+                self.assertIsNot(p3._p, p4._p)
+
+        w1 = new_json_writer[Union[str, UUID]](Union[str, UUID])
+        w2 = new_json_writer[Union[UUID, str]](Union[UUID, str])
+        self.assertIsNot(w1._w, w2._w)
+
+
+class Dispatch(TestCase):
+    def test_1(self) -> None:
+        @dataclass(frozen=True)
+        class A:
+            a: int
+            kind: Literal["a"] = "a"
+
+        @dataclass(frozen=True)
+        class B:
+            kind: Literal["b", "bb"]
+            b: str
+
+        @dataclass(frozen=True)
+        class C:
+            kind: Literal["c"]
+            a: int
+
+        tp = Union[A, B, C, None]
+        for compile in (False, True):
+            p = new_decoder[Any](tp, compile=compile)
+            self.assertEqual(p({"kind": "bb", "b": "x"}), B(kind="bb", b="x"))
+            self.assertEqual(p({"kind": "c", "a": 1}), C(kind="c", a=1))
+            self.assertEqual(p({"a": 1}), A(a=1))
+            self.assertEqual(p(None), None)
+            with self.assertRaises(DecodeError):
+                p({"kind": "d", "a": 1})
+            with self.assertRaises(DecodeError):
+                p({"kind": [], "a": 1})
+
+    def test_2(self) -> None:
+        class E(Enum):
+            a = 1
+
+        tp = Union[E, int, str, None, Sequence[int], Mapping[str, int]]
+        for compile in (False, True):
+            p = new_decoder[Any](tp, compile=compile)
+            self.assertEqual(p("a"), E.a)
+            self.assertEqual(p("b"), "b")
+            self.assertEqual(p(True), True)
+            self.assertEqual(p(None), None)
+            self.assertEqual(p((1, 2)), [1, 2])
+            self.assertEqual(p({"a": 1}), {"a": 1})
+            with self.assertRaises(DecodeError):
+                p(1.5)
+
+    def test_3(self) -> None:
+        @dataclass(frozen=True)
+        class A:
+            kind: Literal[1]
+
+        @dataclass(frozen=True)
+        class B:
+            kind: Literal[True]
+
+        p = new_decoder[Union[A, B]](Union[A, B])
+        self.assertEqual(p({"kind": 1}), A(kind=1))
+
+
+class Errors(TestCase):
+    def test_1(self) -> None:
+        @dataclass(frozen=True)
+        class C:
+            a: Sequence[int]
+
+        for compile in (False, True):
+            p = new_decoder[C](C, compile=compile)
+            with self.assertRaises(DecodeError) as e:
+                p({"a": [1, "b"]})
+            self.assertEqual(e.exception.actual, "b")
+            self.assertEqual(e.exception.path[-1], int)
+
+    def test_2(self) -> None:
+        p = new_decoder[Union[int, str]](Union[int, str])
+        with self.assertRaises(DecodeError) as e:
+            p(b"a")
+        self.assertEqual(e.exception.path, (Union[int, str],))
+
+    def test_3(self) -> None:
+        p = new_decoder[int](int)
+        with self.assertRaises(DecodeError) as e:
+            p(list(range(100_000)))
+        self.assertLess(len(str(e.exception)), 1000)
+
+    def test_4(self) -> None:
+        p = new_decoder[UUID](UUID)
+        with self.assertRaises(DecodeError) as e:
+            p("not a uuid")
+        arg, *_ = e.exception.args
+        self.assertIsInstance(arg, ValueError)
+
+
+class Batch(TestCase):
+    def test_1(self) -> None:
+        @dataclass(frozen=True)
+        class C:
+            a: int
+
+        for compile in (False, True):
+            p = new_decoder[C](C, compile=compile)
+            thing = p.decode_many({"a": i} for i in range(3))
+            self.assertEqual(thing, [C(a=0), C(a=1), C(a=2)])
+            with self.assertRaises(DecodeError):
+                p.decode_many(({"a": 1}, {"a": "b"}))
+
+    def test_2(self) -> None:
+        p = new_decoder[int](int)
+        errors: MutableMapping[int, DecodeError] = {}
+        thing = p.decode_many((1, "a", 2, None), errors=errors)
+        self.assertEqual(thing, [1, 2])
+        self.assertEqual(errors.keys(), {1, 3})
+        self.assertEqual(errors[1].actual, "a")
+
+    def test_3(self) -> None:
+        class E(Enum):
+            a = 1
+
+        p = new_encoder[E](E, compile=True)
+        errors: MutableMapping[int, EncodeError] = {}
+        thing = p.encode_many((E.a, "a", E.a), errors=errors)  # type: ignore
+        self.assertEqual(thing, ["a", "a"])
+        self.assertEqual(errors.keys(), {1})
+
+    def test_4(self) -> None:
+        @dataclass(frozen=True)
+        class C:
+            a: int
+
+        for compile in (False, True):
+            p = new_decoder[C](C, compile=compile)
+            with self.assertRaises(DecodeError) as e:
+                p.decode_many(({"a": 1}, {"a": "b"}))
+            self.assertEqual(e.exception.path, (C, C.__dataclass_fields__["a"], int))
+
+        profiler = Profiler()
+        p = new_decoder[C](C, profiler=profiler)
+        self.assertEqual(p.decode_many([{"a": 1}] * 3), [C(a=1)] * 3)
+        self.assertEqual(profiler.stats()[(C,)].calls, 3)
+
+
+class Stream(TestCase):
+    def test_1(self) -> None:
+        @dataclass(frozen=True)
+        class C:
+            a: int
+
+        p = new_decoder[C](C)
+        data = b'{"a": 1}\n\n{"a": 2}\r\n{"a": 3}'
+        chunks = [data[i : i + 3] for i in range(0, len(data), 3)]
+        for stream in (data, BytesIO(data), chunks):
+            thing = [*decode_ndjson(p, stream)]
+            self.assertEqual(thing, [C(a=1), C(a=2), C(a=3)])
+
+    def test_2(self) -> None:
+        p = new_decoder[int](int)
+        with self.assertRaises(StreamDecodeError) as e:
+            [*decode_ndjson(p, b'1\n2\n"a"\n4')]
+        self.assertEqual((e.exception.line, e.exception.offset), (3, 4))
+        self.assertEqual(e.exception.actual, "a")
+        with self.assertRaises(StreamDecodeError) as e:
+            [*decode_ndjson(p, b"1\n{\n")]
+        self.assertEqual(e.exception.line, 2)
+
+    def test_3(self) -> None:
+        p = new_decoder[Union[int, Sequence[str]]](Union[int, Sequence[str]])
+        data = b' [ 1234, ["a", "b"],\n 5678 ,[]] '
+        for size in (1, 2, 3, 7, 1024):
+            thing = [*decode_json_array(p, BytesIO(data), chunk_size=size)]
+            self.assertEqual(thing, [1234, ["a", "b"], 5678, []])
+        self.assertEqual([*decode_json_array(p, b"[]")], [])
+
+    def test_4(self) -> None:
+        p = new_decoder[int](int)
+        with self.assertRaises(StreamDecodeError) as e:
+            [*decode_json_array(p, BytesIO(b'[1,\n2,\n"a"]'), chunk_size=2)]
+        self.assertEqual((e.exception.line, e.exception.offset), (3, 7))
+        with self.assertRaises(StreamDecodeError):
+            [*decode_json_array(p, b"[1, 2")]
+        with self.assertRaises(StreamDecodeError):
+            [*decode_json_array(p, b"{}")]
+
+    def test_5(self) -> None:
+        p = new_decoder[Sequence[float]](Sequence[float])
+        data = b"[[1e5, -Infinity],\n[2.5, 1E-2]]"
+        for size in range(1, 8):
+            thing = [*decode_json_array(p, data, chunk_size=size)]
+            self.assertEqual(thing, [[1e5, float("-inf")], [2.5, 1e-2]])
+        self.assertEqual(
+            [*stream._chunks(bytearray(b"abcde"), chunk_size=2)], [b"ab", b"cd", b"e"]
+        )
+
+    def test_6(self) -> None:
+        reads: MutableSequence[int] = []
+
+        def chunks() -> Iterator[bytes]:
+            yield b"[1, ]" + b" " * 64
+            for idx in range(100):
+                reads.append(idx)
+                yield b"2, " * 100
+
+        p = new_decoder[int](int)
+        with self.assertRaises(StreamDecodeError) as e:
+            [*decode_json_array(p, chunks())]
+        self.assertEqual((e.exception.line, e.exception.offset), (1, 4))
+        self.assertEqual(reads, [])
+
+    def test_7(self) -> None:
+        p = new_decoder[str](str)
+        for data in (b"[1,2]xx", b"[] ,", b"[1]\n]"):
+            with self.subTest(data=data), self.assertRaises(StreamDecodeError):
+                [*decode_json_array(new_decoder[int](int), data)]
+        self.assertEqual([*decode_json_array(p, b' ["a"] \n ')], ["a"])
+
+        # offsets count bytes, not characters
+        array, lines = '["\u00e9\u00e9", 1]'.encode(), '"\u00e9\u00e9"\n1\n'.encode()
+        for stream, offset in (
+            (decode_json_array(p, array), array.index(b"1")),
+            (decode_ndjson(p, lines), lines.index(b"1")),
+        ):
+            with self.assertRaises(StreamDecodeError) as e:
+                [*stream]
+            self.assertEqual(e.exception.offset, offset)
+
+
+class AStream(IsolatedAsyncioTestCase):
+    async def test_1(self) -> None:
+        @dataclass(frozen=True)
+        class C:
+            a: int
+
+        p = new_decoder[C](C)
+        data = b'{"a": 1}\n{"a": 2}\n'
+        chunks = (data[i : i + 5] for i in range(0, len(data), 5))
+        thing = [c async for c in adecode_ndjson(p, to_async(chunks))]
+        self.assertEqual(thing, [C(a=1), C(a=2)])
+
+    async def test_2(self) -> None:
+        p = new_decoder[Sequence[int]](Sequence[int])
+        frames = (b"[1, 2]", b"[]", b"[3]")
+        data = b"".join(len(f).to_bytes(4, "big") + f for f in frames)
+        chunks = (data[i : i + 3] for i in range(0, len(data), 3))
+        thing = [c async for c in adecode_prefixed(p, to_async(chunks))]
+        self.assertEqual(thing, [[1, 2], [], [3]])
+        self.assertEqual([*decode_prefixed(p, data)], thing)
+
+    async def test_3(self) -> None:
+        p = new_decoder[int](int)
+        with self.assertRaises(StreamDecodeError) as e:
+            [c async for c in adecode_prefixed(p, to_async((b"\0\0\0\x011\0\0",)))]
+        self.assertEqual((e.exception.line, e.exception.offset), (2, 5))
+        with self.assertRaises(StreamDecodeError) as e:
+            [c async for c in adecode_ndjson(p, to_async((b"1\n", b"a\n")))]
+        self.assertEqual(e.exception.line, 2)
+
+
+class FastInit(TestCase):
+    def test_1(self) -> None:
+        @dataclass(frozen=True)
+        class C:
+            a: int
+            b: Sequence[int] = field(default_factory=list)
+            c: str = "c"
+
+        for compile in (False, True):
+            p = new_decoder[C](C, compile=compile, fast_init=True)
+            thing = p({"a": 1})
+            self.assertEqual(thing, C(a=1))
+            self.assertEqual(vars(thing), {"a": 1, "b": [], "c": "c"})
+            self.assertIsNot(thing.b, p({"a": 1}).b)
+            self.assertEqual(p({"a": 1, "b": [2], "c": "d"}), C(a=1, b=[2], c="d"))
+            with self.assertRaises(DecodeError):
+                p({"b": [2]})
+
+    def test_2(self) -> None:
+        class C:
+            __slots__ = ("a",)
+
+            def __init__(self, a: int) -> None:
+                self.a = a
+
+        @dataclass(frozen=True)
+        class D:
+            __slots__ = ("a",)
+            a: int
+
+        for compile in (False, True):
+            p = new_decoder[D](D, compile=compile, fast_init=True)
+            thing = p({"a": 1})
+            self.assertEqual(thing.a, 1)
+            self.assertFalse(hasattr(thing, "__dict__"))
+        self.assertIsNone(new_builder(C))
+
+    def test_3(self) -> None:
+        seen = []
+
+        @dataclass
+        class C:
+            a: int
+
+            def __post_init__(self) -> None:
+                seen.append(self.a)
+
+        @dataclass
+        class D:
+            a: int
+            b: InitVar[int]
+
+            def __post_init__(self, b: int) -> None:
+                self.a += b
+
+        self.assertIsNone(new_builder(C))
+        self.assertIsNone(new_builder(D))
+        p = new_decoder[C](C, fast_init=True)
+        p({"a": 1})
+        self.assertEqual(seen, [1])
+
+    def test_4(self) -> None:
+        @dataclass(init=False)
+        class C:
+            a: int
+
+            def __init__(self, a: int) -> None:
+                self.a = a * 10
+
+        @dataclass
+        class D:
+            a: int
+
+            def __init__(self, a: int) -> None:
+                self.a = a * 10
+
+        class E(D):
+            def __init__(self, a: int) -> None:
+                self.a = a * 100
+
+        for tp, a in ((C, 10), (D, 10), (E, 100)):
+            self.assertIsNone(new_builder(tp))
+            for compile in (False, True):
+                p = new_decoder[Any](tp, compile=compile, fast_init=True)
+                self.assertEqual(p({"a": 1}).a, a)
+
+
+class Elision(TestCase):
+    def test_1(self) -> None:
+        for compile in (False, True):
+            x = {"a": 1, "b": None}
+            p = new_decoder[Mapping[str, Any]](Mapping[str, Any], compile=compile)
+            thing = p(x)
+            self.assertEqual(thing, x)
+            self.assertIsNot(thing, x)
+            with self.assertRaises(DecodeError) as e:
+                p({1: 1})
+            self.assertEqual(e.exception.actual, 1)
+
+    def test_2(self) -> None:
+        for compile in (False, True):
+            p = new_decoder[Sequence[float]](Sequence[float], compile=compile)
+            self.assertEqual(p(iter((1, 2.0))), [1, 2.0])
+            with self.assertRaises(DecodeError) as e:
+                p((1, "2"))
+            self.assertEqual(e.exception.actual, "2")
+
+    def test_3(self) -> None:
+        for compile in (False, True):
+            p = new_encoder[Mapping[str, Literal[1, 2]]](
+                Mapping[str, Literal[1, 2]], compile=compile
+            )
+            self.assertEqual(p({"a": 1}), {"a": 1})
+            with self.assertRaises(EncodeError) as e:
+                p({"a": 3})  # type: ignore
+            self.assertEqual(e.exception.actual, 3)
+
+
+class Validate(TestCase):
+    def test_1(self) -> None:
+        @dataclass(frozen=True)
+        class C:
+            a: int
+            b: Sequence[Optional[str]] = ()
+            c: Mapping[str, Any] = field(default_factory=dict)
+
+        for compile in (False, True):
+            p = new_decoder[C](C, compile=compile)
+            good = {"a": 1, "b": ["a", None], "c": {"d": []}}
+            self.assertIsNone(p.validate(good))
+            self.assertEqual(p.validate({"b": []}), (C,))
+            self.assertEqual(p.validate({"a": 1, "d": 1}), (C,))
+            lax = new_decoder[C](C, strict=False, compile=compile)
+            self.assertIsNone(lax.validate({"a": 1, "d": 1}))
+            path = p.validate({"a": 1, "b": [1]})
+            assert path
+            self.assertEqual(path[-1], Optional[str])
+
+    def test_2(self) -> None:
+        class E(Enum):
+            a = 1
+
+        now = datetime.now(tz=timezone.utc).isoformat()
+        for compile in (False, True):
+            p = new_decoder[Tuple[E, datetime]](
+                Tuple[E, datetime], decoders=(iso_date_decoder,), compile=compile
+            )
+            self.assertIsNone(p.validate(["a", now]))
+            self.assertEqual(p.validate(["b", now]), (E,))
+            self.assertTrue(p.validate(["a", "x"]))
+
+    def test_3(self) -> None:
+        for compile in (False, True):
+            for tp, good, bad in (
+                (Sequence[int], [1, 2], [1, "2"]),
+                (Mapping[str, float], {"a": 1.0}, {"a": "1"}),
+                (Union[int, str, None, bool], None, 1.0),
+                (AbstractSet[Literal[1]], (1,), iter((2,))),
+            ):
+                p = new_decoder[Any](tp, compile=compile)
+                self.assertIsNone(p.validate(good))
+                self.assertTrue(p.validate(bad))
+
+
+class Project(TestCase):
+    def test_1(self) -> None:
+        @dataclass(frozen=True)
+        class B:
+            c: int
+            d: str
+
+        @dataclass(frozen=True)
+        class A:
+            a: int
+            b: Sequence[B]
+            e: Mapping[str, Any]
+
+        x = {"a": 1, "b": [{"c": 2, "d": "d"}], "e": {"f": object()}}
+        for compile in (False, True):
+            p = new_decoder[A](A, strict=False, compile=compile, project={"b.c"})
+            thing = p({**x, "a": "not validated"})
+            self.assertEqual(thing.b[0].c, 2)
+            self.assertIs(thing.a, UNPROJECTED)
+            self.assertIs(thing.b[0].d, UNPROJECTED)
+            self.assertIn("a=<unprojected>", repr(thing))
+            with self.assertRaises(DecodeError):
+                p({"b": [{"c": "c"}]})
+            with self.assertRaises(DecodeError):
+                p({"b": [{"d": "d"}]})
+
+            q = new_decoder[A](A, strict=False, compile=compile, project={"a", "b"})
+            self.assertEqual(q(x).b, [B(c=2, d="d")])
+            self.assertIsNone(q.validate(x))
+
+    def test_2(self) -> None:
+        @dataclass(frozen=True)
+        class A:
+            t: Literal["a"]
+            v: int
+            w: int
+
+        @dataclass(frozen=True)
+        class B:
+            t: Literal["b"]
+            v: str
+            w: int
+
+        p = new_decoder[Union[A, B]](Union[A, B], strict=False, project={"v"})
+        thing = p({"t": "b", "v": "v"})
+        self.assertIsInstance(thing, B)
+        self.assertEqual((thing.t, thing.v), ("b", "v"))
+
+    def test_3(self) -> None:
+        @dataclass(frozen=True)
+        class A:
+            a: int
+
+        with self.assertRaises(ValueError):
+            new_decoder[A](A, project={"a"})
+        with self.assertRaises(ValueError):
+            new_decoder[A](A, strict=False, project={"b"})
+        with self.assertRaises(ValueError):
+            new_decoder[A](A, strict=False, project={"a.b"})
+
+    def test_4(self) -> None:
+        @dataclass(frozen=True)
+        class A:
+            __slots__ = ("a", "b", "c")
+            a: int
+            b: str
+            c: Sequence[int]
+
+        @dataclass(frozen=True)
+        class B:
+            a: int
+            b: str = "b"
+            c: Sequence[int] = field(default_factory=list)
+
+        for compile in (False, True):
+            p = new_decoder[A](A, strict=False, compile=compile, project={"a"})
+            self.assertEqual(
+                repr(p({"a": 1})),
+                f"{A.__qualname__}(a=1, b=<unprojected>, c=<unprojected>)",
+            )
+            q = new_decoder[B](B, strict=False, compile=compile, project={"a"})
+            self.assertEqual(q({"a": 1, "b": "x"}), B(a=1))
+
+
+class Columnar(TestCase):
+    def test_1(self) -> None:
+        @dataclass(frozen=True)
+        class C:
+            a: int
+            b: float
+            c: bool
+            d: Optional[str] = None
+
+        p = new_columnar_decoder[C](C)
+        cols = p(
+            [{"a": 1, "b": 1.5, "c": True}, {"a": 2, "b": 2, "c": False, "d": "d"}]
+        )
+        self.assertEqual(len(cols), 2)
+        self.assertIsInstance(cols.columns["a"], array)
+        self.assertEqual(list(cols.columns["b"]), [1.5, 2.0])
+        self.assertEqual(cols.columns["d"], [None, "d"])
+        row = cols[-1]
+        self.assertEqual((row.a, row.b, row.c, row.d), (2, 2.0, False, "d"))
+        self.assertIs(cols[0].c, True)
+        self.assertEqual([r.a for r in cols], [1, 2])
+
+    def test_2(self) -> None:
+        @dataclass(frozen=True)
+        class C:
+            a: int
+
+        p = new_columnar_decoder[C](C)
+        cols = p([{"a": 1}, {"a": 2**70}])
+        self.assertEqual(cols.columns["a"], [1, 2**70])
+        with self.assertRaises(DecodeError):
+            p([{"a": "a"}])
+        with self.assertRaises(DecodeError) as e:
+            p([{}])
+        self.assertEqual(e.exception.missing_keys, {"a"})
+        with self.assertRaises(DecodeError):
+            p([{"a": 1, "b": 2}])
+        with self.assertRaises(ValueError):
+            new_columnar_decoder[int](int)
+
+
+class Intern(TestCase):
+    def test_1(self) -> None:
+        @dataclass(frozen=True)
+        class C:
+            a: str
+            b: Mapping[str, Sequence[str]]
+
+        for compile in (False, True):
+            interner = Interner()
+            p = new_decoder[Sequence[C]](Sequence[C], compile=compile, intern=interner)
+            x = [{"a": "".join("xy"), "b": {"".join("kk"): ["".join("xy")]}}] * 2
+            c1, c2 = p(x)
+            self.assertIs(c1.a, c2.b["kk"][0])
+            self.assertIs(next(iter(c1.b)), next(iter(c2.b)))
+            info = interner.info()
+            self.assertEqual((info.hits, info.misses, info.currsize), (4, 2, 2))
+            p.validate(x)
+            self.assertEqual(interner.info().hits, 4)
+
+    def test_2(self) -> None:
+        @dataclass(frozen=True)
+        class C:
+            a: str
+            b: str
+
+        interner = Interner(maxsize=1)
+        p = new_decoder[C](C, intern=interner, intern_paths={"a"})
+        x = {"a": "".join("xy"), "b": "".join("xy")}
+        c1, c2 = p(x), p(dict(x))
+        self.assertIs(c1.a, c2.a)
+        self.assertEqual(interner.info().misses, 1)
+        self.assertEqual(p({"a": "z", "b": "z"}), C(a="z", b="z"))
+        self.assertEqual(interner.info().currsize, 1)
+        interner.clear()
+        self.assertEqual(interner.info().currsize, 0)
+        with self.assertRaises(ValueError):
+            new_decoder[C](C, intern=interner, intern_paths={"c"})
+
+
+class Writer(TestCase):
+    def test_1(self) -> None:
+        class E(Enum):
+            a = 1
+
+        @dataclass(frozen=True)
+        class C:
+            a: Optional[int]
+            b: Mapping[E, Sequence[float]]
+            c: AbstractSet[str]
+            d: Tuple[bool, datetime]
+            e: Any
+            f: str = 'é\n"'
+
+        tp = Sequence[C]
+        now = datetime.now(tz=timezone.utc)
+        x = [C(a=None, b={E.a: [1.5, 2]}, c={"s"}, d=(True, now), e={"k": [None]})]
+        for ascii in (True, False):
+            encoders = (iso_date_encoder, *DEFAULT_ENCODERS)
+            w = new_json_writer[Any](tp, encoders=encoders, ensure_ascii=ascii)
+            self.assertEqual(loads(w(x)), new_encoder[Any](tp, encoders=encoders)(x))
+            self.assertEqual(w([]), "[]")
+
+    def test_2(self) -> None:
+        w = new_json_writer[Sequence[Mapping[str, int]]](Sequence[Mapping[str, int]])
+        x = [{"a": i} for i in range(100)]
+        chunks = [*w.chunks(x, chunk_size=64)]
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), w(x))
+        self.assertEqual(loads(w(x)), x)
+
+        text, buf, raw = StringIO(), bytearray(), BytesIO()
+        for out in (text, buf, raw):
+            w.write(x, out, chunk_size=64)
+        self.assertEqual(text.getvalue().encode(), bytes(buf))
+        self.assertEqual(raw.getvalue(), bytes(buf))
+
+    def test_3(self) -> None:
+        w = new_json_writer[Sequence[int]](Sequence[int])
+        with self.assertRaises(EncodeError):
+            w([1, "a"])  # type: ignore
+        with self.assertRaises(EncodeError):
+            [*w.chunks(1)]  # type: ignore
+        self.assertEqual(
+            [*new_json_writer[int](int).chunks(12345, chunk_size=2)], ["12", "34", "5"]
+        )
+
+    def test_4(self) -> None:
+        @dataclass(frozen=True)
+        class C:
+            name: str
+            rows: Optional[Sequence[Mapping[str, int]]]
+            ints: Sequence[int]
+            floats: Mapping[str, float]
+            pair: Tuple[Sequence[int], str]
+            child: Optional[_Node] = None
+
+        node = _Node(name="a", children=[_Node(name="b", children=[])])
+        x = C(
+            name="c",
+            rows=[{"a": i} for i in range(500)],
+            ints=range(5000),
+            floats={str(i): i / 2 for i in range(5000)},
+            pair=([1, 2], "p"),
+            child=node,
+        )
+        w = new_json_writer[C](C)
+        for size in (1, 256, 4096):
+            chunks = [*w.chunks(x, chunk_size=size)]
+            self.assertEqual("".join(chunks), w(x))
+            self.assertLess(max(map(len, chunks)), size + 2**14)
+        self.assertGreater(len([*w.chunks(x, chunk_size=256)]), 50)
+        self.assertEqual(
+            "".join(w.chunks(replace(x, rows=None))), w(replace(x, rows=None))
+        )
+
+        with self.assertRaises(EncodeError):
+            [*w.chunks(replace(x, rows=[{"a": "b"}]))]  # type: ignore
+        with self.assertRaises(EncodeError):
+            [*w.chunks(replace(x, rows=1))]  # type: ignore
+
+
+class Binary(TestCase):
+    def test_1(self) -> None:
+        class E(Enum):
+            a = "x"
+            b = "y"
+
+        @dataclass(frozen=True)
+        class C:
+            a: Optional[int]
+            b: Mapping[E, Sequence[float]]
+            c: AbstractSet[str]
+            d: Tuple[bool, Literal[3, "z"]]
+            e: UUID
+            f: IPv4Interface
+            g: bytes
+            h: PurePath
+
+        tp = Sequence[C]
+        x = [
+            C(
+                a=-(2**70),
+                b={E.b: [1.5, -2.0]},
+                c={"é", ""},
+                d=(True, "z"),
+                e=uuid4(),
+                f=IPv4Interface("10.0.0.1/24"),
+                g=b"\x00\xff",
+                h=PurePath("a", "b"),
+            ),
+            C(
+                a=None,
+                b={},
+                c=set(),
+                d=(False, 3),
+                e=uuid4(),
+                f=IPv4Interface("1.2.3.4/32"),
+                g=b"",
+                h=PurePath("."),
+            ),
+        ]
+        data = new_binary_encoder[Sequence[C]](tp)(x)
+        self.assertEqual(new_binary_decoder[Sequence[C]](tp)(memoryview(data)), x)
+
+    def test_2(self) -> None:
+        enc = new_binary_encoder[int](int)
+        dec = new_binary_decoder[int](int)
+        for i in (0, 1, -1, 63, -64, 64, 2**64, -(2**64)):
+            self.assertEqual(dec(enc(i)), i)
+        self.assertEqual(len(enc(63)), 1)
+        self.assertEqual(len(enc(64)), 2)
+        self.assertLess(len(enc(2**40)), len(str(2**40)))
+
+    def test_3(self) -> None:
+        with self.assertRaises(EncodeError):
+            new_binary_encoder[Sequence[int]](Sequence[int])([1, "a"])  # type: ignore
+        dec = new_binary_decoder[Sequence[str]](Sequence[str])
+        data = new_binary_encoder[Sequence[str]](Sequence[str])(["abc"])
+        for bad in (data[:-1], data + b"\x00", b"\x01\x01\xff"):
+            with self.assertRaises(DecodeError):
+                dec(bad)
+        with self.assertRaises(ValueError):
+            new_binary_decoder[Any](Any)
+
+    def test_4(self) -> None:
+        @dataclass(frozen=True)
+        class C:
+            a: int
+
+            def __post_init__(self) -> None:
+                if self.a < 0:
+                    raise ValueError(self.a)
+
+        @dataclass(frozen=True)
+        class D:
+            c: C
+
+        @dataclass(frozen=True)
+        class Unchecked:
+            a: int
+
+        data = new_binary_encoder[D](D)(D(c=Unchecked(-1)))  # type: ignore
+        with self.assertRaises(DecodeError) as e:
+            new_binary_decoder[D](D)(data)
+        self.assertEqual(e.exception.path, (D, D.__dataclass_fields__["c"], C))
+
+        for tp in (Sequence[None], Mapping[None, None]):
+            with self.subTest(tp=tp), self.assertRaises(DecodeError):
+                new_binary_decoder[Any](tp)(b"\xff\xff\xff\xff\x0f")
+
+
+class Native(TestCase):
+    def test_1(self) -> None:
+        @dataclass(frozen=True)
+        class C:
+            a: UUID
+            b: IPv4Address
+            c: IPv4Interface
+            d: IPv6Network
+            e: datetime
+            f: PurePath
+
+        x = C(
+            a=uuid4(),
+            b=IPv4Address("10.1.2.3"),
+            c=IPv4Interface("10.1.2.3/16"),
+            d=IPv6Network("fe80::/64"),
+            e=datetime(2001, 2, 3, 4, 5, 6, 789012, tzinfo=timezone.utc),
+            f=PurePath("a", "b"),
+        )
+        thing = new_encoder[C](C, encoders=NATIVE_ENCODERS)(x)
+        self.assertEqual(
+            thing,
+            {
+                "a": x.a.bytes,
+                "b": int(x.b),
+                "c": (int(x.c.ip), 16),
+                "d": (int(x.d.network_address), 64),
+                "e": 981173106789012000,
+                "f": "a/b",
+            },
+        )
+        self.assertEqual(new_decoder[C](C, decoders=NATIVE_DECODERS)(thing), x)
+
+    def test_2(self) -> None:
+        p = new_decoder[IPv4Address](IPv4Address, decoders=NATIVE_DECODERS)
+        self.assertEqual(p(b"\x7f\x00\x00\x01"), IPv4Address("127.0.0.1"))
+        for bad in (True, "127.0.0.1", 2**40):
+            with self.assertRaises(DecodeError):
+                p(bad)
+        d = new_decoder[datetime](datetime, decoders=NATIVE_DECODERS)
+        self.assertEqual(
+            d(-1000), datetime(1969, 12, 31, 23, 59, 59, 999999, tzinfo=timezone.utc)
+        )
+        with self.assertRaises(DecodeError):
+            d(1.5)
+        with self.assertRaises(DecodeError):
+            new_decoder[UUID](UUID, decoders=NATIVE_DECODERS)(b"short")
+
+
+class Registries(TestCase):
+    def test_1(self) -> None:
+        class D(datetime):
+            ...
+
+        seen: List[Any] = []
+
+        def spy(t: Any) -> Decoder:
+            def d(
+                tp: Any, path: Sequence[Any], strict: bool, decoders: Sequence[Decoder]
+            ) -> None:
+                seen.append((t, tp))
+                return None
+
+            return d
+
+        decoders = Registry[Decoder](
+            (
+                *((t, spy(t)) for t in (int, str, bytes, UUID)),
+                (datetime, iso_date_decoder),
+            ),
+        )
+        p = new_decoder[Tuple[D, int]](Tuple[D, int], decoders=decoders)
+        t = datetime(2001, 2, 3, tzinfo=timezone.utc)
+        self.assertEqual(p(("2001-02-03", 1)), [t, 1])
+        self.assertEqual(seen, [(int, int)])
+        self.assertEqual(len(decoders), 5)
+
+    def test_2(self) -> None:
+        encoders = Registry[Encoder](
+            ((UUID, DEFAULT_ENCODERS[0]),), fallback=(iso_date_encoder,)
+        )
+        uid, now = uuid4(), datetime.now(tz=timezone.utc)
+        p = new_encoder[Tuple[UUID, datetime]](Tuple[UUID, datetime], encoders=encoders)
+        self.assertEqual(p((uid, now)), [str(uid), now.isoformat()])
+        self.assertEqual(
+            encoders.resolve(UUID), (DEFAULT_ENCODERS[0], iso_date_encoder)
+        )
+        self.assertEqual(encoders.resolve(int), (iso_date_encoder,))
+
+    def test_3(self) -> None:
+        def tagged(
+            tp: Any, path: Sequence[Any], strict: bool, decoders: Sequence[Decoder]
+        ) -> DParser:
+            return lambda x: (True, ("c", x))
+
+        by_int = Registry[Decoder](((int, tagged),))
+        by_str = Registry[Decoder](((str, tagged),))
+        self.assertEqual(tuple(by_int), tuple(by_str))
+        self.assertEqual(new_decoder[Any](int, decoders=by_int)(5), ("c", 5))
+        self.assertEqual(new_decoder[Any](int, decoders=by_str)(5), 5)
+
+        def tag(tp: Any, path: Sequence[Any], encoders: Sequence[Encoder]) -> EParser:
+            return lambda x: (True, ["c", x])
+
+        enc_int = Registry[Encoder](((int, tag),))
+        enc_str = Registry[Encoder](((str, tag),))
+        self.assertEqual(new_encoder[int](int, encoders=enc_int)(5), ["c", 5])
+        self.assertEqual(new_encoder[int](int, encoders=enc_str)(5), 5)
+        self.assertEqual(new_json_writer[int](int, encoders=enc_int)(5), '["c",5]')
+        self.assertEqual(new_json_writer[int](int, encoders=enc_str)(5), "5")
+
+
+@dataclass(frozen=True)
+class _PersistedChild:
+    a: Optional[int]
+    b: Mapping[str, float]
+
+
+@dataclass(frozen=True)
+class _Persisted:
+    a: Optional["_PersistedChild"]
+    b: Mapping[str, Tuple[UUID, Literal["x", "y"]]]
+
+
+class Persist(TestCase):
+    def test_1(self) -> None:
+        x = {"a": {"a": None, "b": {}}, "b": {"k": [str(uuid4()), "x"]}}
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "plans"
+            new_decoder.cache_clear()
+            cache = PlanCache(path)
+            expected = new_decoder[_Persisted](_Persisted, plan_cache=cache)(x)
+            cache.save()
+            self.assertTrue(path.exists())
+
+            new_decoder.cache_clear()
+            with patch.object(persist, "type_hints", side_effect=AssertionError):
+                p = new_decoder[_Persisted](_Persisted, plan_cache=PlanCache(path))
+            self.assertEqual(p(x), expected)
+            new_decoder.cache_clear()
+
+    def test_2(self) -> None:
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "plans"
+            path.write_bytes(b"garbage")
+            cache = PlanCache(path)
+            self.assertEqual(cache.hints(_Persisted), get_type_hints(_Persisted))
+            cache.save()
+            self.assertEqual(PlanCache(path).hints(_Persisted), cache.hints(_Persisted))
+
+    def test_3(self) -> None:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "_persist_b.py").write_text("class B:\n    ...\n")
+            (root / "_persist_a.py").write_text(
+                "from __future__ import annotations\n"
+                "from dataclasses import dataclass\n"
+                "import _persist_b\n"
+                "@dataclass\n"
+                "class A:\n"
+                "    b: _persist_b.B\n"
+            )
+            sys_path.insert(0, tmp)
+            try:
+                a = import_module("_persist_a")
+                cache = PlanCache(root / "plans")
+                self.assertEqual(cache.hints(a.A), get_type_hints(a.A))
+
+                with patch.object(persist, "type_hints", wraps=type_hints) as m:
+                    cache.hints(a.A)
+                    m.assert_not_called()
+                    with (root / "_persist_b.py").open("a") as fd:
+                        fd.write("# changed\n")
+                    cache.hints(a.A)
+                    m.assert_called_once()
+            finally:
+                sys_path.remove(tmp)
+                modules.pop("_persist_a", None)
+                modules.pop("_persist_b", None)
+
+
+class Profile(TestCase):
+    def test_1(self) -> None:
+        @dataclass(frozen=True)
+        class C:
+            a: int
+            b: Union[int, str]
+
+        profiler = Profiler()
+        p = new_decoder[Sequence[C]](Sequence[C], profiler=profiler)
+        p([{"a": 1, "b": "x"}, {"a": 2, "b": 3}])
+        with self.assertRaises(DecodeError):
+            p([{"a": "bad", "b": 1}])
+
+        stats = profiler.stats()
+        a, b = fields(C)
+        self.assertEqual(stats[(Sequence[C],)].calls, 2)
+        self.assertEqual(stats[(Sequence[C],)].failures, 1)
+        self.assertEqual(stats[(C,)].calls, 3)
+        self.assertEqual(stats[(C, a, int)].calls, 3)
+        self.assertEqual(stats[(C, a, int)].failures, 1)
+        self.assertEqual(stats[(C, b, Union[int, str])].calls, 2)
+        self.assertGreater(stats[(Sequence[C],)].ns, 0)
+
+        report = profiler.report(sort_by="failures", limit=2).splitlines()
+        self.assertEqual(len(report), 3)
+        self.assertIn("Sequence[C]", profiler.report())
+        self.assertIn("C -> b -> Union[int, str]", profiler.report())
+
+        profiler.reset()
+        self.assertEqual(profiler.stats()[(C,)].calls, 0)
+
+    def test_2(self) -> None:
+        profiler = Profiler()
+        p = new_encoder[Mapping[str, int]](Mapping[str, int], profiler=profiler)
+        self.assertEqual(p({"a": 1}), {"a": 1})
+        self.assertEqual(profiler.stats()[(Mapping[str, int],)].calls, 1)
+        with self.assertRaises(ValueError):
+            new_encoder[int](int, compile=True, profiler=profiler)
+
+
+@dataclass(frozen=True)
+class _Chunked:
+    a: int
+    b: Optional[UUID]
+
+
+class Parallel(TestCase):
+    def test_1(self) -> None:
+        tp = Sequence[_Chunked]
+        xs = [{"a": i, "b": None if i % 2 else str(uuid4())} for i in range(1000)]
+        p = new_decoder[Sequence[_Chunked]](tp)
+        with ProcessPoolExecutor(max_workers=2) as ex:
+            self.assertEqual(p.decode_parallel(xs, executor=ex, chunks=4), p(xs))
+            with self.assertRaises(DecodeError):
+                p.decode_parallel([*xs, {"a": "x", "b": None}], executor=ex)
+        self.assertEqual(p.decode_parallel([]), [])
+
+    def test_2(self) -> None:
+        tp = Sequence[datetime]
+        now = datetime.now(tz=timezone.utc)
+        xs = [now.isoformat() for _ in range(100)]
+        p = new_decoder[Sequence[datetime]](
+            tp, decoders=(iso_date_decoder, *DEFAULT_DECODERS)
+        )
+        with ProcessPoolExecutor(max_workers=2) as ex:
+            with patch.object(ex, "map", wraps=ex.map) as m:
+                self.assertEqual(p.decode_parallel(xs, executor=ex), [now] * 100)
+                m.assert_called_once()
+
+    def test_3(self) -> None:
+        spec: Sequence[Tuple[Any, Any]] = (
+            (Tuple[int, str], [1, "a"]),
+            (AbstractSet[int], [1, 2, 3]),
+            (Mapping[str, int], {"a": 1, "b": 2}),
+        )
+        for tp, x in spec:
+            with self.subTest(tp=tp):
+                p = new_decoder[Any](tp)
+                with ProcessPoolExecutor(max_workers=2) as ex:
+                    with patch.object(ex, "map", wraps=ex.map) as m:
+                        self.assertEqual(p.decode_parallel(x, executor=ex), p(x))
+                        m.assert_not_called()
+
+    def test_4(self) -> None:
+        tp = Sequence[str]
+        xs = [str(i) for i in range(100)]
+        for p in (
+            new_decoder[Sequence[str]](tp, intern=Interner()),
+            new_decoder[Sequence[str]](tp, profiler=Profiler()),
+        ):
+            with self.assertRaises(ValueError):
+                p.decode_parallel(xs)
+
+        p = new_decoder[Sequence[str]](tp)
+        self.assertEqual(p.decode_parallel(xs), xs)
+        self.assertEqual(p.decode_parallel(xs, chunks=3), xs)
+
+
+@dataclass(frozen=True)
+class _Node:
+    name: str
+    children: Sequence["_Node"] = ()
+    alias: Optional["_Node"] = None
+
+
+@dataclass(frozen=True)
+class _Twice:
+    a: _Chunked
+    b: Sequence[_Chunked]
+
+
+class Recursive(TestCase):
+    def test_1(self) -> None:
+        leaf: Mapping[str, Any] = {"name": "c", "children": [], "alias": None}
+        x = {"name": "a", "children": [{"name": "b", "children": [leaf]}]}
+        node = _Node(name="a", children=[_Node(name="b", children=[_Node("c", [])])])
+
+        for compile in (False, True):
+            p = new_decoder[_Node](_Node, compile=compile, intern=Interner())
+            self.assertEqual(p(x), node)
+            self.assertEqual(
+                p({"name": "a", "alias": leaf}), _Node("a", alias=_Node("c", []))
+            )
+            self.assertIsNone(p.validate(x))
+            self.assertEqual(
+                p.validate({"name": "a", "children": [{"name": 1}]}),
+                (
+                    _Node,
+                    _Node.__dataclass_fields__["children"],
+                    _Node,
+                    _Node.__dataclass_fields__["name"],
+                    str,
+                ),
+            )
+            with self.assertRaises(DecodeError):
+                p({"name": "a", "children": [{"children": []}]})
+
+            e = new_encoder[_Node](_Node, compile=compile)
+            self.assertEqual(p(e(node)), node)
+
+        self.assertEqual(
+            loads(new_json_writer[_Node](_Node)(node)), new_encoder[_Node](_Node)(node)
+        )
+        data = new_binary_encoder[_Node](_Node)(node)
+        self.assertEqual(new_binary_decoder[_Node](_Node)(memoryview(data)), node)
+
+    def test_2(self) -> None:
+        plan = new_plan(_Twice, path=(), custom=lambda tp, path: None)
+        assert isinstance(plan, DataclassPlan)
+        a, b = (f.plan for f in plan.fields)
+        assert isinstance(b, SeqPlan)
+        self.assertIs(a, b.item)
+
+        x = {"a": {"a": 1, "b": None}, "b": [{"a": 2, "b": None}]}
+        for compile in (False, True):
+            p = new_decoder[_Twice](_Twice, compile=compile)
+            self.assertEqual(p(x), _Twice(a=_Chunked(1, None), b=[_Chunked(2, None)]))
+
+    def test_3(self) -> None:
+        a, b = (_Twice.__dataclass_fields__[k] for k in ("a", "b"))
+        ca = _Chunked.__dataclass_fields__["a"]
+        full = (_Twice, b, _Chunked, ca, int)
+
+        x = {"a": {"a": 1, "b": None}, "b": [{"a": "x", "b": None}]}
+        for compile in (False, True):
+            p = new_decoder[_Twice](_Twice, compile=compile)
+            with self.assertRaises(DecodeError) as e:
+                p(x)
+            self.assertEqual(e.exception.path, full)
+            self.assertEqual(p.validate(x), full)
+
+        y = _Twice(a=_Chunked(1, None), b=[_Chunked("x", None)])  # type: ignore
+        for compile in (False, True):
+            with self.assertRaises(EncodeError) as f:
+                new_encoder[_Twice](_Twice, compile=compile)(y)
+            self.assertEqual(f.exception.path, full)
+        with self.assertRaises(EncodeError) as f:
+            new_json_writer[_Twice](_Twice)(y)
+        self.assertEqual(f.exception.path, full)
+        with self.assertRaises(EncodeError) as f:
+            new_binary_encoder[_Twice](_Twice)(y)
+        self.assertEqual(f.exception.path, full)
+
+        profiler = Profiler()
+        new_decoder[_Twice](_Twice, profiler=profiler)(
+            {"a": {"a": 1, "b": None}, "b": []}
+        )
+        stats = profiler.stats()
+        self.assertEqual(stats[(_Twice, a, _Chunked)].calls, 1)
+        self.assertEqual(stats[(_Twice, b, _Chunked)].calls, 0)
+
+
+class Delta(TestCase):
+    def test_1(self) -> None:
+        @dataclass(frozen=True)
+        class C:
+            a: int
+            b: Mapping[str, Sequence[int]]
+            c: Optional[str] = None
+
+        e = new_encoder[C](C)
+        d = new_decoder[C](C)
+        c1 = C(a=1, b={"x": [1, 2], "y": [3]}, c="c")
+        c2 = C(a=1, b={"x": [1, 4], "z": []}, c=None)
+
+        base = e(c1)
+        delta, enc = e.encode_delta(c2, base=base)
+        self.assertEqual(
+            sorted(map(repr, delta)),
+            sorted(
+                map(
+                    repr,
+                    [
+                        (("b", "x", 1), 4),
+                        (("b", "z"), []),
+                        (("b", "y"),),
+                        (("c",), None),
+                    ],
+                )
+            ),
+        )
+        self.assertEqual(enc, e(c2))
+
+        c3, patched = d.decode_delta(base, delta)
+        self.assertEqual(c3, c2)
+        self.assertEqual(patched, enc)
+        self.assertEqual(d(base), c1)
+        self.assertEqual(e.encode_delta(c2, base=enc)[0], [])
+
+    def test_2(self) -> None:
+        e = new_encoder[Sequence[int]](Sequence[int])
+        d = new_decoder[Sequence[int]](Sequence[int])
+        delta, _ = e.encode_delta([1, 2, 3], base=[1, 2])
+        self.assertEqual(delta, [((), [1, 2, 3])])
+        self.assertEqual(e.encode_delta([True], base=[1])[0], [((0,), True)])
+        with self.assertRaises(DecodeError):
+            d.decode_delta([1], [((5,), 1)])
+        with self.assertRaises(DecodeError):
+            d.decode_delta([1], [((0,), "x")])
+
+    def test_3(self) -> None:
+        base = {"a": "abc", "b": 1}
+        for ops in ([(("a", 0), "x")], [(("b", "k"),)], [(("b", 0, 1), 2)]):
+            with self.subTest(ops=ops), self.assertRaises(ValueError):
+                delta.patch(base, ops)
+        self.assertEqual(base, {"a": "abc", "b": 1})
+
+        d = new_decoder[Mapping[str, str]](Mapping[str, str])
+        with self.assertRaises(DecodeError):
+            d.decode_delta({"a": "abc"}, [(("a", 0), "x")])